@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from dls_engine import match_id
+from dls_metrics import CONTENT_TYPE, METRICS
+from dls_players import STAT_TYPES
+from dls_registry import get_registry
+from dls_storage import StorageError
+
+# --- 🌐 READ-ONLY JSON API ---
+# Standings, fixtures, results and leaderboards for stream overlays and bots, straight from
+# the shared read-only snapshot of each tournament. A response body is encoded once per
+# tournament version and kept in the engine's view cache; the ETag is that version, so a
+# client polling with If-None-Match gets an empty 304 until the next save.
+#
+#   GET /api/tournaments
+#   GET /api/<tournament>                          summary (format, round, phase, champion)
+#   GET /api/<tournament>/standings
+#   GET /api/<tournament>/fixtures?team=&status=   status: All / Played / Unplayed
+#   GET /api/<tournament>/results
+#   GET /api/<tournament>/eliminated
+#   GET /api/<tournament>/survival
+#   GET /api/<tournament>/leaders/<G|A|R>?n=10
+#   GET /metrics                                   Prometheus text, when metrics are on (dls_metrics)
+
+DEFAULT_PORT = 8502
+MAX_LEADERS = 100
+FIXTURE_STATUSES = ("All", "Played", "Unplayed")
+BOOT_ID = secrets.token_hex(4)  # versions restart with the process, so ETags carry the process too
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _plain(value):
+    """json.dumps fallback for numpy scalars (leaderboard columns)"""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(payload):
+    return json.dumps(payload, default=_plain, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag_for(tid, version):
+    return f'"{BOOT_ID}-{tid}-{version}"'
+
+
+def etag_matches(header, etag):
+    """If-None-Match check: "*", one tag, or a comma-separated list (weak tags compare equal)"""
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+# --- 📦 PAYLOADS ---
+
+def summary(tid, name, engine):
+    s = engine.state
+    return {
+        "id": tid, "name": name, "version": engine.version,
+        "format": s.format, "started": s.started, "current_round": s.current_round,
+        "round_number": s.round_number, "battle_phase": s.battle_phase, "champion": s.champion,
+        "teams": len(s.teams), "active_teams": s.active_teams,
+    }
+
+
+def fixture_rows(engine, team, status):
+    s = engine.state
+    rows = []
+    for i in engine.fixture_indices(team, status):
+        fix = s.fixtures[i]
+        if len(fix) < 2: continue
+        res = s.results.get(match_id(i, fix[0], fix[1]))
+        rows.append({"index": i, "home": fix[0], "away": fix[1], "played": res is not None,
+                     "score": res[:2] if res else None,
+                     "penalties": res[2:4] if res and len(res) >= 4 else None})
+    return rows
+
+
+def result_rows(engine):
+    s = engine.state
+    rows = []
+    for i in engine.fixture_indices(None, "Played"):
+        home, away = s.fixtures[i][0], s.fixtures[i][1]
+        mid = match_id(i, home, away)
+        res = s.results[mid]
+        rows.append({"index": i, "match": mid, "home": home, "away": away, "score": res[:2],
+                     "penalties": res[2:4] if len(res) >= 4 else None,
+                     "details": s.match_meta.get(mid, {})})
+    return rows
+
+
+def leader_rows(engine, stat_type, n):
+    top = engine.leaderboard(stat_type, n)
+    value = top.columns[-1]
+    return [{"rank": rank, "player": p, "club": c, "value": v}
+            for rank, (p, c, v) in enumerate(zip(top["Player"], top["Club"], top[value]), 1)]
+
+
+class TournamentApi:
+    """Routes a GET path to (status, body, etag) over a registry's shared snapshots"""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def tournaments(self):
+        return [{"id": tid, "name": name} for tid, name in self.registry.tournaments().items()]
+
+    def snapshot(self, tid):
+        if tid not in self.registry:
+            raise ApiError(404, f"No tournament '{tid}'")
+        try:
+            engine = self.registry.open(tid)
+        except StorageError as e:
+            raise ApiError(503, str(e)) from e
+        engine.sync()
+        return engine.snapshot()
+
+    def view(self, tid, parts, query):
+        """(view name, args, build) for one tournament endpoint"""
+        if tid not in self.registry:
+            raise ApiError(404, f"No tournament '{tid}'")
+        endpoint = parts[0] if parts else ""
+        if endpoint == "" and len(parts) <= 1:
+            name = self.registry.name(tid)
+            return "api:summary", (), lambda engine: summary(tid, name, engine)
+        if endpoint == "standings":
+            return "api:standings", (), lambda engine: engine.get_cumulative_standings()
+        if endpoint == "fixtures":
+            team = query.get("team", [None])[0] or None
+            status = query.get("status", ["All"])[0].title()
+            if status not in FIXTURE_STATUSES:
+                raise ApiError(400, f"status must be one of {', '.join(FIXTURE_STATUSES)}")
+            return "api:fixtures", (team, status), lambda engine: fixture_rows(engine, team, status)
+        if endpoint == "results":
+            return "api:results", (), result_rows
+        if endpoint == "eliminated":
+            return "api:eliminated", (), lambda engine: engine.state.eliminated_teams
+        if endpoint == "survival":
+            return "api:survival", (), lambda engine: engine.state.survival_history
+        if endpoint == "leaders" and len(parts) == 2:
+            stat_type = parts[1].upper()
+            if stat_type not in STAT_TYPES:
+                raise ApiError(404, f"Leaderboards: {', '.join(STAT_TYPES)}")
+            try:
+                n = min(max(int(query.get("n", ["10"])[0]), 1), MAX_LEADERS)
+            except ValueError:
+                raise ApiError(400, "n must be a number") from None
+            return "api:leaders", (stat_type, n), lambda engine: leader_rows(engine, stat_type, n)
+        raise ApiError(404, "Unknown endpoint")
+
+    def get(self, path, if_none_match=None):
+        url = urlsplit(path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        if parts[0] != "api":
+            raise ApiError(404, "Not found")
+        parts = parts[1:]
+        if not parts or parts == [""] or parts == ["tournaments"]:
+            return 200, encode(self.tournaments()), None
+
+        tid = parts[0]
+        name, args, build = self.view(tid, parts[1:], parse_qs(url.query))
+        engine = self.snapshot(tid)
+        if name == "api:fixtures" and args[0] is not None and args[0] not in engine.state.teams:
+            raise ApiError(404, f"No team '{args[0]}'")
+        etag = etag_for(tid, engine.version)
+        if etag_matches(if_none_match, etag):
+            return 304, b"", etag
+        return 200, engine.cached_view(name, lambda *_: encode(build(engine)), *args), etag
+
+
+# --- 🔌 HTTP SERVER ---
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so pollers don't reconnect every time
+    disable_nagle_algorithm = True  # headers and body go out as two writes; don't wait for an ACK between them
+    server_version = "DLSUltraAPI/1.0"
+    api = None
+    quiet = True
+
+    def _send(self, status, body, etag=None, head=False, content_type="application/json; charset=utf-8"):
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", "0" if status == 304 else str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if not head and status != 304:
+            self.wfile.write(body)
+
+    def _get(self, head=False):
+        if urlsplit(self.path).path == "/metrics" and METRICS.enabled:
+            self._send(200, METRICS.render().encode("utf-8"), head=head, content_type=CONTENT_TYPE)
+            return
+        try:
+            status, body, etag = self.api.get(self.path, self.headers.get("If-None-Match"))
+        except ApiError as e:
+            status, body, etag = e.status, encode({"error": str(e)}), None
+        self._send(status, body, etag, head=head)
+
+    def do_GET(self):
+        self._get()
+
+    def do_HEAD(self):
+        self._get(head=True)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(registry, host="127.0.0.1", port=DEFAULT_PORT, quiet=True):
+    handler = type("BoundApiHandler", (ApiHandler,), {"api": TournamentApi(registry), "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def serve_in_background(registry, host="127.0.0.1", port=DEFAULT_PORT):
+    """Start the API on a daemon thread, once per address per process (Streamlit reruns call this freely)"""
+    with _servers_lock:
+        if (host, port) not in _servers:
+            server = make_server(registry, host, port)
+            threading.Thread(target=server.serve_forever, name=f"dls-api-{port}", daemon=True).start()
+            _servers[(host, port)] = server
+        return _servers[(host, port)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve DLS Ultra standings, fixtures and stats as read-only JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--registry", default=os.environ.get("DLS_REGISTRY_FILE", "dls_tournaments.json"))
+    parser.add_argument("--root", default=os.environ.get("DLS_TOURNAMENT_DIR", "tournaments"))
+    parser.add_argument("--backend", default=os.environ.get("DLS_STORAGE", "json"), choices=["json", "sqlite"])
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = make_server(get_registry(args.registry, args.root, backend=args.backend),
+                         args.host, args.port, quiet=not args.verbose)
+    print(f"Serving {args.registry} on http://{args.host}:{args.port}/api/tournaments")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
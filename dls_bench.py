@@ -0,0 +1,222 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from dls_engine import FORMATS, TournamentEngine, TournamentState
+from dls_fixtures import generate_balanced_fixtures_fixed
+from dls_storage import get_store
+
+# --- ⏱️ BENCHMARKS ---
+# Times the tournament core on synthetic tournaments (8 to 5,000 clubs, every format) and
+# appends each run to a JSON-lines file, so a run can be compared with the one before it.
+# The engine is plain Python, so nothing here needs Streamlit or a session.
+
+DEFAULT_SIZES = (8, 64, 512, 5000)
+DEFAULT_OUTPUT = "dls_bench.jsonl"
+DEFAULT_REPEAT = 5
+TIME_BUDGET = 3.0          # seconds per case; slow cases stop repeating once it is spent
+REGRESSION_RATIO = 1.2     # slower than the previous run by this factor is flagged
+NOISE_FLOOR_MS = 0.05      # below this a ratio means nothing
+
+# Formats that can't hold every size: a league is n·(n-1) fixtures, World Cup groups are A-H
+FORMAT_LIMITS = {"Home & Away League": 1000, "World Cup (Groups + Knockout)": 32}
+FORMAT_ALIASES = dict(zip(("league", "worldcup", "knockout", "survival"), FORMATS))
+
+SCORER_POOL = 6  # distinct player names per club in the synthetic scorer strings
+
+
+def _scorers(rng, team, goals):
+    names = [f"{team} Player {rng.randrange(SCORER_POOL)}" for _ in range(goals)]
+    return ", ".join(names)
+
+
+def play_fixtures(engine, rng, limit=None):
+    """Random results (with scorers) for the unplayed fixtures, applied in one batch and saved once"""
+    s = engine.state
+    entries = []
+    for i in engine.fixture_indices(None, "Unplayed")[:limit]:
+        home, away = s.fixtures[i][0], s.fixtures[i][1]
+        s1, s2 = rng.randrange(5), rng.randrange(5)
+        entries.append({'index': i, 's1': s1, 's2': s2, 'p1': 4 if s1 == s2 else 0, 'p2': 3 if s1 == s2 else 0,
+                        'meta': {'h_s': _scorers(rng, home, s1), 'a_s': _scorers(rng, away, s2)}})
+    if entries:
+        engine.record_results(entries)
+    return len(entries)
+
+
+def synthetic_engine(n_teams, fmt, seed=1):
+    """Started tournament of n clubs with (up to) 2n results played, held in memory only"""
+    engine = TournamentEngine()
+    for i in range(n_teams):
+        engine.register_team(f"Club {i:04d}")
+    engine.start_season(fmt, seed=seed)
+    play_fixtures(engine, random.Random(seed), limit=2 * n_teams)
+    return engine
+
+
+def clone(engine, store=None):
+    return TournamentEngine(TournamentState(copy.deepcopy(engine.state.to_dict())), store=store)
+
+
+def measure(run, setup=None, repeat=DEFAULT_REPEAT, budget=TIME_BUDGET):
+    """Wall times in ms of run(setup()), setup excluded; stops early once `budget` seconds are spent"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        run(arg)
+        times.append((time.perf_counter() - start) * 1000)
+        if sum(times) > budget * 1000:
+            break
+    return times
+
+
+# --- 📋 CASES ---
+
+def _storage_case(backend, workdir):
+    path = os.path.join(workdir, f"bench.{backend}")
+
+    def setup(engine):
+        store = get_store(path, backend=backend)
+        store.reset()
+        return clone(engine, store=store)
+
+    def run(engine):
+        engine.save(full=True)
+        engine.load()
+    return setup, run
+
+
+def _verified(engine):
+    engine = clone(engine)
+    engine.verify_data_consistency(full=True)
+    return engine
+
+
+def cases(workdir):
+    """(name, formats it applies to or None for all, setup(base engine) → arg, run(arg))"""
+    survival = [FORMATS[3]]
+    json_setup, json_run = _storage_case("json", workdir)
+    sqlite_setup, sqlite_run = _storage_case("sqlite", workdir)
+    return [
+        ("fixtures.balanced", survival, lambda e: list(e.state.active_teams),
+         lambda teams: generate_balanced_fixtures_fixed(teams, 2)),
+        ("fixtures.phase", survival, lambda e: e,
+         lambda e: e.generate_fixtures_for_phase(e.state.active_teams, "Phase 1: The Purge", 2)),
+        ("standings.rebuild", None, lambda e: e,
+         lambda e: (e.invalidate_standings(), e.get_standings().rows())),
+        ("standings.cached", None, lambda e: e, lambda e: e.get_cumulative_standings()),
+        ("players.update", None, lambda e: (clone(e), e.state.active_teams[0]),
+         lambda arg: arg[0].process_player_string_update("Striker (2), Winger x2, Full Back", arg[1], 'G')),
+        ("verify.full", None, clone, lambda e: e.verify_data_consistency(full=True)),
+        ("verify.checkpoint", None, _verified, lambda e: e.verify_data_consistency()),
+        ("elimination", survival, clone, lambda e: e.handle_battle_royale_elimination()),
+        ("storage.json", None, json_setup, json_run),
+        ("storage.sqlite", None, sqlite_setup, sqlite_run),
+    ]
+
+
+def run_suite(sizes=DEFAULT_SIZES, formats=FORMATS, repeat=DEFAULT_REPEAT, only=None, progress=print):
+    """Result rows: {case, format, teams, min_ms, median_ms, runs}"""
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        suite = [c for c in cases(workdir) if not only or any(c[0].startswith(o) for o in only)]
+        for fmt in formats:
+            for n in sizes:
+                if n > FORMAT_LIMITS.get(fmt, n):
+                    progress(f"  skip {fmt} × {n} (limit {FORMAT_LIMITS[fmt]} clubs)")
+                    continue
+                build_start = time.perf_counter()
+                base = synthetic_engine(n, fmt)
+                progress(f"  {fmt} × {n}: built in {time.perf_counter() - build_start:.1f}s")
+                for name, applies_to, setup, run in suite:
+                    if applies_to and fmt not in applies_to:
+                        continue
+                    times = measure(run, lambda: setup(base), repeat=repeat)
+                    rows.append({'case': name, 'format': fmt, 'teams': n, 'min_ms': round(min(times), 4),
+                                 'median_ms': round(statistics.median(times), 4), 'runs': len(times)})
+    return rows
+
+
+# --- 📈 HISTORY ---
+
+def _revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def previous_run(path):
+    """Last run recorded in the history file, or None"""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last) if last else None
+
+
+def record_run(path, rows, label=None):
+    run = {'time': datetime.now().isoformat(timespec="seconds"), 'label': label, 'revision': _revision(),
+           'python': platform.python_version(), 'machine': platform.machine(), 'results': rows}
+    with open(path, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    return run
+
+
+def compare(rows, previous):
+    """Rows annotated with the previous run's min_ms and whether this one regressed"""
+    before = {(r['case'], r['format'], r['teams']): r['min_ms'] for r in (previous or {}).get('results', [])}
+    annotated = []
+    for row in rows:
+        old = before.get((row['case'], row['format'], row['teams']))
+        slower = (old is not None and row['min_ms'] > NOISE_FLOOR_MS
+                  and row['min_ms'] > old * REGRESSION_RATIO)
+        annotated.append(dict(row, previous_ms=old, regressed=slower))
+    return annotated
+
+
+def format_table(rows):
+    lines = [f"{'case':<18} {'format':<30} {'teams':>6} {'min ms':>11} {'median ms':>11} {'prev ms':>11}"]
+    for r in rows:
+        prev = f"{r['previous_ms']:.3f}" if r.get('previous_ms') is not None else "-"
+        flag = "  ⚠️ slower" if r.get('regressed') else ""
+        lines.append(f"{r['case']:<18} {r['format']:<30} {r['teams']:>6} {r['min_ms']:>11.3f} "
+                     f"{r['median_ms']:>11.3f} {prev:>11}{flag}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DLS Ultra tournament core on synthetic tournaments")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="club counts")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMAT_ALIASES), default=list(FORMAT_ALIASES))
+    parser.add_argument("--cases", nargs="+", help="only cases starting with these names (e.g. storage verify)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON-lines history file")
+    parser.add_argument("--label", help="note stored with this run")
+    parser.add_argument("--no-record", action="store_true", help="compare only, don't append this run")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any case got slower")
+    args = parser.parse_args()
+
+    rows = run_suite(args.sizes, [FORMAT_ALIASES[f] for f in args.formats], args.repeat, args.cases)
+    rows = compare(rows, previous_run(args.output))
+    print(format_table(rows))
+    if not args.no_record:
+        record_run(args.output, [{k: r[k] for k in ('case', 'format', 'teams', 'min_ms', 'median_ms', 'runs')}
+                                 for r in rows], args.label)
+        print(f"Recorded in {args.output}")
+    if args.fail_on_regression and any(r['regressed'] for r in rows):
+        sys.exit(1)
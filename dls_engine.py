@@ -0,0 +1,1216 @@
+import copy
+import functools
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter, namedtuple
+
+from dls_fixtures import (
+    badge_for, draw_knockout_fixtures, draw_league_fixtures, draw_phase_fixtures, draw_world_cup_groups,
+    new_seed, tournament_rng,
+)
+from dls_metrics import LOAD_SECONDS, RESULTS_RECORDED, SAVE_BYTES, SAVE_SECONDS, SAVES
+from dls_players import META_STATS, PlayerIndex, PlayerTable
+from dls_profile import section, timed
+from dls_standings import (
+    STAT_KEYS, Standings, apply_event, empty_stats, event_teams, opening_event, result_event, void_event,
+)
+from dls_storage import (
+    PERSISTED_KEYS, BackupError, StaleStateError, StorageError, UndoHistory, apply_ops, fork_state, normalize_state,
+    read_path, validate_state,
+)
+
+# --- 🧠 TOURNAMENT ENGINE ---
+# Plain-Python tournament logic. Nothing here touches Streamlit: the UI (dls_host.py) and
+# batch jobs drive a TournamentEngine over an explicit TournamentState.
+
+BADGE_POOL = ["🦁", "🦅", "🐺", "🐉", "🦈", "🐍", "🐻", "🐝", "🦂", "🕷️", "⚓", "⚔️", "🛡️", "👑", "⚡", "🔥", "🌪️", "🌊", "🏰", "🚀", "💀", "👹", "👽", "🤖", "👻", "🎃", "💎", "🎯", "🎲", "🎱"]
+
+FORMATS = ["Home & Away League", "World Cup (Groups + Knockout)", "Classic Knockout", "Survival Mode (Battle Royale)"]
+
+
+class TournamentState:
+    """Every persisted tournament field as a plain attribute (the keys of STATE_DEFAULTS)"""
+
+    def __init__(self, data=None):
+        for k, v in normalize_state(data or {}).items():
+            setattr(self, k, v)
+
+    def to_dict(self):
+        """Persisted fields as a dict (references, not copies)"""
+        return {k: getattr(self, k) for k in PERSISTED_KEYS}
+
+
+MAX_GOALS = 20
+SAVE_ATTEMPTS = 5
+SYNC_INTERVAL = 0.5    # seconds between checks of the store for other processes' saves
+SNAPSHOT_REPLAY_LIMIT = 5000   # saved ops held for the next snapshot; past this it is copied afresh
+
+# Undo list names for the engine methods that save
+UNDO_LABELS = {
+    'record_result': "Match result", 'record_results': "Round results", 'add_team': "Add club",
+    'delete_team': "Delete club", 'rename_team': "Rename club", 'start_season': "Season start",
+    'handle_battle_royale_elimination': "Elimination", 'merge_players': "Player merge",
+    'fix_mismatches': "Stats repair", 'clear_stats': "Clear stats", 'restore': "Backup restore",
+    'verify_data_consistency': "Verification checkpoint",
+}
+
+RESULT_LINE_RE = re.compile(
+    r'^(?P<home>.+?)\s+(?P<hg>\d+)\s*-\s*(?P<ag>\d+)'
+    r'(?:\s*\(\s*P:?\s*(?P<hp>\d+)\s*-\s*(?P<ap>\d+)\s*\))?\s+(?P<away>.+)$',
+    re.IGNORECASE)
+
+
+class ResultEntryError(ValueError):
+    """A batch of results was rejected; `errors` lists every problem found"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid result(s): " + "; ".join(errors))
+        self.errors = errors
+
+
+class ReadOnlyError(RuntimeError):
+    """A shared snapshot was asked to change; only the live engine mutates"""
+
+
+class ConflictError(RuntimeError):
+    """Another writer changed the same data first; this change was dropped and the latest state reloaded"""
+
+
+def _mutation(method):
+    """Run a state-changing engine method under the engine lock, so sessions sharing
+    one engine apply and save their changes one at a time"""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock:
+            if self._action is not None:
+                return method(self, *args, **kwargs)
+            # Outermost call: it names the undo entry and says which round it started in
+            self._action = (method.__name__, self.state.started, self.state.round_number)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._action = None
+    return locked
+
+
+def match_id(index, home, away):
+    return f"{home}v{away}_{index}"
+
+
+class MatchRef(namedtuple('MatchRef', 'round index home away')):
+    """Structured identity of one fixture; `key` is the string it is stored under in results/match_meta"""
+
+    @property
+    def key(self):
+        return match_id(self.index, self.home, self.away)
+
+
+# --- 🗃️ DERIVED VIEWS ---
+
+class ViewCache:
+    """Derived views (sorted tables, leaderboards, fixture lists) keyed by name and arguments.
+
+    Each entry remembers the tournament version it was built from and is rebuilt
+    on first use after a save moves the version on - nothing is ever cleared
+    wholesale. A live engine and all of its snapshots share one cache.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.hits = Counter()
+        self.misses = Counter()
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, version, name, args, build):
+        key = (name, args)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits[name] += 1
+            return entry[1]
+        self.misses[name] += 1
+        value = build()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                stale = [k for k, e in self._entries.items() if e[0] != version]
+                for k in stale or [next(iter(self._entries))]:
+                    del self._entries[k]
+            self._entries[key] = (version, value)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counts per view, for the debug tools"""
+        rows = []
+        for name in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits[name], self.misses[name]
+            rows.append({'View': name, 'Hits': hits, 'Misses': misses,
+                         'Hit %': round(100 * hits / (hits + misses), 1)})
+        return rows
+
+
+class TournamentEngine:
+    """Fixtures, results, standings, player stats and the elimination protocol over one TournamentState.
+
+    Mutations record the key paths they touch; save() hands just those to the
+    store's journal (or rewrites everything with full=True). Every save bumps
+    `version`; snapshot() hands readers a frozen engine for the current version.
+    Saves are compare-and-swap against the store version last read, so writers in
+    other processes can't silently overwrite each other.
+
+    With `undo_limit`, the last that many saves can be undone (see undo()).
+    """
+
+    def __init__(self, state=None, store=None, undo_limit=0):
+        self.state = state if state is not None else TournamentState()
+        self.store = store
+        self.version = 0
+        self.read_only = False
+        self.undo_limit = undo_limit
+        self.history = UndoHistory(self.state.to_dict(), undo_limit) if undo_limit else None
+        self._action = None
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._unfrozen = None   # ops saved since the snapshot was taken; None: take the next one afresh
+        self.views = ViewCache()
+        self._base = 0          # store version this state was read from / last written as
+        self._synced_at = 0.0
+        self._pending = []
+        self._standings = None
+        self._team_fixtures = None
+        self._players = None
+        self._player_table = None
+
+    # --- 💾 PERSISTENCE ---
+
+    @_mutation
+    @timed("engine.load")
+    def load(self):
+        """Replace the state with what the store holds. Returns False if nothing was stored yet."""
+        started = time.perf_counter()
+        data, self._base = self.store.load_versioned() if self.store else (None, 0)
+        self.state = TournamentState(data)
+        self._pending = []
+        self._standings = None
+        self._team_fixtures = None
+        self._players = None
+        self._player_table = None
+        if data is not None:
+            self.assign_missing_badges()
+            if self.players().adopt_legacy_keys():
+                self.mark_dirty("cumulative_player_stats")
+            self.open_ledger()
+        self._start_history()
+        self._committed()
+        LOAD_SECONDS.observe(time.perf_counter() - started)
+        return data is not None
+
+    def cached_view(self, name, build, *args):
+        """build(*args), served from the view cache until the tournament version changes"""
+        if self._pending:
+            # Unsaved changes: the version number doesn't describe this state yet
+            return build(*args)
+        return self.views.get(self.version, name, args, lambda: build(*args))
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ReadOnlyError("This is a read-only snapshot of the tournament")
+
+    def mark_dirty(self, *path):
+        """Record that the value at this key path changed and must be journaled"""
+        self._check_writable()
+        self._pending.append(("set", path))
+
+    def post_news(self, message):
+        """Prepend a news item and journal just that item"""
+        self._check_writable()
+        self.state.news.insert(0, message)
+        self._pending.append(("insert", ("news",), 0, message))
+
+    def pending_ops(self):
+        """Recorded changes resolved into journal operations against the current state"""
+        data = self.state.to_dict()
+        ops = []
+        for change in self._pending:
+            if change[0] == "set":
+                path = list(change[1])
+                try:
+                    ops.append(["set", path, read_path(data, path)])
+                except (KeyError, IndexError):
+                    ops.append(["del", path])
+            else:
+                ops.append([change[0], list(change[1])] + list(change[2:]))
+        return ops
+
+    def batch(self):
+        """The engine lock, for holding across several no-save calls and the save that ends them"""
+        return self._lock
+
+    @_mutation
+    @timed("engine.save")
+    def save(self, full=False):
+        """Save all data including cumulative player stats.
+
+        Changes recorded with mark_dirty()/post_news() are appended to the journal;
+        `full=True` (or a save with nothing recorded) rewrites the whole snapshot.
+        If another writer saved first, their changes are merged in and the save
+        retried; ConflictError (after reloading) when that isn't possible.
+        """
+        self._check_writable()
+        # Nothing recorded means the caller changed state without mark_dirty(): publish it as a
+        # replacement, so other writers reload instead of merging across it and losing it
+        full = full or not self._pending
+        if self.store is not None:
+            started, written = time.perf_counter(), self.store.bytes_written
+            kind = "full" if full else "journal"
+            for _ in range(SAVE_ATTEMPTS):
+                try:
+                    if full:
+                        self._base = self.store.save(self.state.to_dict(), base=self._base, replace=True)
+                    else:
+                        self._base = self.store.append(self.pending_ops(), self.state.to_dict(), base=self._base)
+                    break
+                except StaleStateError as e:
+                    if full or not e.records:
+                        self._discard()
+                    self._rebase(e.records)
+            else:
+                self._discard()
+            SAVE_SECONDS.observe(time.perf_counter() - started)
+            SAVES.inc(backend=self.store.backend, kind=kind)
+            SAVE_BYTES.inc(self.store.bytes_written - written, backend=self.store.backend)
+        if self.history is not None:
+            self._remember(full)
+        saved = None if full or self._snapshot is None else self.pending_ops()
+        self._pending = []
+        if self._players is not None:
+            self._players.created.clear()
+        self._committed(saved)
+
+    @timed("engine.sync")
+    def sync(self):
+        """Catch up with saves made by other processes. Returns True if the state changed.
+
+        Cheap when nothing changed (a stat or one indexed query, at most every
+        SYNC_INTERVAL). Skipped while this engine has unsaved changes or is busy.
+        """
+        if self.store is None or self.read_only or time.monotonic() - self._synced_at < SYNC_INTERVAL:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._synced_at = time.monotonic()
+            if self._pending:
+                return False
+            try:
+                head, records = self.store.changes_since(self._base)
+            except StorageError:
+                return False
+            if head == self._base:
+                return False
+            if records:
+                self._rebase(records)
+                self._committed()
+            else:
+                self.load()
+            return True
+        finally:
+            self._lock.release()
+
+    def _discard(self):
+        self.load()
+        raise ConflictError("Another operator changed the tournament at the same time. "
+                            "This change was not saved and the latest data has been reloaded.")
+
+    def _rebase(self, records):
+        """Fold other writers' journal records into this state ahead of our unsaved changes.
+
+        Only disjoint changes merge: if one of their ops touches a key path we
+        changed too (or a parent or child of one) the save is abandoned. Appends to
+        news and result_log commute; our result events move after theirs and are
+        renumbered, as are players we created under an id they created too.
+        """
+        taken = {str(op[1][1]) for record in records for op in record.get("ops") or []
+                 if len(op[1]) == 2 and op[1][0] == "cumulative_player_stats"}
+        clashes = [pid for pid in (self._players.created if self._players else ()) if str(pid) in taken]
+        if clashes:
+            self._renumber_players(clashes, taken)
+
+        touched, parents = {}, set()
+        for change in self._pending:
+            path = tuple(str(k) for k in change[1])
+            touched.setdefault(path, set()).add(change[0])
+            parents.update(path[:n] for n in range(1, len(path)))
+        for record in records:
+            for op in record.get("ops") or []:
+                path = tuple(str(k) for k in op[1])
+                if path in parents:
+                    self._discard()
+                for n in range(1, len(path) + 1):
+                    kinds = touched.get(path[:n])
+                    if kinds and not (n == len(path) and op[0] == "insert" and kinds == {"insert"}):
+                        self._discard()
+
+        s = self.state
+        ours = [c[3] for c in self._pending if c[0] == "insert" and c[1] == ("result_log",)]
+        if ours:
+            del s.result_log[-len(ours):]
+        data = s.to_dict()
+        for record in records:
+            apply_ops(data, record.get("ops") or [])
+        for k, v in normalize_state(data).items():
+            setattr(s, k, v)
+        for event in ours:
+            event['seq'] = self._next_seq()
+            s.result_log.append(event)
+        position = {id(e): i for i, e in enumerate(s.result_log[len(s.result_log) - len(ours):], len(s.result_log) - len(ours))}
+        self._pending = [("insert", c[1], position[id(c[3])], c[3]) if c[0] == "insert" and c[1] == ("result_log",) else c
+                         for c in self._pending]
+        self._base = records[-1]["seq"]
+        self._unfrozen = None
+        self._standings = None
+        self._team_fixtures = None
+        self._players = None
+        self._player_table = None
+        if self.history is not None:
+            # Our undo records assume nobody else changed anything since; they don't hold now
+            for record in records:
+                self.history.advance(record.get("ops") or [])
+            self.history.clear()
+
+    def _committed(self, ops=None):
+        """The state is consistent again: new version. `ops` are what the save changed (None: anything may have)."""
+        with self._lock:
+            self.version += 1
+            if self._snapshot is None:
+                return
+            if ops is None or self._unfrozen is None or len(self._unfrozen) + len(ops) > SNAPSHOT_REPLAY_LIMIT:
+                self._unfrozen = None
+            else:
+                self._unfrozen.extend(ops)
+
+    def _freeze(self):
+        """Read-only engine for the current version.
+
+        The previous snapshot moved forward by the ops saved since (see fork_state), so a
+        save copies nothing and a snapshot only copies what changed. The live standings,
+        player index and leaderboard table are copied across rather than rebuilt.
+        """
+        s, prev = self.state, self._snapshot
+        if prev is None or self._unfrozen is None:
+            state = TournamentState(copy.deepcopy(s.to_dict()))
+        else:
+            state = copy.copy(prev.state)
+            for k, v in fork_state(prev.state.to_dict(), self._unfrozen).items():
+                setattr(state, k, v)
+        self._unfrozen = []
+        snap = TournamentEngine(state)
+        snap.version = self.version
+        snap.read_only = True
+        snap.views = self.views
+        if (self._standings is not None and self._standings.stats is s.cumulative_stats
+                and len(self._standings) == len(s.active_teams)):
+            snap._standings = self._standings.copy(state.cumulative_stats)
+        if (self._players is not None and self._players.stats is s.cumulative_player_stats
+                and self._players.aliases is s.player_aliases):
+            snap._players = self._players.copy(state.cumulative_player_stats, state.player_aliases)
+        if (self._player_table is not None and self._player_table.stats is s.cumulative_player_stats
+                and len(self._player_table) == len(s.cumulative_player_stats)):
+            snap._player_table = self._player_table.copy(state.cumulative_player_stats)
+        return snap
+
+    def _renumber_players(self, pids, taken):
+        """Move unsaved new players to ids free both here and in `taken`"""
+        s = self.state
+        next_id = max([p for p in s.cumulative_player_stats if isinstance(p, int)]
+                      + [int(p) for p in taken if p.isdigit()], default=0) + 1
+        moved = {}
+        for pid in pids:
+            s.cumulative_player_stats[next_id] = s.cumulative_player_stats.pop(pid)
+            moved[pid] = next_id
+            next_id += 1
+        for learned in s.player_aliases.values():
+            for key, pid in learned.items():
+                if pid in moved:
+                    learned[key] = moved[pid]
+        self._pending = [("set", ("cumulative_player_stats", moved[c[1][1]]))
+                         if c[0] == "set" and len(c[1]) == 2 and c[1][0] == "cumulative_player_stats" and c[1][1] in moved
+                         else c for c in self._pending]
+        self._players.created = (self._players.created - set(moved)) | set(moved.values())
+
+    def snapshot(self):
+        """Read-only engine over a private copy of the last saved state.
+
+        One copy per version, shared by every caller and taken by the first of them
+        after a save, never by the save itself. While a change is in flight (the
+        lock is held or unsaved changes are recorded) the previous snapshot is
+        served rather than waiting, so viewers never see a half-applied change.
+        """
+        if not self._lock.acquire(blocking=False):
+            if self._snapshot is not None:
+                return self._snapshot
+            self._lock.acquire()
+        try:
+            if self._snapshot is None or (self._snapshot.version != self.version and not self._pending):
+                self._snapshot = self._freeze()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    @_mutation
+    def reset(self):
+        """Factory reset: empty state and nothing on disk"""
+        self._check_writable()
+        if self.store is not None:
+            self.store.reset()
+        self.state = TournamentState()
+        self._base = 0
+        self._pending = []
+        self._standings = None
+        self._start_history()
+        self._committed()
+
+    @_mutation
+    @timed("engine.restore")
+    def restore(self, data):
+        """Replace the whole tournament with a backup dict; BackupError (and nothing changed) if it isn't valid"""
+        self._check_writable()
+        problems = validate_state(data)
+        if problems:
+            raise BackupError("; ".join(problems))
+        self.state = TournamentState(data)
+        self._standings = None
+        self.players().adopt_legacy_keys()
+        self.open_ledger()
+        self.save(full=True)
+
+    # --- ↩️ UNDO ---
+
+    def _start_history(self):
+        """Undo history starts over from the state as it is now (just loaded or reset)"""
+        if self.undo_limit and not self.read_only:
+            self.history = UndoHistory(self.state.to_dict(), self.undo_limit)
+
+    def _remember(self, full):
+        """Move the undo shadow past this save and push its inverse (undo's own saves aren't pushed)"""
+        name, started, round_number = self._action or ("save", self.state.started, self.state.round_number)
+        s = self.state
+        label = None if name in ("undo", "rollback_to_round") else UNDO_LABELS.get(name, name)
+        # A save that starts the season or a new round is where "roll back to round N" lands
+        opens = s.round_number if s.started and (not started or round_number != s.round_number) else None
+        if full:
+            self.history.advance_to(s.to_dict(), label, round=round_number, opens=opens)
+        else:
+            self.history.advance(self.pending_ops(), label, round=round_number, opens=opens)
+
+    def undo_history(self):
+        """Undoable actions, newest first: [{'label', 'round', 'time', 'changes'}]"""
+        if self.history is None:
+            return []
+        return [{'label': r['label'], 'round': r['round'], 'time': r['time'], 'changes': len(r['ops'])}
+                for r in reversed(self.history.records)]
+
+    def rollback_rounds(self):
+        """Rounds whose start is still in the undo history, newest first"""
+        if self.history is None:
+            return []
+        return list(dict.fromkeys(r['opens'] for r in reversed(self.history.records) if r['opens'] is not None))
+
+    @_mutation
+    @timed("engine.undo")
+    def undo(self, steps=1):
+        """Revert the last `steps` saved actions in one save. Returns the labels undone, newest first.
+
+        Costs O(size of what those actions changed): each undo record holds only the
+        values its save overwrote. Changes merged in from other writers clear the history.
+        """
+        self._check_writable()
+        if self.history is None or not self.history.records:
+            return []
+        data = self.state.to_dict()
+        undone = []
+        for _ in range(min(steps, len(self.history.records))):
+            record = self.history.records.pop()
+            apply_ops(data, record['ops'])
+            for op in record['ops']:
+                self._pending.append((op[0], tuple(op[1])))
+            undone.append(record['label'])
+        for k, v in data.items():
+            if getattr(self.state, k) is not v:
+                setattr(self.state, k, v)
+        self._standings = None
+        self._team_fixtures = None
+        self._players = None
+        self._player_table = None
+        self.save()
+        return undone
+
+    @_mutation
+    def rollback_to_round(self, round_number):
+        """Undo everything since round `round_number` started (see rollback_rounds())"""
+        if round_number not in self.rollback_rounds():
+            raise ValueError(f"The start of round {round_number} is no longer in the undo history")
+        steps = 0
+        for record in reversed(self.history.records):
+            if record['opens'] == round_number:
+                break
+            steps += 1
+        return self.undo(steps)
+
+    # --- ⚙️ CLUBS ---
+
+    def get_seed(self):
+        """Tournament draw seed, created (and journaled) on first use"""
+        if self.state.rng_seed is None:
+            self.state.rng_seed = new_seed()
+            self.mark_dirty("rng_seed")
+        return self.state.rng_seed
+
+    def assign_missing_badges(self):
+        for t in self.state.teams:
+            if t not in self.state.team_badges:
+                self.state.team_badges[t] = badge_for(self.get_seed(), t, BADGE_POOL)
+                self.mark_dirty("team_badges", t)
+
+    @_mutation
+    def add_team(self, name):
+        """Register a club (joining the live tournament if it already started). False if it already exists."""
+        if not self.register_team(name):
+            return False
+        self.save()
+        return True
+
+    def register_team(self, name):
+        """add_team() without the save, for batch jobs"""
+        s = self.state
+        if not name or name in s.teams:
+            return False
+        s.teams.append(name)
+        s.team_badges[name] = badge_for(self.get_seed(), name, BADGE_POOL)
+
+        if s.started:
+            s.active_teams.append(name)
+            if "Survival" in s.format:
+                s.cumulative_stats[name] = empty_stats()
+            self.get_standings().add_team(name)
+            self.mark_dirty("active_teams")
+            self.mark_dirty("cumulative_stats", name)
+
+        self.mark_dirty("teams")
+        self.mark_dirty("team_badges", name)
+        return True
+
+    @_mutation
+    def delete_team(self, name):
+        s = self.state
+        s.teams.remove(name)
+        if name in s.active_teams: s.active_teams.remove(name)
+        self.get_standings().remove_team(name)
+        self.mark_dirty("teams")
+        self.mark_dirty("active_teams")
+        self.save()
+
+    @_mutation
+    def rename_team(self, old, new):
+        s = self.state
+        idx = s.teams.index(old)
+        s.teams[idx] = new
+        s.team_badges[new] = s.team_badges.pop(old)
+        self.mark_dirty("teams")
+        self.mark_dirty("team_badges", old)
+        self.mark_dirty("team_badges", new)
+        self.save()
+
+    # --- 🚀 SEASON SETUP ---
+
+    @_mutation
+    def start_season(self, fmt, seed=None):
+        """INITIALIZE SEASON: draw fixtures for the chosen format and start the tournament"""
+        s = self.state
+        s.rng_seed = seed if seed is not None else new_seed()
+        s.format = fmt
+        s.current_round = "Group Stage" if "World" in fmt else ("League Phase" if "League" in fmt else ("Round 1" if "Survival" in fmt else "Knockout Round"))
+        s.active_teams = s.teams.copy()
+
+        if "Survival" in fmt:
+            s.eliminated_teams = []
+            s.round_number = 1
+            s.survival_history = []
+            s.battle_phase = "Phase 1: The Purge"
+            s.bye_team = None
+            s.cumulative_stats = {}
+            s.cumulative_player_stats = {}
+            s.player_aliases = {}  # learned aliases name player ids, which restart from 1
+            s.result_log = []
+            s.team_checksums = {}
+            s.stats_checkpoint = None
+            s.sudden_death_round = 0
+            s.phase1_match_count = 2
+
+            # Initialize cumulative stats for all teams
+            for team in s.teams:
+                s.cumulative_stats[team] = empty_stats()
+
+            s.fixtures = self.generate_fixtures_for_phase(s.teams, "Phase 1: The Purge", 1)
+            s.current_round = f"Round 1 • {s.battle_phase}"
+        elif "League" in fmt:
+            s.fixtures = draw_league_fixtures(s.teams, tournament_rng(s.rng_seed, 1))
+        elif "World Cup" in fmt:
+            s.groups, s.fixtures = draw_world_cup_groups(s.teams, tournament_rng(s.rng_seed, 1))
+        elif "Knockout" in fmt:
+            s.fixtures = draw_knockout_fixtures(s.teams, tournament_rng(s.rng_seed, 1))
+
+        s.started = True
+        self._standings = None
+        self.save(full=True)
+
+    # --- ⚽ RESULTS ---
+
+    def is_sudden_death(self):
+        return self.state.battle_phase == "Phase 3: The Standoff" and self.state.sudden_death_round > 0
+
+    def needs_penalties(self, s1, s2):
+        """Whether a result is stored with a penalty score"""
+        return (s1 == s2 and "League" not in self.state.format) or self.is_sudden_death()
+
+    @_mutation
+    def record_result(self, index, s1, s2, p1=0, p2=0, meta=None):
+        """CONFIRM RESULT: store the score and scorer strings, update team and player stats"""
+        mid = self.apply_result(index, s1, s2, p1, p2, meta)
+        self.save()
+        return mid
+
+    @_mutation
+    @timed("engine.record_results")
+    def record_results(self, entries):
+        """Record a whole round at once: validate every entry, apply them all, then save once.
+
+        `entries` are dicts with 'index', 's1', 's2' and optional 'p1', 'p2', 'meta'
+        (as produced by parse_round_text). Nothing is applied if any entry is invalid.
+        """
+        errors = self.validate_entries(entries)
+        if errors:
+            raise ResultEntryError(errors)
+        mids, player_items = [], []
+        for e in entries:
+            mid, items = self._apply_score(e['index'], e['s1'], e['s2'], e.get('p1', 0), e.get('p2', 0), e.get('meta'))
+            mids.append(mid)
+            player_items.extend(items)
+        # Every scorer/assist/red string of the round in one pass
+        self.update_player_stats(player_items)
+        if mids:
+            self.save()
+        return mids
+
+    def validate_entries(self, entries):
+        """Problems that would stop record_results(), as readable messages"""
+        s = self.state
+        errors = []
+        seen = set()
+        for n, e in enumerate(entries, 1):
+            label = e.get('label') or f"Entry {n}"
+            index = e.get('index')
+            if not isinstance(index, int) or not 0 <= index < len(s.fixtures):
+                errors.append(f"{label}: no such fixture")
+                continue
+            h, a = s.fixtures[index][0], s.fixtures[index][1]
+            if index in seen:
+                errors.append(f"{label}: {h} vs {a} entered twice")
+            elif match_id(index, h, a) in s.results:
+                errors.append(f"{label}: {h} vs {a} is already recorded")
+            seen.add(index)
+            for key in ('s1', 's2', 'p1', 'p2'):
+                val = e.get(key, 0)
+                if not isinstance(val, int) or not 0 <= val <= MAX_GOALS:
+                    errors.append(f"{label}: {key} must be a whole number from 0 to {MAX_GOALS}")
+        return errors
+
+    def parse_round_text(self, text):
+        """Parse pasted results, one match per line, into entries for record_results().
+
+        Line format: `Home 2-1 Away; home scorers | away scorers; home assists | away assists; home reds | away reds`
+        with an optional shoot-out after the score, e.g. `Home 1-1 (P 4-3) Away`.
+        Player lists use the CONFIRM RESULT formats ("Messi (2), Kane x2").
+        Returns (entries, errors); each line is matched to the first unrecorded fixture between those teams.
+        """
+        s = self.state
+        open_fixtures = {}
+        for i, fix in enumerate(s.fixtures):
+            if len(fix) >= 2 and match_id(i, fix[0], fix[1]) not in s.results:
+                open_fixtures.setdefault((fix[0], fix[1]), []).append(i)
+
+        entries, errors = [], []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            if not line.strip(): continue
+            label = f"Line {line_no}"
+            parts = line.split(';')
+            m = RESULT_LINE_RE.match(parts[0].strip())
+            if not m:
+                errors.append(f"{label}: expected 'Home 2-1 Away', got '{parts[0].strip()}'")
+                continue
+            home, away = m.group('home').strip(), m.group('away').strip()
+            candidates = open_fixtures.get((home, away))
+            if not candidates:
+                errors.append(f"{label}: no open fixture {home} vs {away} this round")
+                continue
+
+            meta = {}
+            for (h_key, a_key), part in zip((('h_s', 'a_s'), ('h_a', 'a_a'), ('h_r', 'a_r')), parts[1:]):
+                h_val, _, a_val = part.partition('|')
+                meta[h_key], meta[a_key] = h_val.strip(), a_val.strip()
+
+            entries.append({
+                'label': label,
+                'index': candidates.pop(0),
+                's1': int(m.group('hg')), 's2': int(m.group('ag')),
+                'p1': int(m.group('hp') or 0), 'p2': int(m.group('ap') or 0),
+                'meta': meta,
+            })
+        return entries, errors
+
+    def add_fixture(self, home, away):
+        """Append a fixture to the current round (not saved). Returns its index."""
+        self.state.fixtures.append((home, away))
+        self.mark_dirty("fixtures")
+        return len(self.state.fixtures) - 1
+
+    def apply_result(self, index, s1, s2, p1=0, p2=0, meta=None):
+        """record_result() without the save, for batch jobs"""
+        mid, player_items = self._apply_score(index, s1, s2, p1, p2, meta)
+        self.update_player_stats(player_items)
+        return mid
+
+    def _take_back(self, ref):
+        """Remove an already recorded result from the table, the ledger and the player stats"""
+        s = self.state
+        h, a, mid = ref.home, ref.away, ref.key
+        old = s.results[mid]
+        self.get_standings().apply_result(h, a, old[0], old[1], sign=-1)
+        self._log_event(void_event(self._next_seq(), ref.round, ref.index, h, a, old[0], old[1]))
+        old_meta = s.match_meta.get(mid, {})
+        self.update_player_stats([(h if home else a, stat_type, old_meta.get(field))
+                                  for field, (home, stat_type) in META_STATS.items()], sign=-1)
+
+    def _apply_score(self, index, s1, s2, p1, p2, meta):
+        """Store one result and update the table; returns (match id, player-stat items still to apply)"""
+        s = self.state
+        ref = self.match_ref(index)
+        h, a, mid = ref.home, ref.away, ref.key
+        meta = meta or {}
+
+        # Correcting a score: the old one comes off first instead of counting both
+        if mid in s.results:
+            self._take_back(ref)
+
+        # Store result
+        if self.needs_penalties(s1, s2):
+            s.results[mid] = [s1, s2, p1, p2]
+        else:
+            s.results[mid] = [s1, s2]
+
+        # Store match meta
+        s.match_meta[mid] = {k: meta.get(k, '') for k in ('h_s', 'a_s', 'h_a', 'a_a', 'h_r', 'a_r')}
+
+        # Update cumulative stats and move both teams in the table
+        self.get_standings().apply_result(h, a, s1, s2)
+        self._log_event(result_event(self._next_seq(), ref.round, ref.index, h, a, s1, s2))
+
+        self.mark_dirty("results", mid)
+        self.mark_dirty("match_meta", mid)
+        self.mark_dirty("cumulative_stats", h)
+        self.mark_dirty("cumulative_stats", a)
+        RESULTS_RECORDED.inc()
+        return mid, [(h if home else a, stat_type, meta.get(field)) for field, (home, stat_type) in META_STATS.items()]
+
+    def match_ref(self, index):
+        fix = self.state.fixtures[index]
+        return MatchRef(self.state.round_number, index, fix[0], fix[1])
+
+    @_mutation
+    def process_player_string_update(self, raw_str, team, stat_type):
+        """Helper function to update player stats from a string"""
+        self.update_player_stats([(team, stat_type, raw_str)])
+
+    def players(self):
+        """Player alias index over cumulative_player_stats, rebuilt only when the data was replaced"""
+        s = self.state
+        if (self._players is None
+                or self._players.stats is not s.cumulative_player_stats
+                or self._players.aliases is not s.player_aliases):
+            self._players = PlayerIndex(s.cumulative_player_stats, s.player_aliases)
+        return self._players
+
+    def player_table(self):
+        """Columnar leaderboard over cumulative_player_stats, kept in step by update_player_stats()"""
+        stats = self.state.cumulative_player_stats
+        if (self._player_table is None
+                or self._player_table.stats is not stats
+                or len(self._player_table) != len(stats)):
+            self._player_table = PlayerTable(stats)
+        return self._player_table
+
+    def leaderboard(self, stat_type, n=10):
+        """Top n players for G/A/R as a DataFrame (shared - don't modify it)"""
+        return self.cached_view("leaderboard", lambda stat, count: self.player_table().top(stat, count), stat_type, n)
+
+    def update_player_stats(self, items, sign=1):
+        """Apply (team, stat, "Messi (2), Kane x2") items, resolving every spelling to a player id"""
+        touched, alias_teams = self.players().tally(items, sign)
+        if self._player_table is not None:
+            self._player_table.update(touched)
+        for pid in touched:
+            self.mark_dirty("cumulative_player_stats", pid)
+        for team in alias_teams:
+            self.mark_dirty("player_aliases", team)
+
+    @_mutation
+    def merge_players(self, keep_id, drop_id):
+        """Merge a misspelt duplicate into the real player; its spellings resolve to keep_id from now on"""
+        team = self.state.cumulative_player_stats[drop_id].get('Team')
+        self.players().merge(keep_id, drop_id)
+        if self._player_table is not None:
+            self._player_table.update([keep_id, drop_id])
+        self.mark_dirty("cumulative_player_stats", keep_id)
+        self.mark_dirty("cumulative_player_stats", drop_id)
+        self.mark_dirty("player_aliases", team)
+        self.save()
+
+    # --- 📊 STANDINGS ---
+
+    def get_standings(self):
+        """Incrementally maintained Standings, rebuilt only when the underlying data was replaced"""
+        s = self.state
+        if (self._standings is None
+                or self._standings.stats is not s.cumulative_stats
+                or len(self._standings) != len(s.active_teams)):
+            with section("engine.standings_rebuild"):
+                self._standings = Standings(s.cumulative_stats, s.active_teams, s.result_log)
+        return self._standings
+
+    def invalidate_standings(self):
+        """Force a rebuild after bulk edits to cumulative_stats or active_teams"""
+        self._standings = None
+
+    def get_cumulative_standings(self):
+        """Get current cumulative standings for all active teams, already sorted by Pts → GD → GF → head-to-head"""
+        return self.cached_view("standings", lambda: self.get_standings().rows())
+
+    def drop_zone(self):
+        """Teams that would go out if the round ended now (Purge: bottom 2, Squeeze: bottom 1)"""
+        def build():
+            s, standings = self.state, self.get_standings()
+            if s.battle_phase == "Phase 1: The Purge" and len(standings) >= 5:
+                return standings.bottom(2)
+            if s.battle_phase == "Phase 2: The Squeeze" and len(standings) == 4:
+                return standings.bottom(1)
+            return []
+        return self.cached_view("drop_zone", build)
+
+    # --- 📅 MATCH CENTER ---
+
+    def team_fixture_index(self):
+        """Team → indices of its fixtures, rebuilt only when the fixture list was replaced or grew"""
+        fixtures = self.state.fixtures
+        cached = self._team_fixtures
+        if cached is None or cached[0] is not fixtures or cached[1] != len(fixtures):
+            index = {}
+            for i, fix in enumerate(fixtures):
+                if len(fix) < 2: continue
+                index.setdefault(fix[0], []).append(i)
+                if fix[1] != fix[0]:
+                    index.setdefault(fix[1], []).append(i)
+            cached = self._team_fixtures = (fixtures, len(fixtures), index)
+        return cached[2]
+
+    def fixture_indices(self, team=None, status="All"):
+        """Indices of the fixtures to list: all, or one team's, optionally only "Played" or "Unplayed" ones"""
+        return self.cached_view("fixtures", self._fixture_indices, team, status)
+
+    def _fixture_indices(self, team, status):
+        s = self.state
+        indices = range(len(s.fixtures)) if team is None else self.team_fixture_index().get(team, [])
+        if status != "All":
+            want_played = status == "Played"
+            indices = [i for i in indices
+                       if len(s.fixtures[i]) >= 2 and (match_id(i, s.fixtures[i][0], s.fixtures[i][1]) in s.results) == want_played]
+        return indices
+
+    # --- 💀 BATTLE ROYALE PROTOCOL ---
+
+    def generate_fixtures_for_phase(self, teams, phase, round_number):
+        """Generate fixtures based on current phase, reproducible from (seed, round_number)"""
+        drawn = draw_phase_fixtures(teams, phase, tournament_rng(self.get_seed(), round_number))
+        if drawn is not None:
+            return drawn
+
+        if phase == "Phase 3: The Standoff":
+            standings = self.get_cumulative_standings()
+            if len(standings) < 3: return []
+
+            leader = standings[0]['Team']
+            second = standings[1]['Team']
+            third = standings[2]['Team']
+
+            self.state.bye_team = leader
+            self.mark_dirty("bye_team")
+            self.post_news(f"👑 {leader} gets automatic BYE to Grand Final!")
+
+            return [(second, third), (third, second)]
+
+        return []
+
+    def _eliminate(self, team, eliminated_this_round, record):
+        s = self.state
+        if team not in s.active_teams:
+            return False
+        self.get_standings().remove_team(team)  # first, or the length check sees a mismatch and rebuilds
+        s.active_teams.remove(team)
+        eliminated_this_round.append(team)
+        s.eliminated_teams.append(record)
+        return True
+
+    @_mutation
+    @timed("engine.elimination")
+    def handle_battle_royale_elimination(self):
+        """Execute Battle Royale protocol. Returns the teams eliminated this round."""
+        s = self.state
+        # Already sorted by Points → GD → GF → head-to-head
+        standings = self.get_cumulative_standings()
+
+        remaining = len(standings)
+
+        # DETERMINE CURRENT PHASE
+        if remaining >= 5:
+            phase = "Phase 1: The Purge"
+        elif remaining == 4:
+            phase = "Phase 2: The Squeeze"
+        elif remaining == 3:
+            phase = "Phase 3: The Standoff"
+        elif remaining == 2:
+            phase = "Phase 4: The Grand Final"
+        else:
+            # Only 1 team left - CHAMPION!
+            s.champion = standings[0]['Team']
+            self.post_news(f"🏆 {s.champion} is the BATTLE ROYALE CHAMPION!")
+            s.battle_phase = "CHAMPION CROWNED"
+            self.mark_dirty("champion")
+            self.mark_dirty("battle_phase")
+            self.save()
+            return []
+
+        # Update phase if changed
+        if phase != s.battle_phase:
+            s.battle_phase = phase
+            self.post_news(f"🔁 PHASE CHANGE: {phase}")
+
+        # Handle eliminations based on phase
+        eliminated_this_round = []
+
+        if phase == "Phase 1: The Purge":
+            bottom_teams = standings[-2:]
+            for team_data in bottom_teams:
+                self._eliminate(team_data['Team'], eliminated_this_round, {
+                    'team': team_data['Team'],
+                    'round': s.round_number,
+                    'position': remaining - standings.index(team_data),
+                    'phase': phase
+                })
+
+            if eliminated_this_round:
+                self.post_news(f"💀 PURGED: {', '.join(eliminated_this_round)} eliminated!")
+
+        elif phase == "Phase 2: The Squeeze":
+            bottom_team = standings[-1]['Team']
+            self._eliminate(bottom_team, eliminated_this_round, {
+                'team': bottom_team,
+                'round': s.round_number,
+                'position': 4,
+                'phase': phase
+            })
+
+            if eliminated_this_round:
+                self.post_news(f"💀 SQUEEZED OUT: {bottom_team} eliminated!")
+
+        elif phase == "Phase 3: The Standoff":
+            if s.sudden_death_round >= 2:
+                second = standings[1]['Team']
+                third = standings[2]['Team']
+
+                res1 = s.results.get(match_id(0, second, third), [0, 0])
+                res2 = s.results.get(match_id(1, third, second), [0, 0])
+
+                second_goals = res1[0] + res2[1]
+                third_goals = res1[1] + res2[0]
+
+                if second_goals > third_goals:
+                    loser = third
+                    winner = second
+                elif third_goals > second_goals:
+                    loser = second
+                    winner = third
+                else:
+                    if len(res1) > 2 and len(res2) > 2:
+                        second_pens = res1[2] + res2[3]
+                        third_pens = res1[3] + res2[2]
+                        loser = third if second_pens > third_pens else second
+                        winner = second if second_pens > third_pens else third
+                    else:
+                        loser = third if standings[1]['Pts'] > standings[2]['Pts'] else second
+                        winner = second if loser == third else third
+
+                if self._eliminate(loser, eliminated_this_round, {
+                    'team': loser,
+                    'round': s.round_number,
+                    'position': 3,
+                    'phase': phase,
+                    'reason': 'Lost Sudden Death Semi-Final'
+                }):
+                    self.post_news(f"💀 SUDDEN DEATH: {loser} eliminated! {winner} advances to Final!")
+
+                s.sudden_death_round = 0
+                s.bye_team = None
+
+        # Generate next round fixtures
+        s.fixtures = self.generate_fixtures_for_phase(s.active_teams, phase, s.round_number + 1)
+
+        # Update round info
+        s.round_number += 1
+
+        if phase == "Phase 3: The Standoff" and not eliminated_this_round:
+            s.sudden_death_round += 1
+            if s.sudden_death_round == 1:
+                s.current_round = f"SUDDEN DEATH • Leg 1 • {phase}"
+            else:
+                s.current_round = f"SUDDEN DEATH • Leg 2 • {phase}"
+        else:
+            s.current_round = f"Round {s.round_number} • {phase}"
+
+        # Reset match data for next round
+        s.results = {}
+        s.match_meta = {}
+
+        # Log history
+        s.survival_history.append({
+            'round': s.round_number - 1,
+            'phase': phase,
+            'remaining': len(s.active_teams),
+            'eliminated': eliminated_this_round
+        })
+
+        for key in ("rng_seed", "battle_phase", "active_teams", "eliminated_teams", "sudden_death_round", "bye_team",
+                    "fixtures", "round_number", "current_round", "results", "match_meta", "survival_history"):
+            self.mark_dirty(key)
+        self.save()
+        return eliminated_this_round
+
+    # --- 🔍 CONSISTENCY ---
+
+    def _next_seq(self):
+        log = self.state.result_log
+        return log[-1]['seq'] + 1 if log else 1
+
+    def _log_event(self, event):
+        """Append to the result log and roll the checksums of the teams involved"""
+        s = self.state
+        s.result_log.append(event)
+        self._pending.append(("insert", ("result_log",), len(s.result_log) - 1, event))
+        apply_event({}, s.team_checksums, event)
+        for team in event_teams(event):
+            self.mark_dirty("team_checksums", team)
+
+    def open_ledger(self):
+        """Start the result log for data saved before it existed: one opening balance per team"""
+        s = self.state
+        if s.result_log:
+            return
+        for team, stats in s.cumulative_stats.items():
+            if any(stats.get(k, 0) for k in STAT_KEYS):
+                self._log_event(opening_event(self._next_seq(), team, stats))
+
+    @_mutation
+    @timed("engine.verify")
+    def verify_data_consistency(self, full=False):
+        """Check cumulative stats against the result log of every round.
+
+        Starts from the last verified checkpoint and replays only the events logged
+        since (the whole log with full=True), then compares every team's stats and
+        running checksum - O(teams + new events). A clean pass moves the checkpoint up.
+        Returns (mismatches, recalculated), where recalculated feeds fix_mismatches().
+        """
+        s = self.state
+        checkpoint = None if full else s.stats_checkpoint
+        if checkpoint:
+            stats = copy.deepcopy(checkpoint['stats'])
+            checksums = dict(checkpoint['checksums'])
+            start = bisect_right(s.result_log, checkpoint['seq'], key=lambda e: e['seq'])
+        else:
+            stats, checksums, start = {}, {}, 0
+
+        for event in s.result_log[start:]:
+            apply_event(stats, checksums, event)
+
+        mismatches = []
+        for team in dict.fromkeys(list(s.active_teams) + list(stats)):
+            stored = s.cumulative_stats.get(team, {})
+            calculated = stats.get(team) or empty_stats()
+            for key in STAT_KEYS:
+                stored_val = stored.get(key, 0)
+                calculated_val = calculated.get(key, 0)
+                if stored_val != calculated_val:
+                    mismatches.append({
+                        'team': team,
+                        'key': key,
+                        'stored': stored_val,
+                        'calculated': calculated_val
+                    })
+            if s.team_checksums.get(team, 0) != checksums.get(team, 0):
+                mismatches.append({
+                    'team': team,
+                    'key': 'checksum',
+                    'stored': s.team_checksums.get(team, 0),
+                    'calculated': checksums.get(team, 0)
+                })
+
+        recalculated = {'seq': s.result_log[-1]['seq'] if s.result_log else 0, 'stats': stats, 'checksums': checksums}
+        if not mismatches and (not checkpoint or checkpoint['seq'] != recalculated['seq']):
+            self._set_checkpoint(recalculated)
+            self.save()
+        return mismatches, recalculated
+
+    def _set_checkpoint(self, ledger):
+        self.state.stats_checkpoint = copy.deepcopy(ledger)
+        self.mark_dirty("stats_checkpoint")
+
+    @_mutation
+    def fix_mismatches(self, recalculated):
+        """Overwrite stats and checksums with the values replayed from the log"""
+        s = self.state
+        for team, stats in recalculated['stats'].items():
+            s.cumulative_stats[team] = copy.deepcopy(stats)
+            self.mark_dirty("cumulative_stats", team)
+        for team, checksum in recalculated['checksums'].items():
+            s.team_checksums[team] = checksum
+            self.mark_dirty("team_checksums", team)
+        self._set_checkpoint(recalculated)
+        self.invalidate_standings()
+        self.save()
+
+    @_mutation
+    def clear_stats(self):
+        """Clear All Stats & Start Over: zero the table and drop this round's results"""
+        s = self.state
+        s.cumulative_stats = {}
+        s.cumulative_player_stats = {}
+        s.player_aliases = {}  # learned aliases name player ids, which restart from 1
+        for team in s.active_teams:
+            s.cumulative_stats[team] = empty_stats()
+        s.results = {}
+        s.match_meta = {}
+        s.result_log = []
+        s.team_checksums = {}
+        s.stats_checkpoint = None
+        self.save(full=True)
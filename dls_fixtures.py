@@ -0,0 +1,156 @@
+import itertools
+import random
+
+# --- 🎲 SEEDED DRAWS ---
+# Every draw comes from a Random seeded by (tournament seed, round, purpose), so any
+# round can be regenerated exactly - for crash recovery, caching, diffing or benchmarks.
+
+def new_seed():
+    return random.SystemRandom().getrandbits(32)
+
+
+def tournament_rng(seed, round_number, purpose="fixtures"):
+    return random.Random(f"{seed}:{round_number}:{purpose}")
+
+
+def badge_for(seed, team, pool):
+    """Deterministic badge for a club within one tournament"""
+    return random.Random(f"{seed}:badge:{team}").choice(pool)
+
+
+# --- 📅 FIXTURE GENERATION ---
+
+def _circulant_offsets(n, degree):
+    """Offsets d such that linking every i to i±d (mod n) gives each team exactly `degree` opponents.
+
+    Uses ±1, ±2, ... for the even part of the degree and the "diameter"
+    offset n/2 (a perfect matching, only when n is even) for an odd degree.
+    Requires degree <= n - 1 and, for odd n, an even degree.
+    """
+    offsets = list(range(1, degree // 2 + 1))
+    if degree % 2:
+        offsets.append(n // 2)
+    return offsets
+
+
+def _circulant_pairs(teams, offsets, flip=False):
+    """Yield the pairs of a circulant graph round by round (one offset = one round)"""
+    n = len(teams)
+    for d in offsets:
+        # The diameter offset pairs each team once, so only walk half the circle
+        span = n // 2 if 2 * d == n else n
+        for i in range(span):
+            home, away = teams[i], teams[(i + d) % n]
+            yield (away, home) if flip else (home, away)
+
+
+def generate_balanced_fixtures_fixed(teams, matches_per_team):
+    """Generate fixtures where EVERY team plays exactly N matches.
+
+    Built as a regular circulant graph over the given team order, so it is
+    O(n·k) with no pair list and no retries. Opponents are all distinct while
+    N <= n-1; beyond that, whole round-robins are repeated (home/away flipped).
+
+    Single-bye rule: when both the team count and N are odd, N·n/2 matches
+    can't exist, so the LAST team in `teams` plays N-1 and everyone else N.
+    Callers shuffle `teams` first, which makes the bye team random.
+    """
+    n = len(teams)
+    if n < 2 or matches_per_team <= 0:
+        return []
+
+    full_rounds, remainder = divmod(matches_per_team, n - 1)
+    fixtures = []
+
+    # Every full pass over n-1 opponents is a complete round-robin
+    for c in range(full_rounds):
+        fixtures.extend(_circulant_pairs(teams, _circulant_offsets(n, n - 1), flip=c % 2 == 1))
+
+    if remainder == 0:
+        return fixtures
+
+    if n % 2 == 0 or remainder % 2 == 0:
+        fixtures.extend(_circulant_pairs(teams, _circulant_offsets(n, remainder), flip=full_rounds % 2 == 1))
+        return fixtures
+
+    # Odd team count and odd remainder: schedule the first n-1 teams (an even count), then hand
+    # (N-1)/2 matches of the diameter round to the bye team, who plays both sides of each.
+    others, bye_team = teams[:-1], teams[-1]
+    half = len(others) // 2
+    flip = full_rounds % 2 == 1
+    fixtures.extend(_circulant_pairs(others, list(range(1, remainder // 2 + 1)), flip=flip))
+
+    handed_over = (remainder - 1) // 2
+    for i in range(half):
+        u, v = others[i], others[i + half]
+        if i < handed_over:
+            fixtures.append((bye_team, u))
+            fixtures.append((v, bye_team))
+        else:
+            fixtures.append((v, u) if flip else (u, v))
+    return fixtures
+
+
+def draw_phase_fixtures(teams, phase, rng):
+    """Random Battle Royale draws (Purge, Squeeze, Grand Final) from an explicit generator.
+
+    Teams are put in canonical order before the shuffle so the result depends
+    only on the set of teams and the generator state, not on list order.
+    Phase 3 is seeded by the table, not drawn, so it returns None here.
+    """
+    shuffled = sorted(teams)
+    rng.shuffle(shuffled)
+
+    if phase == "Phase 1: The Purge":
+        matches_per_team = 2
+        fixtures = generate_balanced_fixtures_fixed(shuffled, matches_per_team)
+        if not fixtures: # Emergency fallback
+             fixtures = list(itertools.combinations(shuffled[:4], 2))
+        return fixtures
+
+    elif phase == "Phase 2: The Squeeze":
+        fixtures = []
+        for i in range(len(shuffled)):
+            for j in range(i+1, len(shuffled)):
+                fixtures.append((shuffled[i], shuffled[j]))
+                fixtures.append((shuffled[j], shuffled[i]))
+        rng.shuffle(fixtures)
+        return fixtures
+
+    elif phase == "Phase 4: The Grand Final":
+        return [(shuffled[0], shuffled[1])]
+
+    return None
+
+
+def draw_league_fixtures(teams, rng):
+    """Home & away league: every ordered pair once, in random order"""
+    matches = list(itertools.permutations(sorted(teams), 2))
+    rng.shuffle(matches)
+    return matches
+
+
+def draw_world_cup_groups(teams, rng):
+    """Groups of four (A-H) plus their round-robin fixtures"""
+    shuffled = sorted(teams); rng.shuffle(shuffled); groups = {}; group_names = "ABCDEFGH"
+    for i in range(0, len(shuffled), 4): groups[group_names[i//4]] = shuffled[i:i+4]
+    matches = []
+    for g, group_teams in groups.items(): matches.extend(list(itertools.combinations(group_teams, 2)))
+    return groups, matches
+
+
+def draw_knockout_fixtures(teams, rng):
+    shuffled = sorted(teams); rng.shuffle(shuffled); matches = []
+    for i in range(0, len(shuffled), 2):
+        if i+1 < len(shuffled): matches.append((shuffled[i], shuffled[i+1]))
+    return matches
+
+
+def teams_alive_at_round(active_teams, eliminated_teams, round_number):
+    """Teams that started `round_number`: today's survivors plus everyone knocked out in it or later"""
+    return list(active_teams) + [e['team'] for e in eliminated_teams if e.get('round', 0) >= round_number]
+
+
+def regenerate_round_fixtures(seed, round_number, teams, phase):
+    """Rebuild the drawn fixtures of any past or future round from (seed, round_number)"""
+    return draw_phase_fixtures(teams, phase, tournament_rng(seed, round_number))
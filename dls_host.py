@@ -1,23 +1,43 @@
 import streamlit as st
 import pandas as pd
-import itertools
-import random
-import json
+import io
 import os
-import re
-import copy
+import secrets
+import time
 from datetime import datetime
 
+from dls_api import serve_in_background
+from dls_engine import FORMATS, MAX_GOALS, ConflictError, ResultEntryError, match_id
+from dls_import import IMPORT_COLUMNS, format_for_filename, import_records, iter_records
+from dls_metrics import RERUN_SECONDS, SESSIONS, write_in_background
+from dls_profile import TIMINGS, dump_profile, start_profile, timed
+from dls_registry import get_registry
+from dls_simulator import estimated_seconds, simulate_survival_odds
+from dls_storage import BackupError, StorageError, backup_file, read_backup
+
 # --- CONFIGURATION ---
 st.set_page_config(page_title="DLS Ultra Manager", page_icon="⚽", layout="wide", initial_sidebar_state="collapsed")
 
+# --- ⏱️ PROFILING ---
+# Every rerun is timed from here to the bottom of the script (see DEBUG TOOLS → TIMINGS);
+# a rerun asked for there also runs under cProfile and is dumped to PROFILE_DIR.
+PROFILE_DIR = os.environ.get("DLS_PROFILE_DIR", "profiles")
+RERUN_STARTED = time.perf_counter()
+
+def finish_profile():
+    """Stop this session's rerun profiler, if one is running, and keep its summary for the panel"""
+    profiler = st.session_state.pop('profiler', None)
+    if profiler is not None:
+        st.session_state.last_profile = dump_profile(profiler, PROFILE_DIR)
+
+finish_profile()  # still running only if the profiled rerun was cut short by a rerun
+if st.session_state.pop('profile_next_rerun', False):
+    st.session_state.profiler = start_profile()
+
 # --- COMPATIBILITY SHIM (Fixes the Button Issue on Cloud & Local) ---
 def safe_rerun():
     """Handles rerun for both new and old Streamlit versions automatically"""
     try:
-        # Clear any existing output
-        st.cache_data.clear()
-        
         # Try the new rerun first
         if hasattr(st, 'rerun'):
             st.rerun()
@@ -187,533 +207,109 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 💾 DATABASE ---
-DB_FILE = "dls_ultra_db.json"
-BADGE_POOL = ["🦁", "🦅", "🐺", "🐉", "🦈", "🐍", "🐻", "🐝", "🦂", "🕷️", "⚓", "⚔️", "🛡️", "👑", "⚡", "🔥", "🌪️", "🌊", "🏰", "🚀", "💀", "👹", "👽", "🤖", "👻", "🎃", "💎", "🎯", "🎲", "🎱"]
+STORAGE_BACKEND = os.environ.get("DLS_STORAGE", "json")  # "json" or "sqlite"
+DB_FILE = os.environ.get("DLS_DB_FILE", "dls_ultra_db.sqlite" if STORAGE_BACKEND == "sqlite" else "dls_ultra_db.json")
+JOURNAL_ENABLED = os.environ.get("DLS_JOURNAL", "1") != "0"
+JOURNAL_COMPACT_EVERY = int(os.environ.get("DLS_JOURNAL_COMPACT_EVERY", "500"))
+REGISTRY_FILE = os.environ.get("DLS_REGISTRY_FILE", "dls_tournaments.json")
+TOURNAMENT_DIR = os.environ.get("DLS_TOURNAMENT_DIR", "tournaments")
+TOURNAMENT_CACHE_SIZE = int(os.environ.get("DLS_TOURNAMENT_CACHE", "8"))
+UNDO_LIMIT = int(os.environ.get("DLS_UNDO_LIMIT", "200"))  # undoable saves kept per loaded tournament; 0 = no undo
+REGISTRY = get_registry(REGISTRY_FILE, TOURNAMENT_DIR, backend=STORAGE_BACKEND, journal=JOURNAL_ENABLED,
+                        compact_every=JOURNAL_COMPACT_EVERY, cache_size=TOURNAMENT_CACHE_SIZE, undo_limit=UNDO_LIMIT)
+# The original single-tournament database stays available as the first tournament
+DEFAULT_TOURNAMENT = REGISTRY.adopt("main", "Main Tournament", DB_FILE, STORAGE_BACKEND)
+SIM_WORKERS = int(os.environ.get("DLS_SIM_WORKERS", "1"))
+MATCH_PAGE_SIZES = [10, 25, 50, 100]
+LIVE_POLL_SECONDS = float(os.environ.get("DLS_LIVE_POLL_SECONDS", "1"))  # 0 = spectators only update on interaction
+API_PORT = int(os.environ.get("DLS_API_PORT", "0"))  # read-only JSON API for overlays/bots; 0 = off
+if API_PORT:
+    serve_in_background(REGISTRY, os.environ.get("DLS_API_HOST", "127.0.0.1"), API_PORT)
+METRICS_FILE = os.environ.get("DLS_METRICS_FILE")  # Prometheus text rewritten every DLS_METRICS_INTERVAL seconds
+if METRICS_FILE:
+    write_in_background(METRICS_FILE, float(os.environ.get("DLS_METRICS_INTERVAL", "15")))
+
+# All tournament logic lives in dls_engine.TournamentEngine; this script only renders
+# its state and forwards button presses to it. Engines come from the shared REGISTRY,
+# so a session only remembers which tournament it is looking at: the admin works on the
+# live engine, everyone else renders the shared read-only snapshot of its last save.
 
 def init_defaults():
     defaults = {
-        'teams': [], 'format': 'League', 'current_round': 'Group Stage',
-        'fixtures': [], 'results': {}, 'match_meta': {},
-        'started': False, 'groups': {}, 'champion': None, 'active_teams': [], 
-        'admin_unlock': False, 'team_badges': {}, 'news': [], 
-        'legacy_stats': {}, 'team_history': {},
-        'eliminated_teams': [], 'round_number': 1, 'survival_history': [],
-        'battle_phase': 'Phase 1: The Purge',
-        'bye_team': None,
-        'cumulative_stats': {},
-        'cumulative_player_stats': {},
-        'sudden_death_round': 0,
-        'phase1_match_count': 2,
-        'force_rerun': False  # Added for rerun handling
+        'admin_unlock': False,
+        'force_rerun': False,  # Added for rerun handling
+        'tournament': DEFAULT_TOURNAMENT,
+        'session_key': secrets.token_hex(8)  # counts this browser session in the metrics
     }
     for k, v in defaults.items():
         if k not in st.session_state: st.session_state[k] = v
 
+@timed("host.load_data")
 def load_data():
-    if os.path.exists(DB_FILE):
-        try:
-            with open(DB_FILE, "r") as f:
-                data = json.load(f)
-                st.session_state.teams = data.get("teams", [])
-                st.session_state.format = data.get("format", "League") 
-                st.session_state.current_round = data.get("current_round", "Group Stage")
-                
-                raw_fix = data.get("fixtures", [])
-                st.session_state.fixtures = [tuple(f) for f in raw_fix] if isinstance(raw_fix, list) else []
-                
-                r_data = data.get("results", {})
-                st.session_state.results = r_data if isinstance(r_data, dict) else {}
-                
-                m_data = data.get("match_meta", {})
-                st.session_state.match_meta = m_data if isinstance(m_data, dict) else {}
-
-                st.session_state.started = data.get("started", False)
-                
-                g_data = data.get("groups", {})
-                st.session_state.groups = g_data if isinstance(g_data, dict) else {}
-                
-                st.session_state.champion = data.get("champion", None)
-                st.session_state.active_teams = data.get("active_teams", [])
-                st.session_state.team_badges = data.get("team_badges", {})
-                st.session_state.news = data.get("news", [])
-                st.session_state.legacy_stats = data.get("legacy_stats", {})
-                st.session_state.team_history = data.get("team_history", {})
-                
-                # Survival-specific data
-                st.session_state.eliminated_teams = data.get("eliminated_teams", [])
-                st.session_state.round_number = data.get("round_number", 1)
-                st.session_state.survival_history = data.get("survival_history", [])
-                st.session_state.battle_phase = data.get("battle_phase", "Phase 1: The Purge")
-                st.session_state.bye_team = data.get("bye_team", None)
-                st.session_state.cumulative_stats = data.get("cumulative_stats", {})
-                st.session_state.cumulative_player_stats = data.get("cumulative_player_stats", {})
-                st.session_state.sudden_death_round = data.get("sudden_death_round", 0)
-                st.session_state.phase1_match_count = data.get("phase1_match_count", 2)
+    """Engine for the selected tournament: live for the admin, the shared snapshot for viewers"""
+    SESSIONS.touch(st.session_state.session_key)
+    tid = st.session_state.tournament
+    if tid not in REGISTRY:
+        tid = st.session_state.tournament = DEFAULT_TOURNAMENT
+    try:
+        engine = REGISTRY.open(tid)
+    except StorageError as e:
+        # Never silently start over on top of a damaged file - keep it for recovery
+        moved = REGISTRY.store(tid).quarantine()
+        st.session_state.load_error = f"{e}. Damaged files moved to: {', '.join(moved)}"
+        engine = REGISTRY.open(tid)
+    engine.sync()
+    st.session_state.engine = engine if st.session_state.admin_unlock else engine.snapshot()
 
-                for t in st.session_state.teams:
-                    if t not in st.session_state.team_badges:
-                        st.session_state.team_badges[t] = random.choice(BADGE_POOL)
-        except: init_defaults()
-    else: init_defaults()
+@timed("host.backup")
+def make_backup(engine):
+    """Compressed backup bytes of the last consistent state (holds the engine lock while it streams)"""
+    with engine.batch(), backup_file(engine.state.to_dict()) as spool:
+        return spool.read()
 
-def save_data_internal():
-    """Save all data including cumulative player stats"""
-    data = {
-        "teams": st.session_state.teams, "format": st.session_state.format,
-        "current_round": st.session_state.current_round, "fixtures": st.session_state.fixtures,
-        "results": st.session_state.results, "match_meta": st.session_state.match_meta,
-        "started": st.session_state.started, "groups": st.session_state.groups,
-        "champion": st.session_state.champion, "active_teams": st.session_state.active_teams,
-        "team_badges": st.session_state.team_badges, "news": st.session_state.news,
-        "legacy_stats": st.session_state.legacy_stats, 
-        "team_history": st.session_state.team_history,
-        "eliminated_teams": st.session_state.eliminated_teams,
-        "round_number": st.session_state.round_number,
-        "survival_history": st.session_state.survival_history,
-        "battle_phase": st.session_state.battle_phase,
-        "bye_team": st.session_state.bye_team,
-        "cumulative_stats": st.session_state.cumulative_stats,
-        "cumulative_player_stats": st.session_state.cumulative_player_stats,
-        "sudden_death_round": st.session_state.sudden_death_round,
-        "phase1_match_count": st.session_state.phase1_match_count
-    }
-    with open(DB_FILE, "w") as f: json.dump(data, f)
+def page_layout(tour):
+    """What the page outside the live fragments depends on - a change needs a full rerun"""
+    return (st.session_state.tournament, tour.started, tour.format, tour.current_round,
+            tour.round_number, tour.battle_phase, tour.champion, len(tour.teams))
 
-# --- 🧠 BATTLE ROYALE CORE LOGIC ---
+def live_fragment(func):
+    """Let a part of the page re-render by itself: spectators poll for new saves, the admin doesn't"""
+    every = LIVE_POLL_SECONDS if LIVE_POLL_SECONDS > 0 and not st.session_state.admin_unlock else None
+    return st.fragment(timed(f"view.{func.__name__}")(func), run_every=every)
 
-def generate_balanced_fixtures_fixed(teams, matches_per_team):
-    """Generate fixtures where EVERY team plays exactly N matches"""
-    if len(teams) < 2: return []
-    
-    # Create a round-robin schedule
-    def round_robin(teams_list):
-        """Generate round-robin pairs"""
-        if len(teams_list) % 2:
-            teams_list.append(None)
-        
-        n = len(teams_list)
-        fixtures = []
-        
-        for round_num in range(n - 1):
-            round_fixtures = []
-            for i in range(n // 2):
-                if teams_list[i] is not None and teams_list[n - 1 - i] is not None:
-                    round_fixtures.append((teams_list[i], teams_list[n - 1 - i]))
-            
-            teams_list.insert(1, teams_list.pop())
-            fixtures.extend(round_fixtures)
-        
-        return fixtures
-    
-    all_possible = list(itertools.combinations(teams, 2))
-    random.shuffle(all_possible)
-    
-    if matches_per_team <= len(teams) - 1:
-        fixtures = []
-        for _ in range(matches_per_team):
-            round_fixtures = round_robin(teams.copy())
-            round_fixtures = [f for f in round_fixtures if f[0] is not None and f[1] is not None]
-            fixtures.extend(round_fixtures)
-        
-        total_matches_needed = (len(teams) * matches_per_team) // 2
-        if len(fixtures) >= total_matches_needed:
-            return fixtures[:total_matches_needed]
-    
-    team_match_counts = {team: 0 for team in teams}
-    fixtures = []
-    available_pairs = all_possible.copy()
-    
-    iterations = 0
-    while available_pairs and min(team_match_counts.values()) < matches_per_team:
-        iterations += 1
-        if iterations > 2000: break # Safety break
-        
-        for pair in available_pairs[:]:
-            t1, t2 = pair
-            if team_match_counts[t1] < matches_per_team and team_match_counts[t2] < matches_per_team:
-                fixtures.append(pair)
-                team_match_counts[t1] += 1
-                team_match_counts[t2] += 1
-                available_pairs.remove(pair)
-                break
-        else:
-            break
-    
-    # Fallback to random pairings if balanced generation failed
-    if min(team_match_counts.values()) < matches_per_team:
-        needy_teams = [t for t in teams if team_match_counts[t] < matches_per_team]
-        
-        for i in range(len(needy_teams)):
-            for j in range(i + 1, len(needy_teams)):
-                t1, t2 = needy_teams[i], needy_teams[j]
-                # Allow duplicates if absolutely necessary to get games
-                existing = False
-                for fix in fixtures:
-                    if (fix[0] == t1 and fix[1] == t2) or (fix[0] == t2 and fix[1] == t1):
-                        existing = True
-                        break
-                
-                if not existing or len(fixtures) < len(teams):
-                    fixtures.append((t1, t2))
-                    team_match_counts[t1] += 1
-                    team_match_counts[t2] += 1
-    
-    return fixtures
+def live_view():
+    """(engine, state) for a fragment rerun, where the page's own `engine`/`tour` may be stale"""
+    load_data()
+    engine = st.session_state.engine
+    if page_layout(engine.state) != PAGE_LAYOUT:
+        st.rerun()
+    return engine, engine.state
 
-def generate_fixtures_for_phase(teams, phase):
-    """Generate fixtures based on current phase"""
-    shuffled = teams.copy()
-    random.shuffle(shuffled)
-    
-    if phase == "Phase 1: The Purge":
-        matches_per_team = 2
-        fixtures = generate_balanced_fixtures_fixed(shuffled, matches_per_team)
-        if not fixtures: # Emergency fallback
-             fixtures = list(itertools.combinations(shuffled[:4], 2)) 
-        return fixtures
-    
-    elif phase == "Phase 2: The Squeeze":
-        fixtures = []
-        for i in range(len(shuffled)):
-            for j in range(i+1, len(shuffled)):
-                fixtures.append((shuffled[i], shuffled[j]))
-                fixtures.append((shuffled[j], shuffled[i]))
-        random.shuffle(fixtures)
-        return fixtures
-    
-    elif phase == "Phase 3: The Standoff":
-        standings = get_cumulative_standings()
-        if len(standings) < 3: return []
-        
-        standings.sort(key=lambda x: (x['Pts'], x['GD'], x['GF']), reverse=True)
-        
-        leader = standings[0]['Team']
-        second = standings[1]['Team']
-        third = standings[2]['Team']
-        
-        st.session_state.bye_team = leader
-        st.session_state.news.insert(0, f"👑 {leader} gets automatic BYE to Grand Final!")
-        
-        return [(second, third), (third, second)]
-    
-    elif phase == "Phase 4: The Grand Final":
-        return [(shuffled[0], shuffled[1])]
-    
-    return []
+def switch_tournament(tid):
+    st.session_state.tournament = tid
+    for key in ('tournament_select', 'consistency_report', 'load_error', 'match_page', 'team_filter',
+                'sim_odds', 'sim_odds_stamp'):
+        st.session_state.pop(key, None)
 
-def get_cumulative_standings():
-    """Get current cumulative standings for all active teams - FIXED VERSION"""
-    standings = []
-    
-    # DIRECTLY use cumulative stats - this is the key fix
-    for team in st.session_state.active_teams:
-        if team in st.session_state.cumulative_stats:
-            stats = st.session_state.cumulative_stats[team]
-            standings.append({
-                'Team': team,
-                'P': stats.get('P', 0),
-                'W': stats.get('W', 0),
-                'D': stats.get('D', 0),
-                'L': stats.get('L', 0),
-                'GF': stats.get('GF', 0),
-                'GA': stats.get('GA', 0),
-                'GD': stats.get('GD', 0),
-                'Pts': stats.get('Pts', 0)
-            })
-        else:
-            # Initialize with zeros if no stats yet
-            standings.append({
-                'Team': team,
-                'P': 0, 'W': 0, 'D': 0, 'L': 0,
-                'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-            })
-    
-    return standings
-
-def process_player_string_update(raw_str, team, stat_type):
-    """Helper function to update player stats from a string"""
-    if not raw_str: return
-    
-    # First, split by commas
-    raw_parts = raw_str.split(',')
-    
-    for raw_player in raw_parts:
-        raw_player = raw_player.strip()
-        if not raw_player: continue
-        
-        count = 1
-        name = raw_player
-        
-        # Handle different formats
-        # Format 1: "Player (2)" - parentheses
-        m_br = re.search(r'^(.*?)\s*\((\d+)\)$', raw_player)
-        if m_br:
-            name = m_br.group(1).strip()
-            count = int(m_br.group(2))
-        # Format 2: "Player x2" - x notation
-        m_x = re.search(r'^(.*?)\s*[xX](\d+)$', raw_player)
-        if m_x:
-            name = m_x.group(1).strip()
-            count = int(m_x.group(2))
-        
-        # Clean up name
-        name = name.strip().title()
-        if not name: continue
-        
-        # Create unique player ID
-        player_id = f"{name}|{team}"
-        
-        # Initialize if not exists
-        if player_id not in st.session_state.cumulative_player_stats:
-            st.session_state.cumulative_player_stats[player_id] = {
-                'Name': name,
-                'Team': team,
-                'G': 0, 'A': 0, 'R': 0
-            }
-        
-        # Add stats
-        st.session_state.cumulative_player_stats[player_id][stat_type] += count
+def save_data_internal(full=False):
+    st.session_state.engine.save(full=full)
 
 def handle_battle_royale_elimination():
-    """Execute Battle Royale protocol - FIXED VERSION"""
+    """Execute Battle Royale protocol and rerun"""
     try:
-        standings = get_cumulative_standings()
-        
-        # Sort by Points → GD → GF
-        standings.sort(key=lambda x: (x['Pts'], x['GD'], x['GF']), reverse=True)
-        
-        remaining = len(standings)
-        
-        # DETERMINE CURRENT PHASE
-        if remaining >= 5:
-            phase = "Phase 1: The Purge"
-            elim_count = 2
-        elif remaining == 4:
-            phase = "Phase 2: The Squeeze"
-            elim_count = 1
-        elif remaining == 3:
-            phase = "Phase 3: The Standoff"
-            elim_count = 0
-        elif remaining == 2:
-            phase = "Phase 4: The Grand Final"
-            elim_count = 0
-        else:
-            # Only 1 team left - CHAMPION!
-            st.session_state.champion = standings[0]['Team']
-            st.session_state.news.insert(0, f"🏆 {st.session_state.champion} is the BATTLE ROYALE CHAMPION!")
-            st.session_state.battle_phase = "CHAMPION CROWNED"
-            save_data_internal()
-            st.session_state.force_rerun = True
-            safe_rerun()
-            return
-        
-        # Update phase if changed
-        if phase != st.session_state.battle_phase:
-            st.session_state.battle_phase = phase
-            st.session_state.news.insert(0, f"🔁 PHASE CHANGE: {phase}")
-        
-        # Handle eliminations based on phase
-        eliminated_this_round = []
-        
-        if phase == "Phase 1: The Purge":
-            bottom_teams = standings[-2:]
-            for team_data in bottom_teams:
-                team = team_data['Team']
-                if team in st.session_state.active_teams:
-                    st.session_state.active_teams.remove(team)
-                    eliminated_this_round.append(team)
-                    st.session_state.eliminated_teams.append({
-                        'team': team,
-                        'round': st.session_state.round_number,
-                        'position': remaining - standings.index(team_data),
-                        'phase': phase
-                    })
-            
-            if eliminated_this_round:
-                st.session_state.news.insert(0, f"💀 PURGED: {', '.join(eliminated_this_round)} eliminated!")
-        
-        elif phase == "Phase 2: The Squeeze":
-            bottom_team = standings[-1]['Team']
-            if bottom_team in st.session_state.active_teams:
-                st.session_state.active_teams.remove(bottom_team)
-                eliminated_this_round.append(bottom_team)
-                st.session_state.eliminated_teams.append({
-                    'team': bottom_team,
-                    'round': st.session_state.round_number,
-                    'position': 4,
-                    'phase': phase
-                })
-            
-            if eliminated_this_round:
-                st.session_state.news.insert(0, f"💀 SQUEEZED OUT: {bottom_team} eliminated!")
-        
-        elif phase == "Phase 3: The Standoff":
-            if st.session_state.sudden_death_round >= 2:
-                leader = standings[0]['Team']
-                second = standings[1]['Team']
-                third = standings[2]['Team']
-                
-                match1_id = f"{second}v{third}_0"
-                match2_id = f"{third}v{second}_1"
-                
-                res1 = st.session_state.results.get(match1_id, [0, 0])
-                res2 = st.session_state.results.get(match2_id, [0, 0])
-                
-                second_goals = res1[0] + res2[1]
-                third_goals = res1[1] + res2[0]
-                
-                if second_goals > third_goals:
-                    loser = third
-                    winner = second
-                elif third_goals > second_goals:
-                    loser = second
-                    winner = third
-                else:
-                    if len(res1) > 2 and len(res2) > 2:
-                        second_pens = res1[2] + res2[3]
-                        third_pens = res1[3] + res2[2]
-                        loser = third if second_pens > third_pens else second
-                        winner = second if second_pens > third_pens else third
-                    else:
-                        loser = third if standings[1]['Pts'] > standings[2]['Pts'] else second
-                
-                if loser in st.session_state.active_teams:
-                    st.session_state.active_teams.remove(loser)
-                    eliminated_this_round.append(loser)
-                    st.session_state.eliminated_teams.append({
-                        'team': loser,
-                        'round': st.session_state.round_number,
-                        'position': 3,
-                        'phase': phase,
-                        'reason': 'Lost Sudden Death Semi-Final'
-                    })
-                    st.session_state.news.insert(0, f"💀 SUDDEN DEATH: {loser} eliminated! {winner} advances to Final!")
-                
-                st.session_state.sudden_death_round = 0
-                st.session_state.bye_team = None
-        
-        # Generate next round fixtures
-        next_fixtures = generate_fixtures_for_phase(st.session_state.active_teams, phase)
-        st.session_state.fixtures = next_fixtures
-        
-        # Update round info
-        st.session_state.round_number += 1
-        
-        if phase == "Phase 3: The Standoff" and not eliminated_this_round:
-            st.session_state.sudden_death_round += 1
-            if st.session_state.sudden_death_round == 1:
-                st.session_state.current_round = f"SUDDEN DEATH • Leg 1 • {phase}"
-            else:
-                st.session_state.current_round = f"SUDDEN DEATH • Leg 2 • {phase}"
-        else:
-            st.session_state.current_round = f"Round {st.session_state.round_number} • {phase}"
-        
-        # Reset match data for next round
-        st.session_state.results = {}
-        st.session_state.match_meta = {}
-        
-        # Log history
-        st.session_state.survival_history.append({
-            'round': st.session_state.round_number - 1,
-            'phase': phase,
-            'remaining': len(st.session_state.active_teams),
-            'eliminated': eliminated_this_round
-        })
-        
-        save_data_internal()
-        st.session_state.force_rerun = True
-        safe_rerun()
-        
+        st.session_state.engine.handle_battle_royale_elimination()
     except Exception as e:
         st.error(f"Error in elimination: {str(e)}")
-        save_data_internal()
-        st.session_state.force_rerun = True
-        safe_rerun()
-
-def verify_data_consistency():
-    """Check if cumulative stats match with recorded results"""
-    mismatches = []
-    recalculated_stats = {}
-    
-    # Initialize all active teams
-    for team in st.session_state.active_teams:
-        recalculated_stats[team] = {
-            'P': 0, 'W': 0, 'D': 0, 'L': 0, 
-            'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-        }
-    
-    # Recalculate from all recorded results
-    for mid, res in st.session_state.results.items():
-        try:
-            if "_" in mid:
-                base = mid.split('_')[0]
-            else:
-                base = mid
-            
-            if "v" in base:
-                h, a = base.split('v')
-            else:
-                continue
-        except:
-            continue
-        
-        # Skip if teams are not active (shouldn't happen but just in case)
-        if h not in recalculated_stats:
-            recalculated_stats[h] = {'P': 0, 'W': 0, 'D': 0, 'L': 0, 'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0}
-        if a not in recalculated_stats:
-            recalculated_stats[a] = {'P': 0, 'W': 0, 'D': 0, 'L': 0, 'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0}
-        
-        s_h, s_a = res[0], res[1]
-        
-        # Update recalculated stats
-        recalculated_stats[h]['P'] += 1
-        recalculated_stats[a]['P'] += 1
-        recalculated_stats[h]['GF'] += s_h
-        recalculated_stats[h]['GA'] += s_a
-        recalculated_stats[h]['GD'] += (s_h - s_a)
-        recalculated_stats[a]['GF'] += s_a
-        recalculated_stats[a]['GA'] += s_h
-        recalculated_stats[a]['GD'] += (s_a - s_h)
-        
-        if s_h > s_a:
-            recalculated_stats[h]['W'] += 1
-            recalculated_stats[h]['Pts'] += 3
-            recalculated_stats[a]['L'] += 1
-        elif s_a > s_h:
-            recalculated_stats[a]['W'] += 1
-            recalculated_stats[a]['Pts'] += 3
-            recalculated_stats[h]['L'] += 1
-        else:
-            recalculated_stats[h]['D'] += 1
-            recalculated_stats[h]['Pts'] += 1
-            recalculated_stats[a]['D'] += 1
-            recalculated_stats[a]['Pts'] += 1
-    
-    # Compare with stored cumulative stats
-    for team in st.session_state.active_teams:
-        if team in st.session_state.cumulative_stats and team in recalculated_stats:
-            stored = st.session_state.cumulative_stats[team]
-            calculated = recalculated_stats[team]
-            
-            for key in ['P', 'W', 'D', 'L', 'GF', 'GA', 'GD', 'Pts']:
-                stored_val = stored.get(key, 0)
-                calculated_val = calculated.get(key, 0)
-                if stored_val != calculated_val:
-                    mismatches.append({
-                        'team': team,
-                        'key': key,
-                        'stored': stored_val,
-                        'calculated': calculated_val
-                    })
-    
-    return mismatches, recalculated_stats
+        save_data_internal(full=True)
+    st.session_state.force_rerun = True
+    safe_rerun()
 
 # Initialize session state
-if 'data_loaded' not in st.session_state:
-    load_data()
-    st.session_state.data_loaded = True
-
 init_defaults()
+load_data()
+engine = st.session_state.engine
+tour = engine.state
+PAGE_LAYOUT = page_layout(tour)
 
 # Check for forced rerun
 if st.session_state.get('force_rerun', False):
@@ -723,8 +319,11 @@ if st.session_state.get('force_rerun', False):
 # --- 🏆 HEADER ---
 st.markdown('<div class="big-title">DLS ULTRA</div>', unsafe_allow_html=True)
 
+if st.session_state.get('load_error'):
+    st.error(f"⚠️ Saved tournament could not be loaded: {st.session_state.load_error}")
+
 # Special Battle Royale header
-if "Survival" in st.session_state.format:
+if "Survival" in tour.format:
     st.markdown(f"""
     <div style="text-align: center; margin: 20px 0; padding: 15px; background: linear-gradient(90deg, #000 0%, #5B0E14 50%, #000 100%); border-radius: 10px; border: 1px solid #F1E194;">
         <h2 style="color: #F1E194; font-family: 'Teko'; margin: 0;">💀 BATTLE ROYALE PROTOCOL</h2>
@@ -732,94 +331,158 @@ if "Survival" in st.session_state.format:
     </div>
     """, unsafe_allow_html=True)
 
-if st.session_state.champion:
-    st.markdown(f'<div style="text-align: center; color:#F1E194; font-size: 2rem; font-family: Teko, sans-serif;">👑 CHAMPION: {st.session_state.champion} 👑</div>', unsafe_allow_html=True)
+if tour.champion:
+    st.markdown(f'<div style="text-align: center; color:#F1E194; font-size: 2rem; font-family: Teko, sans-serif;">👑 CHAMPION: {tour.champion} 👑</div>', unsafe_allow_html=True)
 else:
-    subtitle = f"{st.session_state.current_round}"
-    if "Survival" in st.session_state.format:
+    subtitle = f"{tour.current_round}"
+    if "Survival" in tour.format:
         phase_badge = ""
-        if "Phase 1" in st.session_state.battle_phase:
+        if "Phase 1" in tour.battle_phase:
             phase_badge = '<span class="phase-badge phase-1">THE PURGE (2 matches each)</span>'
-        elif "Phase 2" in st.session_state.battle_phase:
+        elif "Phase 2" in tour.battle_phase:
             phase_badge = '<span class="phase-badge phase-2">THE SQUEEZE (2 matches each)</span>'
-        elif "Phase 3" in st.session_state.battle_phase:
+        elif "Phase 3" in tour.battle_phase:
             phase_badge = '<span class="phase-badge phase-3">THE STANDOFF</span>'
-        elif "Phase 4" in st.session_state.battle_phase:
+        elif "Phase 4" in tour.battle_phase:
             phase_badge = '<span class="phase-badge phase-4">GRAND FINAL</span>'
         
-        subtitle = f"Round {st.session_state.round_number} • {st.session_state.battle_phase} {phase_badge}"
+        subtitle = f"Round {tour.round_number} • {tour.battle_phase} {phase_badge}"
     
     st.markdown(f'<div style="text-align: center; color: #F1E194; font-family: Rajdhani, sans-serif; margin-bottom: 2rem;">{subtitle}</div>', unsafe_allow_html=True)
 
 # --- 🔒 SIDEBAR ---
+profile_panel = None
 with st.sidebar:
+    st.markdown("### 🏟️ TOURNAMENT")
+    tournaments = REGISTRY.tournaments()
+    chosen = st.selectbox("SELECT TOURNAMENT", list(tournaments), format_func=tournaments.get,
+                          index=list(tournaments).index(st.session_state.tournament), key="tournament_select")
+    if chosen != st.session_state.tournament:
+        switch_tournament(chosen)
+        safe_rerun()
+
+    if st.session_state.admin_unlock:
+        with st.expander("➕ NEW TOURNAMENT"):
+            new_tournament = st.text_input("TOURNAMENT NAME", key="new_tournament_input")
+            if st.button("CREATE TOURNAMENT", key="create_tournament_btn", use_container_width=True) and new_tournament.strip():
+                switch_tournament(REGISTRY.create(new_tournament))
+                safe_rerun()
+
     st.markdown("### 🔐 MANAGER ACCESS")
     
     if not st.session_state.admin_unlock:
         pin = st.text_input("ENTER PIN", type="password", key="pin_input")
         if pin == "0209": 
             st.session_state.admin_unlock = True
-            save_data_internal()
             safe_rerun()
     
     if st.session_state.admin_unlock:
         st.success("ACCESS GRANTED")
         if st.button("🔒 LOGOUT", key="logout_btn"):
             st.session_state.admin_unlock = False
-            save_data_internal()
             safe_rerun()
 
         st.markdown("---")
-        if st.session_state.started and not st.session_state.champion:
+        if tour.started and not tour.champion:
             if st.button("⏩ EXECUTE ELIMINATION & NEXT ROUND", key="execute_elim_btn", use_container_width=True): 
                 st.toast("Processing Elimination...", icon="💀")
-                if "Survival" in st.session_state.format:
+                if "Survival" in tour.format:
                     handle_battle_royale_elimination()
                 else:
                     save_data_internal()
                     safe_rerun()
 
+        st.markdown("---")
+        st.markdown("### ↩️ UNDO")
+        history = engine.undo_history()
+        if history:
+            last = history[0]
+            st.caption(f"Last action: {last['label']} (round {last['round']}, {last['time'][11:]})")
+            undo_steps = st.number_input("ACTIONS TO UNDO", min_value=1, value=1, key="undo_steps_input")
+            if st.button("↩️ UNDO", key="undo_btn", use_container_width=True):
+                try:
+                    undone = engine.undo(undo_steps)
+                    st.session_state.consistency_report = None
+                    st.toast(f"Undone: {', '.join(undone)}")
+                    safe_rerun()
+                except ConflictError as e:
+                    st.error(f"⚠️ {e}")
+            rounds = engine.rollback_rounds()
+            if rounds:
+                rollback_round = st.selectbox("ROLL BACK TO START OF ROUND", rounds, key="rollback_round_select")
+                if st.button("⏪ ROLL BACK", key="rollback_btn", use_container_width=True):
+                    try:
+                        engine.rollback_to_round(rollback_round)
+                        st.session_state.consistency_report = None
+                        safe_rerun()
+                    except ConflictError as e:
+                        st.error(f"⚠️ {e}")
+            with st.expander(f"📜 HISTORY ({len(history)})"):
+                st.dataframe(pd.DataFrame(history), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Nothing to undo yet.")
+
         st.markdown("---")
         st.markdown("### 🐛 DEBUG TOOLS")
         
+        st.caption(f"🎲 Draw seed: {tour.rng_seed}")
+        st.caption(f"🧊 State version: {engine.version}")
+        with st.expander("🗃️ VIEW CACHE"):
+            cache_stats = engine.views.stats()
+            if cache_stats:
+                st.caption(f"{len(engine.views)} cached views")
+                st.dataframe(pd.DataFrame(cache_stats), hide_index=True, use_container_width=True)
+            else:
+                st.caption("Nothing cached yet.")
+        with st.expander("⏱️ TIMINGS"):
+            timing_rows = TIMINGS.stats()
+            if timing_rows:
+                st.caption(f"Last {TIMINGS.history} calls per section, all sessions")
+                st.dataframe(pd.DataFrame(timing_rows), hide_index=True, use_container_width=True)
+            elif not TIMINGS.enabled:
+                st.caption("Timing is off (DLS_PROFILE=0).")
+            t1, t2 = st.columns(2)
+            if t1.button("🔬 PROFILE RERUN", key="profile_rerun_btn", use_container_width=True):
+                st.session_state.profile_next_rerun = True
+                safe_rerun()
+            if t2.button("🧽 CLEAR", key="clear_timings_btn", use_container_width=True):
+                TIMINGS.clear()
+                safe_rerun()
+            profile_panel = st.container()  # filled at the bottom, once this rerun's profile is written
+        
         if st.button("🔄 Refresh Table View", key="refresh_view_btn", use_container_width=True):
             safe_rerun()
         
         if st.button("📊 Show Current Cumulative Stats", key="show_stats_btn", use_container_width=True):
             st.write("Cumulative Team Stats:")
-            st.json(st.session_state.cumulative_stats)
+            st.json(tour.cumulative_stats)
             st.write("Cumulative Player Stats:")
-            st.json(st.session_state.cumulative_player_stats)
+            st.json(tour.cumulative_player_stats)
             st.write("Current Results:")
-            st.json(st.session_state.results)
+            st.json(tour.results)
         
+        full_rebuild = st.checkbox("Full rebuild (replay every round, ignore checkpoint)", key="full_rebuild_check")
         if st.button("🔍 Check Data Consistency", key="check_consistency_btn", use_container_width=True):
-            mismatches, recalculated = verify_data_consistency()
+            st.session_state.consistency_report = engine.verify_data_consistency(full=full_rebuild)
+
+        if st.session_state.get('consistency_report'):
+            mismatches, recalculated = st.session_state.consistency_report
             if mismatches:
                 st.error(f"Found {len(mismatches)} mismatches!")
                 for m in mismatches:
                     st.write(f"{m['team']}: {m['key']} - Stored: {m['stored']}, Calculated: {m['calculated']}")
                 
                 if st.button("🔄 Fix All Mismatches", key="fix_mismatches_btn", use_container_width=True):
-                    for team, stats in recalculated.items():
-                        st.session_state.cumulative_stats[team] = stats
-                    save_data_internal()
+                    engine.fix_mismatches(recalculated)
+                    st.session_state.consistency_report = None
                     st.success("Fixed all mismatches!")
                     safe_rerun()
             else:
-                st.success("All data is consistent! ✅")
+                st.success(f"All data is consistent! ✅ (verified through result #{recalculated['seq']})")
         
         if st.button("🧹 Clear All Stats & Start Over", key="clear_stats_btn", use_container_width=True):
-            st.session_state.cumulative_stats = {}
-            st.session_state.cumulative_player_stats = {}
-            for team in st.session_state.active_teams:
-                st.session_state.cumulative_stats[team] = {
-                    'P': 0, 'W': 0, 'D': 0, 'L': 0, 
-                    'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-                }
-            st.session_state.results = {}
-            st.session_state.match_meta = {}
-            save_data_internal()
+            engine.clear_stats()
+            st.session_state.consistency_report = None
             st.success("Stats cleared! Re-enter match results.")
             safe_rerun()
 
@@ -828,157 +491,84 @@ with st.sidebar:
         new_team = st.text_input("REGISTER NEW CLUB", key="new_team_input")
         
         if st.button("ADD CLUB", key="add_club_btn", use_container_width=True):
-            if new_team and new_team not in st.session_state.teams:
-                st.session_state.teams.append(new_team)
-                st.session_state.team_badges[new_team] = random.choice(BADGE_POOL)
-                
-                if st.session_state.started:
-                    st.session_state.active_teams.append(new_team)
-                    
-                    if "Survival" in st.session_state.format:
-                        st.session_state.cumulative_stats[new_team] = {
-                            'P': 0, 'W': 0, 'D': 0, 'L': 0, 
-                            'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-                        }
+            if engine.add_team(new_team):
+                if tour.started:
+                    if "Survival" in tour.format:
                         st.toast(f"💀 {new_team} enters the Battle Royale!")
                     else:
                         st.toast(f"✅ {new_team} joined!")
-                
-                save_data_internal()
                 safe_rerun()
 
-        edit_target = st.selectbox("SELECT CLUB", ["Select..."] + st.session_state.teams, key="select_club_dropdown")
+        edit_target = st.selectbox("SELECT CLUB", ["Select..."] + tour.teams, key="select_club_dropdown")
         if edit_target != "Select...":
             c1, c2 = st.columns(2)
             if c1.button("🗑️ DELETE", key="delete_club_btn", use_container_width=True):
-                st.session_state.teams.remove(edit_target)
-                if edit_target in st.session_state.active_teams: st.session_state.active_teams.remove(edit_target)
-                save_data_internal()
+                engine.delete_team(edit_target)
                 safe_rerun()
             rename_val = c2.text_input("RENAME TO", value=edit_target, key="rename_input")
             if c2.button("RENAME", key="rename_club_btn", use_container_width=True):
-                idx = st.session_state.teams.index(edit_target)
-                st.session_state.teams[idx] = rename_val
-                st.session_state.team_badges[rename_val] = st.session_state.team_badges.pop(edit_target)
-                save_data_internal()
+                engine.rename_team(edit_target, rename_val)
                 safe_rerun()
 
         st.markdown("---")
         st.markdown("### 💾 DATA MANAGEMENT")
         
-        current_data = json.dumps({
-            "teams": st.session_state.teams, "format": st.session_state.format, 
-            "current_round": st.session_state.current_round, "fixtures": st.session_state.fixtures, 
-            "results": st.session_state.results, "match_meta": st.session_state.match_meta, 
-            "started": st.session_state.started, "groups": st.session_state.groups, 
-            "champion": st.session_state.champion, "active_teams": st.session_state.active_teams, 
-            "team_badges": st.session_state.team_badges, "news": st.session_state.news,
-            "legacy_stats": st.session_state.legacy_stats,
-            "team_history": st.session_state.team_history,
-            "eliminated_teams": st.session_state.eliminated_teams,
-            "round_number": st.session_state.round_number,
-            "survival_history": st.session_state.survival_history,
-            "battle_phase": st.session_state.battle_phase,
-            "bye_team": st.session_state.bye_team,
-            "cumulative_stats": st.session_state.cumulative_stats,
-            "cumulative_player_stats": st.session_state.cumulative_player_stats,
-            "sudden_death_round": st.session_state.sudden_death_round,
-            "phase1_match_count": st.session_state.phase1_match_count
-        })
-        st.download_button("📥 DOWNLOAD BACKUP", data=current_data, file_name="dls_backup.json", mime="application/json", key="download_backup_btn", use_container_width=True)
-        uploaded = st.file_uploader("📤 RESTORE BACKUP", type=['json'], key="upload_backup_widget")
+        # Built only when clicked (Streamlit calls `data` then), not on every rerun
+        st.download_button("📥 DOWNLOAD BACKUP", data=lambda: make_backup(engine), file_name=f"dls_backup_{st.session_state.tournament}.json.gz", mime="application/gzip", key="download_backup_btn", use_container_width=True)
+        uploaded = st.file_uploader("📤 RESTORE BACKUP", type=['gz', 'json'], key="upload_backup_widget")
         if uploaded and st.button("⚠️ RESTORE NOW", key="restore_backup_btn", use_container_width=True):
-            data = json.load(uploaded)
-            st.session_state.teams = data["teams"]
-            st.session_state.fixtures = [tuple(f) for f in data["fixtures"]] if isinstance(data["fixtures"], list) else []
-            st.session_state.results = data["results"] if isinstance(data["results"], dict) else {}
-            st.session_state.match_meta = data.get("match_meta", {}) if isinstance(data.get("match_meta"), dict) else {}
-            st.session_state.started = data.get("started", False)
-            st.session_state.groups = data.get("groups", {})
-            st.session_state.current_round = data.get("current_round", "Group Stage")
-            st.session_state.champion = data.get("champion", None)
-            st.session_state.active_teams = data.get("active_teams", [])
-            st.session_state.team_badges = data.get("team_badges", {})
-            st.session_state.news = data.get("news", [])
-            st.session_state.legacy_stats = data.get("legacy_stats", {})
-            st.session_state.team_history = data.get("team_history", {})
-            st.session_state.eliminated_teams = data.get("eliminated_teams", [])
-            st.session_state.round_number = data.get("round_number", 1)
-            st.session_state.survival_history = data.get("survival_history", [])
-            st.session_state.battle_phase = data.get("battle_phase", "Phase 1: The Purge")
-            st.session_state.bye_team = data.get("bye_team", None)
-            st.session_state.cumulative_stats = data.get("cumulative_stats", {})
-            st.session_state.cumulative_player_stats = data.get("cumulative_player_stats", {})
-            st.session_state.sudden_death_round = data.get("sudden_death_round", 0)
-            st.session_state.phase1_match_count = data.get("phase1_match_count", 2)
-            save_data_internal()
-            safe_rerun()
+            try:
+                engine.restore(read_backup(uploaded))
+            except BackupError as e:
+                st.error(f"Backup not restored: {e}")
+            else:
+                safe_rerun()
+        
+        with st.expander("📦 BULK IMPORT (CSV / JSON LINES)"):
+            import_kind = st.selectbox("IMPORT", list(IMPORT_COLUMNS), key="import_kind_select")
+            st.caption(f"Columns: {IMPORT_COLUMNS[import_kind]}")
+            import_upload = st.file_uploader("FILE", type=['csv', 'jsonl', 'json'], key="import_file_widget")
+            if import_upload and st.button("📦 IMPORT NOW", key="import_btn", use_container_width=True):
+                bar = st.progress(0.0, text="Importing...")
+                stream = io.TextIOWrapper(import_upload, encoding="utf-8-sig", newline="")
+                try:
+                    report = import_records(
+                        engine, iter_records(stream, format_for_filename(import_upload.name)), import_kind,
+                        progress=lambda r: bar.progress(min(1.0, import_upload.tell() / max(1, import_upload.size)),
+                                                        text=f"{r.read:,} rows read"))
+                except ConflictError as e:
+                    st.error(f"⚠️ {e}")
+                else:
+                    st.success(report.summary())
+                    for err in report.errors: st.warning(err)
+                finally:
+                    stream.detach()
+                    bar.empty()
         if st.button("🧨 FACTORY RESET", key="factory_reset_btn", use_container_width=True):
+            engine.reset()
             st.session_state.clear()
-            if os.path.exists(DB_FILE): os.remove(DB_FILE)
             safe_rerun()
 
 # --- 🎮 MAIN INTERFACE ---
-if not st.session_state.started:
-    st.markdown(f"<div class='glass-panel' style='text-align:center'><h3>CLUBS READY: {len(st.session_state.teams)}</h3></div>", unsafe_allow_html=True)
-    if st.session_state.teams:
+if not tour.started:
+    st.markdown(f"<div class='glass-panel' style='text-align:center'><h3>CLUBS READY: {len(tour.teams)}</h3></div>", unsafe_allow_html=True)
+    if tour.teams:
         cols = st.columns(4)
-        for i, t in enumerate(st.session_state.teams):
-            b = st.session_state.team_badges.get(t, "🛡️")
+        for i, t in enumerate(tour.teams):
+            b = tour.team_badges.get(t, "🛡️")
             with cols[i%4]: st.markdown(f"<div class='glass-panel' style='text-align:center'><h1>{b}</h1><h3>{t}</h3></div>", unsafe_allow_html=True)
 
     if st.session_state.admin_unlock: 
         st.markdown("### 🏆 SELECT FORMAT")
-        fmt = st.radio("", ["Home & Away League", "World Cup (Groups + Knockout)", "Classic Knockout", "Survival Mode (Battle Royale)"], horizontal=True, key="format_radio")
+        fmt = st.radio("", FORMATS, horizontal=True, key="format_radio")
+        seed_input = st.text_input("🎲 DRAW SEED (blank = random)", key="seed_input")
         if st.button("🚀 INITIALIZE SEASON", key="init_season_btn", use_container_width=True):
-            if len(st.session_state.teams) < 2: st.error("Need 2+ Teams")
+            if len(tour.teams) < 2: st.error("Need 2+ Teams")
+            elif seed_input.strip() and not seed_input.strip().isdigit(): st.error("Seed must be a whole number")
             else:
-                st.session_state.format = fmt
-                st.session_state.current_round = "Group Stage" if "World" in fmt else ("League Phase" if "League" in fmt else ("Round 1" if "Survival" in fmt else "Knockout Round"))
-                st.session_state.active_teams = st.session_state.teams.copy()
-                
+                engine.start_season(fmt, seed=int(seed_input.strip()) if seed_input.strip() else None)
                 if "Survival" in fmt:
-                    st.session_state.eliminated_teams = []
-                    st.session_state.round_number = 1
-                    st.session_state.survival_history = []
-                    st.session_state.battle_phase = "Phase 1: The Purge"
-                    st.session_state.bye_team = None
-                    st.session_state.cumulative_stats = {}
-                    st.session_state.cumulative_player_stats = {}
-                    st.session_state.sudden_death_round = 0
-                    st.session_state.phase1_match_count = 2
-                    
-                    # Initialize cumulative stats for all teams
-                    for team in st.session_state.teams:
-                        st.session_state.cumulative_stats[team] = {
-                            'P': 0, 'W': 0, 'D': 0, 'L': 0, 
-                            'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-                        }
-                    
-                    matches = generate_fixtures_for_phase(st.session_state.teams, "Phase 1: The Purge")
-                    st.session_state.fixtures = matches
-                    st.session_state.current_round = f"Round 1 • {st.session_state.battle_phase}"
-                    
                     st.success(f"💀 BATTLE ROYALE INITIALIZED! 2 matches per team. Points and player stats carry over forever!")
-                
-                elif "League" in fmt: 
-                    matches = list(itertools.permutations(st.session_state.teams, 2))
-                    random.shuffle(matches)
-                elif "World Cup" in fmt:
-                    shuffled = st.session_state.teams.copy(); random.shuffle(shuffled); groups = {}; group_names = "ABCDEFGH"
-                    for i in range(0, len(shuffled), 4): groups[group_names[i//4]] = shuffled[i:i+4]
-                    st.session_state.groups = groups; matches = []
-                    for g, teams in groups.items(): matches.extend(list(itertools.combinations(teams, 2)))
-                elif "Knockout" in fmt:
-                    shuffled = st.session_state.teams.copy(); random.shuffle(shuffled); matches = []
-                    for i in range(0, len(shuffled), 2):
-                        if i+1 < len(shuffled): matches.append((shuffled[i], shuffled[i+1]))
-                
-                if "Survival" not in fmt:
-                    st.session_state.fixtures = matches
-                
-                st.session_state.started = True
-                save_data_internal()
                 safe_rerun()
 
 else:
@@ -986,25 +576,24 @@ else:
 
     with tab1:
         def render_battle_royale_table():
-            standings = get_cumulative_standings()
+            engine, tour = live_view()
+            standings = engine.get_cumulative_standings()
             
             if not standings:
                 st.info("No teams remaining")
                 return
             
-            standings.sort(key=lambda x: (x['Pts'], x['GD'], x['GF']), reverse=True)
-            
             rows = []
             for idx, s in enumerate(standings):
                 team = s['Team']
-                badge = st.session_state.team_badges.get(team, "🛡️")
+                badge = tour.team_badges.get(team, "🛡️")
                 
                 row_class = ""
-                if st.session_state.battle_phase == "Phase 1: The Purge" and idx >= len(standings) - 2:
+                if tour.battle_phase == "Phase 1: The Purge" and idx >= len(standings) - 2:
                     row_class = "drop-zone"
-                elif st.session_state.battle_phase == "Phase 2: The Squeeze" and idx == len(standings) - 1:
+                elif tour.battle_phase == "Phase 2: The Squeeze" and idx == len(standings) - 1:
                     row_class = "drop-zone"
-                elif st.session_state.bye_team == team:
+                elif tour.bye_team == team:
                     row_class = "bye-zone"
                 
                 rows.append({
@@ -1018,14 +607,14 @@ else:
             if rows:
                 df = pd.DataFrame(rows)
                 
-                st.markdown(f"**Teams Alive:** {len(st.session_state.active_teams)} | **Current Phase:** {st.session_state.battle_phase}")
+                st.markdown(f"**Teams Alive:** {len(tour.active_teams)} | **Current Phase:** {tour.battle_phase}")
                 
-                if st.session_state.battle_phase == "Phase 1: The Purge":
+                if tour.battle_phase == "Phase 1: The Purge":
                     st.warning(f"⚠️ **DROP ZONE:** Bottom 2 teams will be eliminated after this round! (2 matches each)")
-                elif st.session_state.battle_phase == "Phase 2: The Squeeze":
+                elif tour.battle_phase == "Phase 2: The Squeeze":
                     st.warning(f"⚠️ **DROP ZONE:** Bottom team will be eliminated after this round! (2 matches each)")
-                elif st.session_state.battle_phase == "Phase 3: The Standoff":
-                    st.info(f"👑 **BYE:** {st.session_state.bye_team} gets automatic pass to Final!")
+                elif tour.battle_phase == "Phase 3: The Standoff":
+                    st.info(f"👑 **BYE:** {tour.bye_team} gets automatic pass to Final!")
                     st.warning(f"⚔️ **SUDDEN DEATH:** 2nd vs 3rd playing elimination match!")
                 
                 st.dataframe(df[['#', 'Club', 'P', 'W', 'D', 'L', 'GF', 'GA', 'GD', 'Pts']], 
@@ -1036,10 +625,10 @@ else:
                            })
                 
                 # Show eliminated teams
-                if st.session_state.eliminated_teams:
-                    with st.expander(f"☠️ Eliminated Teams ({len(st.session_state.eliminated_teams)})"):
+                if tour.eliminated_teams:
+                    with st.expander(f"☠️ Eliminated Teams ({len(tour.eliminated_teams)})"):
                         elim_data = []
-                        for e in st.session_state.eliminated_teams:
+                        for e in tour.eliminated_teams:
                             elim_data.append({
                                 "Team": e['team'],
                                 "Round": e['round'],
@@ -1051,18 +640,17 @@ else:
                             st.dataframe(elim_df, hide_index=True, use_container_width=True)
 
         def render_league_table():
-            standings = get_cumulative_standings()
+            engine, tour = live_view()
+            standings = engine.get_cumulative_standings()
             
             if not standings:
                 st.info("No teams in league")
                 return
             
-            standings.sort(key=lambda x: (x['Pts'], x['GD'], x['GF']), reverse=True)
-            
             rows = []
             for idx, s in enumerate(standings):
                 team = s['Team']
-                badge = st.session_state.team_badges.get(team, "🛡️")
+                badge = tour.team_badges.get(team, "🛡️")
                 
                 rows.append({
                     "#": idx + 1,
@@ -1081,203 +669,234 @@ else:
                                "Pts": st.column_config.ProgressColumn("Pts", format="%d", min_value=0, max_value=max(100, df['Pts'].max()))
                            })
 
-        if st.session_state.format == "Survival Mode (Battle Royale)":
-            render_battle_royale_table()
-        elif "League" in st.session_state.format:
-            render_league_table()
-        elif "World" in st.session_state.format and "Group" in st.session_state.current_round:
+        if tour.format == "Survival Mode (Battle Royale)":
+            live_fragment(render_battle_royale_table)()
+        elif "League" in tour.format:
+            live_fragment(render_league_table)()
+        elif "World" in tour.format and "Group" in tour.current_round:
             pass
         else:
             pass
 
     with tab2:
-        filter_team = st.selectbox("FILTER TEAM", ["All"] + st.session_state.active_teams, key="team_filter")
+        # Bulk entry: a whole round validated and saved in one go
+        if st.session_state.admin_unlock and not tour.champion:
+            with st.expander("📋 BULK RESULT ENTRY"):
+                bulk_mode = st.radio("INPUT", ["GRID", "PASTE TEXT"], horizontal=True, key="bulk_mode_radio")
+                entries, parse_errors = [], []
+                
+                if bulk_mode == "GRID":
+                    open_rows = []
+                    for i, fix in enumerate(tour.fixtures):
+                        if len(fix) < 2 or match_id(i, fix[0], fix[1]) in tour.results: continue
+                        open_rows.append({
+                            "#": i + 1, "Home": fix[0], "HG": None, "AG": None, "Away": fix[1],
+                            "HP": None, "AP": None,
+                            "Scorers H": "", "Scorers A": "", "Ast H": "", "Ast A": "", "Red H": "", "Red A": ""
+                        })
+                    
+                    if not open_rows:
+                        st.info("Every fixture this round already has a result.")
+                    else:
+                        st.caption("Fill in HG/AG for each match played - rows without a score are skipped. HP/AP are penalties.")
+                        score_col = st.column_config.NumberColumn(min_value=0, max_value=MAX_GOALS, step=1)
+                        grid = st.data_editor(
+                            pd.DataFrame(open_rows), hide_index=True, use_container_width=True, key="bulk_grid",
+                            disabled=["#", "Home", "Away"],
+                            column_config={"HG": score_col, "AG": score_col, "HP": score_col, "AP": score_col})
+                        
+                        for row in grid.to_dict("records"):
+                            if pd.isna(row["HG"]) and pd.isna(row["AG"]): continue
+                            if pd.isna(row["HG"]) or pd.isna(row["AG"]):
+                                parse_errors.append(f"Match {row['#']}: enter both scores")
+                                continue
+                            entries.append({
+                                'label': f"Match {row['#']}",
+                                'index': int(row["#"]) - 1,
+                                's1': int(row["HG"]), 's2': int(row["AG"]),
+                                'p1': 0 if pd.isna(row["HP"]) else int(row["HP"]),
+                                'p2': 0 if pd.isna(row["AP"]) else int(row["AP"]),
+                                'meta': {
+                                    'h_s': row["Scorers H"] or '', 'a_s': row["Scorers A"] or '',
+                                    'h_a': row["Ast H"] or '', 'a_a': row["Ast A"] or '',
+                                    'h_r': row["Red H"] or '', 'a_r': row["Red A"] or ''
+                                }
+                            })
+                else:
+                    st.caption("One match per line: `Home 2-1 Away; home scorers | away scorers; home assists | away assists; home reds | away reds` "
+                               "- add `(P 4-3)` after the score for penalties.")
+                    bulk_text = st.text_area("RESULTS", key="bulk_text", height=200,
+                                             placeholder="Lions 2-1 Eagles; Messi (2) | Kane; Xavi | ; | Ramos")
+                    if bulk_text.strip():
+                        entries, parse_errors = engine.parse_round_text(bulk_text)
+                
+                if st.button(f"✅ SUBMIT {len(entries)} RESULT(S)", key="bulk_submit_btn", use_container_width=True):
+                    if parse_errors:
+                        for err in parse_errors: st.error(err)
+                    elif not entries:
+                        st.warning("Nothing to submit.")
+                    else:
+                        try:
+                            engine.record_results(entries)
+                            st.success(f"✅ {len(entries)} matches recorded! Table updated.")
+                            safe_rerun()
+                        except ResultEntryError as e:
+                            for err in e.errors: st.error(err)
+                        except ConflictError as e:
+                            st.error(f"⚠️ {e}")
         
-        for i, fix in enumerate(st.session_state.fixtures): 
-            if len(fix) < 2: continue
-            h, a = fix[0], fix[1]
-            
-            if filter_team != "All" and filter_team not in [h, a]: continue
+        def render_fixtures():
+            engine, tour = live_view()
+            # Only the visible page of fixtures builds widgets
+            fc1, fc2, fc3 = st.columns([3, 2, 1])
+            filter_team = fc1.selectbox("FILTER TEAM", ["All"] + tour.active_teams, key="team_filter")
+            filter_status = fc2.selectbox("STATUS", ["All", "Unplayed", "Played"], key="status_filter")
+            page_size = fc3.selectbox("PER PAGE", MATCH_PAGE_SIZES, index=1, key="page_size_select")
+        
+            visible = engine.fixture_indices(None if filter_team == "All" else filter_team, filter_status)
+            pages = max(1, -(-len(visible) // page_size))
+            page = 1
+            if pages > 1:
+                if st.session_state.get('match_page', 1) > pages:
+                    st.session_state.match_page = pages
+                page = st.number_input(f"PAGE (1-{pages})", 1, pages, key="match_page")
+            first = (page - 1) * page_size
+            if visible:
+                st.caption(f"Showing matches {first + 1}-{min(first + page_size, len(visible))} of {len(visible)}")
+            else:
+                st.info("No matches to show.")
+        
+            for i in visible[first:first + page_size]: 
+                fix = tour.fixtures[i]
+                if len(fix) < 2: continue
+                h, a = fix[0], fix[1]
             
-            mid = f"{h}v{a}_{i}" 
-            res = st.session_state.results.get(mid)
+                mid = match_id(i, h, a)
+                res = tour.results.get(mid)
             
-            is_sudden_death = (
-                st.session_state.battle_phase == "Phase 3: The Standoff" and 
-                st.session_state.sudden_death_round > 0
-            )
+                is_sudden_death = engine.is_sudden_death()
             
-            with st.container():
-                panel_class = "glass-panel"
-                if is_sudden_death:
-                    panel_class += " sudden-death"
+                with st.container():
+                    panel_class = "glass-panel"
+                    if is_sudden_death:
+                        panel_class += " sudden-death"
                 
-                st.markdown(f"<div class='{panel_class}'>", unsafe_allow_html=True)
-                c1, c2, c3 = st.columns([4, 2, 4])
-                b1 = st.session_state.team_badges.get(h, ""); b2 = st.session_state.team_badges.get(a, "")
+                    st.markdown(f"<div class='{panel_class}'>", unsafe_allow_html=True)
+                    c1, c2, c3 = st.columns([4, 2, 4])
+                    b1 = tour.team_badges.get(h, ""); b2 = tour.team_badges.get(a, "")
                 
-                # Match header
-                if is_sudden_death:
-                    c1.markdown(f"<h3 style='text-align:right; color:#ff6b6b'>{h} {b1}</h3>", unsafe_allow_html=True)
-                    c3.markdown(f"<h3 style='text-align:left; color:#ff6b6b'>{b2} {a}</h3>", unsafe_allow_html=True)
-                    c2.markdown(f"<div style='text-align:center'><small>⚔️ SUDDEN DEATH • Leg {st.session_state.sudden_death_round}</small></div>", unsafe_allow_html=True)
-                else:
-                    c1.markdown(f"<h3 style='text-align:right'>{h} {b1}</h3>", unsafe_allow_html=True)
-                    c3.markdown(f"<h3 style='text-align:left'>{b2} {a}</h3>", unsafe_allow_html=True)
-                
-                # Score display
-                if res:
-                    sc = f"{res[0]} - {res[1]}"
-                    if len(res) > 2: sc += f"\n(P: {res[2]}-{res[3]})"
-                    score_color = "#ef4444" if is_sudden_death else "#F1E194"
-                    c2.markdown(f"<h1 style='text-align:center; color:{score_color}'>{sc}</h1>", unsafe_allow_html=True)
-                else: 
+                    # Match header
                     if is_sudden_death:
-                        c2.markdown(f"<h1 style='text-align:center; color:#ef4444'>⚔️ VS ⚔️</h1>", unsafe_allow_html=True)
+                        c1.markdown(f"<h3 style='text-align:right; color:#ff6b6b'>{h} {b1}</h3>", unsafe_allow_html=True)
+                        c3.markdown(f"<h3 style='text-align:left; color:#ff6b6b'>{b2} {a}</h3>", unsafe_allow_html=True)
+                        c2.markdown(f"<div style='text-align:center'><small>⚔️ SUDDEN DEATH • Leg {tour.sudden_death_round}</small></div>", unsafe_allow_html=True)
                     else:
-                        c2.markdown(f"<h1 style='text-align:center; color:#946c1e'>VS</h1>", unsafe_allow_html=True)
+                        c1.markdown(f"<h3 style='text-align:right'>{h} {b1}</h3>", unsafe_allow_html=True)
+                        c3.markdown(f"<h3 style='text-align:left'>{b2} {a}</h3>", unsafe_allow_html=True)
                 
-                # Match reporting - FIXED WITH UNIQUE KEYS
-                if st.session_state.admin_unlock and not st.session_state.champion: 
-                    with st.expander(f"📝 REPORT MATCH {i+1}"):
+                    # Score display
+                    if res:
+                        sc = f"{res[0]} - {res[1]}"
+                        if len(res) > 2: sc += f"\n(P: {res[2]}-{res[3]})"
+                        score_color = "#ef4444" if is_sudden_death else "#F1E194"
+                        c2.markdown(f"<h1 style='text-align:center; color:{score_color}'>{sc}</h1>", unsafe_allow_html=True)
+                    else: 
                         if is_sudden_death:
-                            st.warning("⚔️ **SUDDEN DEATH SEMI-FINAL:** Loser is ELIMINATED!")
+                            c2.markdown(f"<h1 style='text-align:center; color:#ef4444'>⚔️ VS ⚔️</h1>", unsafe_allow_html=True)
+                        else:
+                            c2.markdown(f"<h1 style='text-align:center; color:#946c1e'>VS</h1>", unsafe_allow_html=True)
+                
+                    # Match reporting - FIXED WITH UNIQUE KEYS
+                    if st.session_state.admin_unlock and not tour.champion: 
+                        with st.expander(f"📝 REPORT MATCH {i+1}"):
+                            if is_sudden_death:
+                                st.warning("⚔️ **SUDDEN DEATH SEMI-FINAL:** Loser is ELIMINATED!")
                         
-                        ac1, ac2 = st.columns(2)
-                        s1 = ac1.number_input(f"{h}", 0, 20, key=f"s1_{mid}") 
-                        s2 = ac2.number_input(f"{a}", 0, 20, key=f"s2_{mid}") 
-                        p1, p2 = 0, 0
+                            ac1, ac2 = st.columns(2)
+                            s1 = ac1.number_input(f"{h}", 0, 20, key=f"s1_{mid}") 
+                            s2 = ac2.number_input(f"{a}", 0, 20, key=f"s2_{mid}") 
+                            p1, p2 = 0, 0
                         
-                        if (s1 == s2 and "League" not in st.session_state.format) or is_sudden_death:
-                            st.caption("Penalties (if tied)")
-                            p1 = ac1.number_input(f"P {h}", 0, 20, key=f"p1_{mid}")
-                            p2 = ac2.number_input(f"P {a}", 0, 20, key=f"p2_{mid}")
+                            if engine.needs_penalties(s1, s2):
+                                st.caption("Penalties (if tied)")
+                                p1 = ac1.number_input(f"P {h}", 0, 20, key=f"p1_{mid}")
+                                p2 = ac2.number_input(f"P {a}", 0, 20, key=f"p2_{mid}")
 
-                        sc1, sc2 = st.columns(2)
-                        prev = st.session_state.match_meta.get(mid, {})
-                        gs1 = sc1.text_input("Scorers (Home)", value=prev.get('h_s',''), key=f"g1_{mid}", placeholder="Messi (2), ...")
-                        gs2 = sc2.text_input("Scorers (Away)", value=prev.get('a_s',''), key=f"g2_{mid}")
-                        ha = sc1.text_input("Ast H", value=prev.get('h_a',''), key=f"ah_{mid}")
-                        aa = sc2.text_input("Ast A", value=prev.get('a_a',''), key=f"aa_{mid}")
-                        hr = sc1.text_input("Red H", value=prev.get('h_r',''), key=f"rh_{mid}")
-                        ar = sc2.text_input("Red A", value=prev.get('a_r',''), key=f"ra_{mid}")
+                            sc1, sc2 = st.columns(2)
+                            prev = tour.match_meta.get(mid, {})
+                            gs1 = sc1.text_input("Scorers (Home)", value=prev.get('h_s',''), key=f"g1_{mid}", placeholder="Messi (2), ...")
+                            gs2 = sc2.text_input("Scorers (Away)", value=prev.get('a_s',''), key=f"g2_{mid}")
+                            ha = sc1.text_input("Ast H", value=prev.get('h_a',''), key=f"ah_{mid}")
+                            aa = sc2.text_input("Ast A", value=prev.get('a_a',''), key=f"aa_{mid}")
+                            hr = sc1.text_input("Red H", value=prev.get('h_r',''), key=f"rh_{mid}")
+                            ar = sc2.text_input("Red A", value=prev.get('a_r',''), key=f"ra_{mid}")
                         
-                        if st.button("CONFIRM RESULT", key=f"b_{mid}", use_container_width=True):
-                            # Store result
-                            if (s1 == s2 and "League" not in st.session_state.format) or is_sudden_death:
-                                st.session_state.results[mid] = [s1, s2, p1, p2]
-                            else:
-                                st.session_state.results[mid] = [s1, s2]
-                            
-                            # Store match meta
-                            st.session_state.match_meta[mid] = {
-                                'h_s': gs1, 'a_s': gs2, 
-                                'h_a': ha, 'a_a': aa, 
-                                'h_r': hr, 'a_r': ar
-                            }
-                            
-                            # FIX: Update cumulative stats immediately
-                            # Initialize cumulative stats if not exists
-                            if h not in st.session_state.cumulative_stats:
-                                st.session_state.cumulative_stats[h] = {
-                                    'P': 0, 'W': 0, 'D': 0, 'L': 0, 
-                                    'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-                                }
-                            if a not in st.session_state.cumulative_stats:
-                                st.session_state.cumulative_stats[a] = {
-                                    'P': 0, 'W': 0, 'D': 0, 'L': 0, 
-                                    'GF': 0, 'GA': 0, 'GD': 0, 'Pts': 0
-                                }
-                            
-                            # Update cumulative team stats
-                            st.session_state.cumulative_stats[h]['P'] += 1
-                            st.session_state.cumulative_stats[a]['P'] += 1
-                            st.session_state.cumulative_stats[h]['GF'] += s1
-                            st.session_state.cumulative_stats[h]['GA'] += s2
-                            st.session_state.cumulative_stats[h]['GD'] += (s1 - s2)
-                            st.session_state.cumulative_stats[a]['GF'] += s2
-                            st.session_state.cumulative_stats[a]['GA'] += s1
-                            st.session_state.cumulative_stats[a]['GD'] += (s2 - s1)
-                            
-                            if s1 > s2:
-                                st.session_state.cumulative_stats[h]['W'] += 1
-                                st.session_state.cumulative_stats[h]['Pts'] += 3
-                                st.session_state.cumulative_stats[a]['L'] += 1
-                            elif s2 > s1:
-                                st.session_state.cumulative_stats[a]['W'] += 1
-                                st.session_state.cumulative_stats[a]['Pts'] += 3
-                                st.session_state.cumulative_stats[h]['L'] += 1
-                            else:
-                                st.session_state.cumulative_stats[h]['D'] += 1
-                                st.session_state.cumulative_stats[h]['Pts'] += 1
-                                st.session_state.cumulative_stats[a]['D'] += 1
-                                st.session_state.cumulative_stats[a]['Pts'] += 1
-                            
-                            # FIX: Update player stats immediately
-                            process_player_string_update(gs1, h, 'G')
-                            process_player_string_update(gs2, a, 'G')
-                            process_player_string_update(ha, h, 'A')
-                            process_player_string_update(aa, a, 'A')
-                            process_player_string_update(hr, h, 'R')
-                            process_player_string_update(ar, a, 'R')
-                            
-                            save_data_internal()
-                            st.success("✅ Match recorded! Table updated.")
-                            safe_rerun()
-                st.markdown("</div>", unsafe_allow_html=True)
+                            if st.button("CONFIRM RESULT", key=f"b_{mid}", use_container_width=True):
+                                try:
+                                    engine.record_result(i, s1, s2, p1, p2, {
+                                        'h_s': gs1, 'a_s': gs2, 
+                                        'h_a': ha, 'a_a': aa, 
+                                        'h_r': hr, 'a_r': ar
+                                    })
+                                    st.success("✅ Match recorded! Table updated.")
+                                    safe_rerun()
+                                except ConflictError as e:
+                                    st.error(f"⚠️ {e}")
+                    st.markdown("</div>", unsafe_allow_html=True)
+
+        live_fragment(render_fixtures)()
 
     with tab3:
-        # Get cumulative player stats
-        player_stats = st.session_state.cumulative_player_stats
+        def render_player_stats():
+            engine, tour = live_view()
+            # Columnar leaderboard, cached in the engine and updated as results come in
+            table = engine.player_table()
         
-        if player_stats:
-            # Convert to list for display
-            data = []
-            for player_id, stats in player_stats.items():
-                if isinstance(stats, dict):
-                    data.append({
-                        "Player": stats.get('Name', 'Unknown'),
-                        "Club": stats.get('Team', 'Unknown'),
-                        "Goals": stats.get('G', 0),
-                        "Assists": stats.get('A', 0),
-                        "Reds": stats.get('R', 0)
-                    })
-            
-            if data:
-                df = pd.DataFrame(data)
-                
+            if len(table):
                 # Show Golden Boot leader
-                if not df.empty:
-                    top_scorer = df.sort_values(by='Goals', ascending=False).iloc[0]
-                    st.markdown(f"<div class='glass-panel' style='text-align:center'><h3>👑 GOLDEN BOOT LEADER</h3><h2 class='golden-boot'>{top_scorer['Player']} ({top_scorer['Club']}) - {top_scorer['Goals']} goals</h2></div>", unsafe_allow_html=True)
-                
+                top_scorer = engine.leaderboard('G', 1).iloc[0]
+                st.markdown(f"<div class='glass-panel' style='text-align:center'><h3>👑 GOLDEN BOOT LEADER</h3><h2 class='golden-boot'>{top_scorer['Player']} ({top_scorer['Club']}) - {top_scorer['Goals']} goals</h2></div>", unsafe_allow_html=True)
+            
                 c1, c2, c3 = st.columns(3)
-                
-                def show_stat(col, title, key, icon):
+            
+                def show_stat(col, title, stat_type, icon):
                     col.markdown(f"#### {icon} {title}")
-                    if not df.empty:
-                        top = df.sort_values(by=key, ascending=False).head(10).reset_index(drop=True)
-                        top.index += 1
-                        col.dataframe(top[['Player', 'Club', key]], use_container_width=True)
-                
-                show_stat(c1, "Goals", "Goals", "⚽")
-                show_stat(c2, "Assists", "Assists", "👟")
-                show_stat(c3, "Red Cards", "Reds", "🟥")
-                
+                    top = engine.leaderboard(stat_type, 10)
+                    col.dataframe(top.set_axis(range(1, len(top) + 1)), use_container_width=True)
+            
+                show_stat(c1, "Goals", 'G', "⚽")
+                show_stat(c2, "Assists", 'A', "👟")
+                show_stat(c3, "Red Cards", 'R', "🟥")
+            
                 # Show total stats
                 with st.expander("📊 TOTAL TOURNAMENT STATS"):
                     col1, col2, col3, col4 = st.columns(4)
-                    col1.metric("Total Players", len(df))
-                    col2.metric("Total Goals", int(df['Goals'].sum()))
-                    col3.metric("Total Assists", int(df['Assists'].sum()))
-                    col4.metric("Total Red Cards", int(df['Reds'].sum()))
+                    col1.metric("Total Players", len(table))
+                    col2.metric("Total Goals", table.total('G'))
+                    col3.metric("Total Assists", table.total('A'))
+                    col4.metric("Total Red Cards", table.total('R'))
+            
+                # Misspellings the alias index couldn't match on its own
+                if st.session_state.admin_unlock:
+                    with st.expander("🔗 MERGE DUPLICATE PLAYERS"):
+                        merge_team = st.selectbox("CLUB", sorted(engine.players().teams()), key="merge_team_select")
+                        team_players = engine.players().team_players(merge_team)
+                        if len(team_players) < 2:
+                            st.caption("Only one player recorded for this club.")
+                        else:
+                            mc1, mc2 = st.columns(2)
+                            keep_id = mc1.selectbox("KEEP", list(team_players), format_func=team_players.get, key="merge_keep_select")
+                            drop_id = mc2.selectbox("MERGE INTO IT", [pid for pid in team_players if pid != keep_id], format_func=team_players.get, key="merge_drop_select")
+                            if st.button("🔗 MERGE", key="merge_players_btn", use_container_width=True):
+                                engine.merge_players(keep_id, drop_id)
+                                safe_rerun()
             else:
                 st.info("No player stats recorded yet. Report matches to see stats!")
-        else:
-            st.info("No player stats recorded yet. Report matches to see stats!")
+
+        live_fragment(render_player_stats)()
 
     with tab4:
-        if "Survival" in st.session_state.format:
+        if "Survival" in tour.format:
             st.markdown("### 💀 BATTLE ROYALE PROTOCOL")
             
             # Protocol Rules
@@ -1332,49 +951,45 @@ else:
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Teams Alive", len(st.session_state.active_teams))
+                st.metric("Teams Alive", len(tour.active_teams))
             with col2:
-                st.metric("Round", st.session_state.round_number)
+                st.metric("Round", tour.round_number)
             with col3:
-                st.metric("Eliminated", len(st.session_state.eliminated_teams))
+                st.metric("Eliminated", len(tour.eliminated_teams))
             with col4:
-                st.metric("Phase", st.session_state.battle_phase.split(":")[0])
+                st.metric("Phase", tour.battle_phase.split(":")[0])
             
             # Show current match count info
-            if st.session_state.battle_phase == "Phase 1: The Purge":
+            if tour.battle_phase == "Phase 1: The Purge":
                 st.info(f"📊 **Current Round:** Each team plays **2 matches** (balanced scheduling)")
             
             # News Feed
-            if st.session_state.news:
+            if tour.news:
                 st.markdown("### 📰 BATTLE NEWS")
-                for news_item in st.session_state.news[:5]:
+                for news_item in tour.news[:5]:
                     st.markdown(f"• {news_item}")
             
             # Survival Progress
             st.markdown("### 📈 SURVIVAL PROGRESS")
-            total_start = len(st.session_state.teams)
-            current = len(st.session_state.active_teams)
+            total_start = len(tour.teams)
+            current = len(tour.active_teams)
             
             if total_start > 0:
                 progress = current / total_start
                 st.progress(progress, text=f"{current}/{total_start} teams remaining ({int(progress*100)}%)")
             
             # Show who's at risk
-            if st.session_state.active_teams and st.session_state.battle_phase in ["Phase 1: The Purge", "Phase 2: The Squeeze"]:
-                standings = get_cumulative_standings()
-                standings.sort(key=lambda x: (x['Pts'], x['GD'], x['GF']), reverse=True)
+            if tour.active_teams and tour.battle_phase in ["Phase 1: The Purge", "Phase 2: The Squeeze"]:
+                at_risk = engine.drop_zone()
                 
-                if st.session_state.battle_phase == "Phase 1: The Purge" and len(standings) >= 5:
-                    at_risk = standings[-2:]
-                    st.warning(f"**DROP ZONE:** {at_risk[0]['Team']} and {at_risk[1]['Team']} are at risk of elimination!")
-                elif st.session_state.battle_phase == "Phase 2: The Squeeze" and len(standings) == 4:
-                    at_risk = standings[-1]
-                    st.warning(f"**DROP ZONE:** {at_risk['Team']} is at risk of elimination!")
+                if len(at_risk) == 2:
+                    st.warning(f"**DROP ZONE:** {at_risk[0]} and {at_risk[1]} are at risk of elimination!")
+                elif len(at_risk) == 1:
+                    st.warning(f"**DROP ZONE:** {at_risk[0]} is at risk of elimination!")
             
             # Phase 3 Special Display
-            if st.session_state.battle_phase == "Phase 3: The Standoff":
-                standings = get_cumulative_standings()
-                standings.sort(key=lambda x: (x['Pts'], x['GD'], x['GF']), reverse=True)
+            if tour.battle_phase == "Phase 3: The Standoff":
+                standings = engine.get_cumulative_standings()
                 
                 if len(standings) == 3:
                     col1, col2, col3 = st.columns(3)
@@ -1384,6 +999,41 @@ else:
                         st.warning(f"**⚔️ 2nd: {standings[1]['Team']}**\n{standings[1]['Pts']} pts\n(Playing Sudden Death)")
                     with col3:
                         st.error(f"**💀 3rd: {standings[2]['Team']}**\n{standings[2]['Pts']} pts\n(Playing Sudden Death)")
+            
+            # Monte Carlo survival odds
+            if len(tour.active_teams) >= 2 and not tour.champion:
+                with st.expander("🎲 SURVIVAL ODDS (MONTE CARLO)"):
+                    sc1, sc2 = st.columns([3, 1])
+                    n_sims = sc1.selectbox("SIMULATIONS", [1000, 10000, 100000], index=1, key="sim_count_select")
+                    sim_secs = estimated_seconds(len(tour.active_teams), n_sims, SIM_WORKERS)
+                    if sim_secs > 5:
+                        sc1.caption(f"⏳ Roughly {sim_secs:.0f} s on {SIM_WORKERS} worker(s) - DLS_SIM_WORKERS spreads it over more cores.")
+                    if sc2.button("RUN SIMULATION", key="run_sim_btn", use_container_width=True):
+                        with st.spinner(f"Simulating {n_sims:,} tournaments..."):
+                            st.session_state.sim_odds = simulate_survival_odds(
+                                tour.cumulative_stats, tour.active_teams,
+                                tour.fixtures, tour.results,
+                                n_sims=n_sims, workers=SIM_WORKERS,
+                                battle_phase=tour.battle_phase, sudden_death_round=tour.sudden_death_round)
+                            st.session_state.sim_odds_stamp = (tour.round_number, len(tour.results))
+                    
+                    odds = st.session_state.get('sim_odds')
+                    if odds:
+                        if st.session_state.get('sim_odds_stamp') != (tour.round_number, len(tour.results)):
+                            st.caption("⚠️ Results have changed since this simulation - run it again for fresh odds.")
+                        
+                        odds_rows = []
+                        for idx, team in enumerate(odds['teams']):
+                            row = {"Club": f"{tour.team_badges.get(team, '🛡️')} {team}",
+                                   "🏆 Title %": round(100 * odds['champion'][idx], 1)}
+                            # One simulated round per engine round; only the next five that knock someone out
+                            cuts = [r for r in range(len(odds['rounds'])) if odds['eliminated'][r].any()][:5]
+                            for r in cuts:
+                                row[f"Out R{tour.round_number + r} %"] = round(100 * odds['eliminated'][r][idx], 1)
+                            odds_rows.append(row)
+                        odds_df = pd.DataFrame(odds_rows).sort_values(by="🏆 Title %", ascending=False)
+                        st.dataframe(odds_df, hide_index=True, use_container_width=True)
+                        st.caption(f"Based on {odds['n_sims']:,} simulated finishes of the protocol.")
         
         else:
             st.info("Battle Royale info only available in Survival Mode")
@@ -1391,6 +1041,16 @@ else:
 # --- FOOTER ---
 st.markdown("""<div class="footer">OFFICIAL DLS TOURNAMENT ENGINE <br> WRITTEN AND DESIGNED BY <span class="designer-name">OLUWATIMILEYIN IGBINLOLA</span></div>""", unsafe_allow_html=True)
 
+rerun_seconds = time.perf_counter() - RERUN_STARTED
+TIMINGS.record("page.rerun", rerun_seconds * 1000)
+RERUN_SECONDS.observe(rerun_seconds)
+finish_profile()
+if profile_panel is not None and st.session_state.get('last_profile'):
+    with profile_panel:
+        profile_path, profile_text = st.session_state.last_profile
+        st.caption(f"cProfile of one rerun: {profile_path}")
+        st.code(profile_text, language=None)
+
 # Force rerun if needed - This is the key fix!
 if st.session_state.get('force_rerun', False):
     st.session_state.force_rerun = False
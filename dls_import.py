@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+from itertools import islice
+
+from dls_engine import MAX_GOALS, TournamentEngine, match_id
+from dls_storage import get_store
+
+# --- 📦 BULK IMPORT ---
+# Streams clubs, fixtures or results from CSV (header row) or JSON-lines files into a
+# TournamentEngine. Rows are pulled a chunk at a time and applied in memory; the store
+# is written once, after the last chunk.
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_COLUMNS = {
+    "clubs": "name",
+    "fixtures": "home, away",
+    "results": "home, away, home_goals, away_goals, [home_pens, away_pens, home_scorers, away_scorers, "
+               "home_assists, away_assists, home_reds, away_reds]",
+}
+
+# Player-list columns → match_meta keys (same formats as CONFIRM RESULT: "Messi (2), Kane x2")
+META_COLUMNS = {
+    'home_scorers': 'h_s', 'away_scorers': 'a_s',
+    'home_assists': 'h_a', 'away_assists': 'a_a',
+    'home_reds': 'h_r', 'away_reds': 'a_r',
+}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+class ImportReport:
+    """Counts for one import run plus the first MAX_REPORTED_ERRORS row errors"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.read = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {row}: {message}")
+
+    def summary(self):
+        return f"Imported {self.imported:,} of {self.read:,} {self.kind} rows ({self.skipped:,} skipped)"
+
+
+def iter_records(stream, fmt):
+    """Yield (row number, record dict) from a text stream; records that can't be read come back as None"""
+    if fmt == "csv":
+        for row_no, row in enumerate(csv.DictReader(stream), 2):
+            yield row_no, {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+    elif fmt in ("jsonl", "json"):
+        for row_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line: continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield row_no, record if isinstance(record, dict) else None
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+def format_for_filename(filename):
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+
+def _text(record, key):
+    value = record.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def _goals(record, key, required=True):
+    value = _text(record, key)
+    if not value:
+        if required:
+            raise ImportRowError(f"missing {key}")
+        return 0
+    # isdigit() also passes '²' and other digits int() rejects
+    if not (value.isascii() and value.isdecimal()) or int(value) > MAX_GOALS:
+        raise ImportRowError(f"{key} must be a whole number from 0 to {MAX_GOALS}, got '{value}'")
+    return int(value)
+
+
+class _Importer:
+    """Row handlers sharing lookups built once per import"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.teams = set(engine.state.teams)
+        self.open_fixtures = {}
+        for i, fix in enumerate(engine.state.fixtures):
+            if len(fix) >= 2 and match_id(i, fix[0], fix[1]) not in engine.state.results:
+                self.open_fixtures.setdefault((fix[0], fix[1]), []).append(i)
+
+    def _pair(self, record):
+        home, away = _text(record, 'home'), _text(record, 'away')
+        if not home or not away:
+            raise ImportRowError("home and away are required")
+        if home == away:
+            raise ImportRowError(f"{home} can't play itself")
+        for team in (home, away):
+            if team not in self.teams:
+                raise ImportRowError(f"unknown club '{team}'")
+        return home, away
+
+    def clubs(self, record):
+        name = _text(record, 'name')
+        if not name:
+            raise ImportRowError("name is required")
+        if name in self.teams:
+            raise ImportRowError(f"'{name}' is already registered")
+        self.engine.register_team(name)
+        self.teams.add(name)
+
+    def fixtures(self, record):
+        home, away = self._pair(record)
+        index = self.engine.add_fixture(home, away)
+        self.open_fixtures.setdefault((home, away), []).append(index)
+
+    def results(self, record):
+        """Record against the first open fixture between the two clubs, creating one if there is none"""
+        home, away = self._pair(record)
+        entry = {
+            's1': _goals(record, 'home_goals'), 's2': _goals(record, 'away_goals'),
+            'p1': _goals(record, 'home_pens', required=False), 'p2': _goals(record, 'away_pens', required=False),
+            'meta': {meta_key: _text(record, column) for column, meta_key in META_COLUMNS.items()},
+        }
+        candidates = self.open_fixtures.get((home, away))
+        index = candidates.pop(0) if candidates else self.engine.add_fixture(home, away)
+        self.engine.apply_result(index, entry['s1'], entry['s2'], entry['p1'], entry['p2'], entry['meta'])
+
+
+def import_records(engine, records, kind, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, save=True):
+    """Apply (row number, record) pairs of one kind to the engine, then save once.
+
+    Bad rows are skipped and reported rather than aborting the run. `records`
+    is consumed lazily `chunk_size` rows at a time; `progress(report)` is called
+    after each chunk.
+    """
+    if kind not in IMPORT_COLUMNS:
+        raise ValueError(f"Unknown import kind: {kind}")
+    report = ImportReport(kind)
+    records = iter(records)
+
+    # Other sessions sharing the engine wait until the import is applied and saved
+    with engine.batch():
+        handler = getattr(_Importer(engine), kind)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            for row_no, record in chunk:
+                report.read += 1
+                if record is None:
+                    report.error(row_no, "not a valid record")
+                    continue
+                try:
+                    handler(record)
+                    report.imported += 1
+                except ImportRowError as e:
+                    report.error(row_no, str(e))
+            if progress:
+                progress(report)
+
+        if report.imported:
+            # Thousands of small changes: one snapshot is cheaper than journaling each
+            engine.invalidate_standings()
+            if save:
+                engine.save(full=True)
+    return report
+
+
+def import_file(engine, path, kind, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return import_records(engine, iter_records(f, format_for_filename(path)), kind, chunk_size=chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import clubs, fixtures or results into a DLS Ultra database")
+    parser.add_argument("kind", choices=list(IMPORT_COLUMNS))
+    parser.add_argument("file", help="CSV with a header row, or JSON lines (.jsonl)")
+    parser.add_argument("--db", default="dls_ultra_db.json", help="database file to import into")
+    parser.add_argument("--backend", default="json", choices=["json", "sqlite"])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    engine = TournamentEngine(store=get_store(args.db, backend=args.backend))
+    engine.load()
+    report = import_file(engine, args.file, args.kind, chunk_size=args.chunk_size)
+    print(report.summary())
+    for error in report.errors:
+        print(f"  {error}")
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from collections import deque
+
+# --- 📈 METRICS ---
+# Counters, gauges and histograms for the operational numbers (saves, bytes written, load
+# and rerun latency, sessions, results per minute), rendered in the Prometheus text format
+# for a local scrape of /metrics on the JSON API or a file rewritten every few seconds.
+# Off unless DLS_METRICS=1 (or a metrics file is configured): every instrument then
+# returns after one flag check.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SESSION_TTL = 300          # seconds since its last rerun that a browser session still counts as active
+DEFAULT_INTERVAL = 15      # seconds between metrics file writes
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """The instruments of one process and their Prometheus text rendering"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._instruments = []
+        self._lock = threading.Lock()
+
+    def add(self, instrument):
+        self._instruments.append(instrument)
+        return instrument
+
+    def counter(self, name, help, window=None):
+        return self.add(Counter(self, name, help, window))
+
+    def gauge(self, name, help, read):
+        return self.add(Gauge(self, name, help, read))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(self, name, help, buckets))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for instrument in self._instruments:
+                lines.append(f"# HELP {instrument.name} {instrument.help}")
+                lines.append(f"# TYPE {instrument.name} {instrument.kind}")
+                lines.extend(instrument.samples())
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Render into `path` atomically (node_exporter textfile-collector style)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+class Counter:
+    """Monotonic count per label set; with `window`, also how much was added in the last `window` seconds"""
+    kind = "counter"
+
+    def __init__(self, metrics, name, help, window=None):
+        self.metrics, self.name, self.help = metrics, name, help
+        self.window = window
+        self._values = {}
+        self._recent = deque()
+
+    def inc(self, amount=1, **labels):
+        if not self.metrics.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self.metrics._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            if self.window:
+                now = time.monotonic()
+                self._expire(now)  # nothing may ever scrape, so the window can't rely on render to stay small
+                self._recent.append((now, amount))
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+
+    def recent(self):
+        """Total added within the window (call with the metrics lock held, as render does)"""
+        self._expire(time.monotonic())
+        return sum(amount for _, amount in self._recent)
+
+    def samples(self):
+        return [f"{self.name}{_labels(key)} {_number(v)}" for key, v in sorted(self._values.items())] or [f"{self.name} 0"]
+
+
+class Gauge:
+    """A value read when rendered"""
+    kind = "gauge"
+
+    def __init__(self, metrics, name, help, read):
+        self.metrics, self.name, self.help = metrics, name, help
+        self.read = read
+
+    def samples(self):
+        return [f"{self.name} {_number(self.read())}"]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, metrics, name, help, buckets):
+        self.metrics, self.name, self.help = metrics, name, help
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value):
+        if not self.metrics.enabled:
+            return
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self.metrics._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def samples(self):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self._counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_number(self._sum)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class ActiveSessions:
+    """Browser sessions that reran within the last `ttl` seconds"""
+
+    def __init__(self, metrics, ttl=SESSION_TTL):
+        self.metrics = metrics
+        self.ttl = ttl
+        self._seen = {}
+
+    def touch(self, key):
+        if self.metrics.enabled:
+            self._seen[key] = time.monotonic()
+
+    def count(self):
+        cutoff = time.monotonic() - self.ttl
+        for key in [k for k, t in list(self._seen.items()) if t < cutoff]:
+            self._seen.pop(key, None)
+        return len(self._seen)
+
+
+METRICS = Metrics(enabled=os.environ.get("DLS_METRICS", "0") != "0" or bool(os.environ.get("DLS_METRICS_FILE")))
+
+SAVES = METRICS.counter("dls_saves_total", "Tournament saves, by backend and kind (journal append or full rewrite)")
+SAVE_BYTES = METRICS.counter("dls_save_bytes_total", "Bytes written by tournament saves (SQLite: estimated)")
+SAVE_SECONDS = METRICS.histogram("dls_save_seconds", "Tournament save latency, conflict retries included")
+LOAD_SECONDS = METRICS.histogram("dls_load_seconds", "Tournament load latency")
+RERUN_SECONDS = METRICS.histogram("dls_rerun_seconds", "Full Streamlit script run duration")
+RESULTS_RECORDED = METRICS.counter("dls_results_recorded_total", "Match results recorded", window=60)
+SESSIONS = ActiveSessions(METRICS)
+METRICS.gauge("dls_results_per_minute", "Match results recorded in the last 60 seconds", RESULTS_RECORDED.recent)
+METRICS.gauge("dls_active_sessions", f"Browser sessions seen in the last {SESSION_TTL} seconds", SESSIONS.count)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def write_in_background(path, interval=DEFAULT_INTERVAL, metrics=METRICS):
+    """Rewrite the metrics file every `interval` seconds on a daemon thread, once per path per process"""
+    def loop():
+        while True:
+            try:
+                metrics.write_file(path)
+            except OSError:
+                pass  # a full or read-only disk shouldn't take the app down; the next pass retries
+            time.sleep(interval)
+
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = threading.Thread(target=loop, name="dls-metrics-file", daemon=True)
+            _writers[path].start()
+        return _writers[path]
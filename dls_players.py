@@ -0,0 +1,306 @@
+import copy
+import re
+from collections import Counter
+from difflib import get_close_matches
+
+import numpy as np
+import pandas as pd
+
+# --- ⭐ PLAYER STAT PARSING ---
+# Scorer / assist / red strings look like "Messi (2), Kane x2, Saka". Players are keyed on
+# integer ids; a per-team alias index maps every spelling seen ("L. Messi", "messi") to one id.
+
+PLAYER_ENTRY_RE = re.compile(r'^(?P<name>.*?)\s*(?:\((?P<paren>\d+)\)|[xX](?P<times>\d+))?$')
+ALIAS_STRIP_RE = re.compile(r"[.'’`-]")
+WHITESPACE_RE = re.compile(r'\s+')
+
+STAT_TYPES = ('G', 'A', 'R')
+
+# match_meta field → (home side?, stat)
+META_STATS = {
+    'h_s': (True, 'G'), 'a_s': (False, 'G'),
+    'h_a': (True, 'A'), 'a_a': (False, 'A'),
+    'h_r': (True, 'R'), 'a_r': (False, 'R'),
+}
+
+FUZZY_CUTOFF = 0.85
+
+
+def parse_player_list(raw_str):
+    """[(display name, count), ...] from one comma-separated player string"""
+    if not raw_str: return []
+    parsed = []
+    for raw_player in raw_str.split(','):
+        raw_player = raw_player.strip()
+        if not raw_player: continue
+        m = PLAYER_ENTRY_RE.match(raw_player)
+        count = int(m.group('paren') or m.group('times') or 1)
+        name = m.group('name').strip().title()
+        if name:
+            parsed.append((name, count))
+    return parsed
+
+
+def alias_key(name):
+    """Spelling-insensitive lookup key: "L. Messi" → "l messi" """
+    return WHITESPACE_RE.sub(' ', ALIAS_STRIP_RE.sub(' ', name)).strip().casefold()
+
+
+class PlayerIndex:
+    """Resolves (team, spelling) to a stable integer player id.
+
+    `stats` is the live cumulative_player_stats dict ({id: {'Name', 'Team', 'G', 'A', 'R'}})
+    and `aliases` the persisted {team: {alias key: id}} map of learned spellings; both are
+    shared by reference. Lookups try, in order: a known alias or canonical name, an initial
+    or surname-only form ("L. Messi", "Messi" for "Lionel Messi"), then a close fuzzy match.
+    """
+
+    def __init__(self, stats, aliases):
+        self.stats = stats
+        self.aliases = aliases
+        self._names = {}      # team → {canonical alias key: id}
+        self._next_id = 1
+        self.created = set()  # ids handed out since the owner last cleared this (i.e. not saved yet)
+        for pid, row in stats.items():
+            if isinstance(pid, int):
+                self._names.setdefault(row.get('Team'), {})[alias_key(row.get('Name', ''))] = pid
+                self._next_id = max(self._next_id, pid + 1)
+
+    def copy(self, stats, aliases):
+        """Independent index over equal copies of its stats and aliases"""
+        other = copy.copy(self)
+        other.stats, other.aliases = stats, aliases
+        other._names = {team: dict(names) for team, names in self._names.items()}
+        other.created = set()
+        return other
+
+    def _match(self, team, key):
+        names = self._names.get(team, {})
+        if key in names:
+            return names[key]
+        learned = self.aliases.get(team, {})
+        if key in learned and learned[key] in self.stats:
+            return learned[key]
+
+        # "l messi" or "messi" for "lionel messi" - only when exactly one player fits
+        tokens = key.split(' ')
+        if tokens[-1]:
+            initial = tokens[0] if len(tokens) == 2 and len(tokens[0]) == 1 else None
+            fits = [pid for canonical, pid in names.items()
+                    if canonical.split(' ')[-1] == tokens[-1] and canonical != tokens[-1]
+                    and (len(tokens) == 1 or (initial and canonical.startswith(initial)))]
+            if len(fits) == 1:
+                return fits[0]
+
+        close = get_close_matches(key, list(names), n=1, cutoff=FUZZY_CUTOFF)
+        if close and close[0][:1] == key[:1]:
+            return names[close[0]]
+        return None
+
+    def resolve(self, team, name, create=True):
+        """Player id for a spelling, learning it as an alias (returns (id, changed_aliases))"""
+        key = alias_key(name)
+        pid = self._match(team, key)
+        if pid is not None:
+            changed = key not in self._names.get(team, {}) and self.aliases.get(team, {}).get(key) != pid
+            if changed:
+                self.aliases.setdefault(team, {})[key] = pid
+            return pid, changed
+        if not create:
+            return None, False
+        return self._new_player(team, name, key), False
+
+    def _new_player(self, team, name, key):
+        pid = self._next_id
+        self._next_id += 1
+        self.created.add(pid)
+        self.stats[pid] = {'Name': name, 'Team': team, 'G': 0, 'A': 0, 'R': 0}
+        self._names.setdefault(team, {})[key] = pid
+        return pid
+
+    def tally(self, items, sign=1):
+        """Apply many (team, stat, raw string) items in one pass (sign=-1 takes them back off).
+
+        Counts are summed per (team, spelling, stat) before any lookup, so each
+        distinct spelling is resolved once. Returns (touched ids, teams whose aliases changed).
+        """
+        counts = Counter()
+        names = {}
+        for team, stat_type, raw_str in items:
+            for name, count in parse_player_list(raw_str):
+                key = (team, alias_key(name), stat_type)
+                counts[key] += count
+                names.setdefault(key[:2], name)
+
+        touched, alias_teams = set(), set()
+        resolved = {}
+        for (team, key, stat_type), count in counts.items():
+            if (team, key) not in resolved:
+                resolved[(team, key)], changed = self.resolve(team, names[(team, key)])
+                if changed:
+                    alias_teams.add(team)
+            pid = resolved[(team, key)]
+            self.stats[pid][stat_type] += sign * count
+            touched.add(pid)
+        return touched, alias_teams
+
+    def teams(self):
+        return [team for team, names in self._names.items() if names]
+
+    def team_players(self, team):
+        """{id: name} of one club's players"""
+        return {pid: self.stats[pid].get('Name', 'Unknown') for pid in self._names.get(team, {}).values()}
+
+    def merge(self, keep_id, drop_id):
+        """Fold one player's stats and spellings into another (same team)"""
+        keep, drop = self.stats[keep_id], self.stats.pop(drop_id)
+        for stat_type in STAT_TYPES:
+            keep[stat_type] = keep.get(stat_type, 0) + drop.get(stat_type, 0)
+        team = drop.get('Team')
+        names = self._names.get(team, {})
+        for key in [k for k, pid in names.items() if pid == drop_id]:
+            del names[key]
+        learned = self.aliases.setdefault(team, {})
+        for key in [k for k, pid in learned.items() if pid == drop_id]:
+            learned[key] = keep_id
+        learned[alias_key(drop.get('Name', ''))] = keep_id
+
+    def adopt_legacy_keys(self):
+        """Re-key old "Name|Team" entries onto integer ids, in place. Returns True if anything moved."""
+        legacy = [k for k in self.stats if not isinstance(k, int)]
+        for old_key in legacy:
+            row = self.stats.pop(old_key)
+            name = row.get('Name') or old_key.split('|')[0]
+            team = row.get('Team') or old_key.partition('|')[2]
+            key = alias_key(name)
+            # Only exact spellings merge here; near-misses stay separate for an admin to merge
+            pid = self._names.get(team, {}).get(key) or self._new_player(team, name, key)
+            for stat_type in STAT_TYPES:
+                self.stats[pid][stat_type] += row.get(stat_type, 0)
+        return bool(legacy)
+
+
+# --- 📊 LEADERBOARD ---
+
+class PlayerTable:
+    """Columnar copy of cumulative_player_stats for the STATS tab.
+
+    Goals/assists/reds live in one (3 × rows) int64 array next to typed id and
+    team-code columns. update() rewrites only the rows of players that changed,
+    running totals are adjusted as rows change, and top() uses argpartition, so
+    a leaderboard costs O(players) once instead of a DataFrame build and a full
+    sort per table on every rerun.
+    """
+
+    LABELS = {'G': 'Goals', 'A': 'Assists', 'R': 'Reds'}
+
+    def __init__(self, stats):
+        self.stats = stats
+        capacity = max(64, len(stats))
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.team_codes = np.zeros(capacity, dtype=np.int32)
+        self.names = np.empty(capacity, dtype=object)
+        self.values = np.zeros((len(STAT_TYPES), capacity), dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.count = 0
+        self.totals = np.zeros(len(STAT_TYPES), dtype=np.int64)
+        self._row_of = {}
+        self._teams = []
+        self._team_code = {}
+
+        # Bulk load: one pass over the dict, columns filled in whole
+        n = len(stats)
+        players = list(stats.values())
+        self.ids[:n] = list(stats)
+        self.names[:n] = [p.get('Name', 'Unknown') for p in players]
+        self.team_codes[:n] = [self._code(p.get('Team', 'Unknown')) for p in players]
+        for k, stat_type in enumerate(STAT_TYPES):
+            self.values[k, :n] = [p.get(stat_type, 0) for p in players]
+        self.alive[:n] = True
+        self._row_of = dict(zip(stats, range(n)))
+        self.size = self.count = n
+        self.totals = self.values.sum(axis=1)
+
+    def copy(self, stats):
+        """Independent table over an equal copy of its stats dict"""
+        other = copy.copy(self)
+        other.stats = stats
+        for name in ('ids', 'team_codes', 'names', 'values', 'alive', 'totals'):
+            setattr(other, name, getattr(self, name).copy())
+        other._row_of = dict(self._row_of)
+        other._teams = self._teams[:]
+        other._team_code = dict(self._team_code)
+        return other
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = 2 * len(self.ids)
+        for name in ('ids', 'team_codes', 'names', 'alive'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype) if old.dtype != object else np.empty(capacity, dtype=object)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        values = np.zeros((len(STAT_TYPES), capacity), dtype=np.int64)
+        values[:, :self.values.shape[1]] = self.values
+        self.values = values
+
+    def _code(self, team):
+        code = self._team_code.get(team)
+        if code is None:
+            code = self._team_code[team] = len(self._teams)
+            self._teams.append(team)
+        return code
+
+    def update(self, pids):
+        """Re-read these players from the stats dict (new, changed or removed)"""
+        for pid in pids:
+            row = self._row_of.get(pid)
+            player = self.stats.get(pid)
+            if player is None:
+                if row is not None and self.alive[row]:
+                    self.totals -= self.values[:, row]
+                    self.values[:, row] = 0
+                    self.alive[row] = False
+                    self.count -= 1
+                continue
+
+            if row is None:
+                if self.size == len(self.ids):
+                    self._grow()
+                row = self.size
+                self.size += 1
+                self._row_of[pid] = row
+                self.ids[row] = pid
+            if not self.alive[row]:
+                self.alive[row] = True
+                self.count += 1
+
+            self.team_codes[row] = self._code(player.get('Team', 'Unknown'))
+            self.names[row] = player.get('Name', 'Unknown')
+
+            new = np.array([player.get(k, 0) for k in STAT_TYPES], dtype=np.int64)
+            self.totals += new - self.values[:, row]
+            self.values[:, row] = new
+
+    def top(self, stat_type, n=10):
+        """Leaders for one stat as a DataFrame (Player, Club, Goals/Assists/Reds), best first"""
+        k = STAT_TYPES.index(stat_type)
+        rows = np.flatnonzero(self.alive[:self.size])
+        vals = self.values[k, rows]
+        if len(rows) > n:
+            picked = np.argpartition(-vals, n - 1)[:n]
+        else:
+            picked = np.arange(len(rows))
+        rows = rows[picked[np.argsort(-vals[picked], kind='stable')]]
+        teams = np.array(self._teams, dtype=object)
+        return pd.DataFrame({
+            'Player': self.names[rows],
+            'Club': teams[self.team_codes[rows]] if len(rows) else [],
+            self.LABELS[stat_type]: self.values[k, rows],
+        })
+
+    def total(self, stat_type):
+        return int(self.totals[STAT_TYPES.index(stat_type)])
@@ -0,0 +1,138 @@
+import argparse
+import cProfile
+import functools
+import io
+import math
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- ⏱️ PROFILING ---
+# Wall-time samples for named sections (a whole rerun, load_data, a page fragment, the
+# engine's save/sync/standings rebuild...), kept as a rolling window per section so the
+# DEBUG TOOLS panel can show p50/p95. One Timings per process, shared by every session,
+# like the registry. A single rerun can also be captured with cProfile and dumped to disk.
+
+HISTORY = 500          # samples kept per section
+PROFILE_TOP = 30       # functions in the text summary of a captured profile
+PROFILE_SORT = "cumulative"
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile (0-100) of an already sorted, non-empty list"""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class Timings:
+    """Rolling window of wall times (ms) per section name"""
+
+    def __init__(self, history=HISTORY, enabled=True):
+        self.history = history
+        self.enabled = enabled
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.history)
+                self._totals[name] = 0
+            samples.append(ms)
+            self._totals[name] += 1
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def timed(self, name=None):
+        """Decorator: time every call of the function as section `name` (default: its qualified name)"""
+        def decorate(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(label, (time.perf_counter() - started) * 1000)
+            return wrapper
+        return decorate
+
+    def stats(self):
+        """One row per section, slowest p95 first: calls, last, p50, p95, max (ms) over the window"""
+        with self._lock:
+            snapshot = [(name, list(samples), self._totals[name]) for name, samples in self._samples.items()]
+        rows = []
+        for name, samples, total in snapshot:
+            ordered = sorted(samples)
+            rows.append({'section': name, 'calls': total, 'last ms': round(samples[-1], 2),
+                         'p50 ms': round(percentile(ordered, 50), 2), 'p95 ms': round(percentile(ordered, 95), 2),
+                         'max ms': round(ordered[-1], 2)})
+        return sorted(rows, key=lambda r: -r['p95 ms'])
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def __len__(self):
+        return len(self._samples)
+
+
+TIMINGS = Timings(enabled=os.environ.get("DLS_PROFILE", "1") != "0")
+section = TIMINGS.section
+timed = TIMINGS.timed
+
+
+# --- 🔬 CPROFILE CAPTURE ---
+
+def start_profile():
+    """A running cProfile.Profile, or None if another profiler already owns this thread"""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def dump_profile(profiler, directory, label="rerun", top=PROFILE_TOP):
+    """Stop the profiler, write its pstats file into `directory` and return (path, text summary)"""
+    profiler.disable()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{label}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.pstats")
+    profiler.dump_stats(path)
+    return path, summarize(path, top)
+
+
+def summarize(path, top=PROFILE_TOP, sort=PROFILE_SORT):
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the hottest functions of a captured DLS Ultra rerun profile")
+    parser.add_argument("path", help="a .pstats file written by the DEBUG TOOLS profiler")
+    parser.add_argument("--top", type=int, default=PROFILE_TOP)
+    parser.add_argument("--sort", default=PROFILE_SORT, help="pstats sort key (cumulative, tottime, calls...)")
+    args = parser.parse_args()
+    print(summarize(args.path, args.top, args.sort))
@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from dls_engine import TournamentEngine
+from dls_storage import StorageError, _atomic_write_json, get_store
+
+# --- 🏟️ TOURNAMENT REGISTRY ---
+# Every tournament lives in its own store; the registry file only lists them. A tournament
+# is loaded the first time someone opens it and the most recently used ones stay in memory,
+# shared by every session - a session only holds the id of the tournament it is viewing.
+
+DEFAULT_CACHE_SIZE = 8
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+STORE_EXTENSIONS = {"json": "json", "sqlite": "sqlite"}
+
+
+def slugify(name):
+    return SLUG_RE.sub('-', name.lower()).strip('-') or "tournament"
+
+
+class TournamentRegistry:
+    """Tournament id → store listing plus an LRU of loaded engines"""
+
+    def __init__(self, path, root, backend="json", journal=True, compact_every=500, cache_size=DEFAULT_CACHE_SIZE,
+                 undo_limit=0):
+        self.path = path
+        self.root = root
+        self.backend = backend
+        self.journal = journal
+        self.compact_every = compact_every
+        self.cache_size = max(1, cache_size)
+        self.undo_limit = undo_limit
+        self._lock = threading.RLock()
+        self._engines = OrderedDict()
+        self._entries = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise StorageError(f"Could not read {self.path}: {e}") from e
+        return data.get("tournaments", {}) if isinstance(data, dict) else {}
+
+    def _write(self):
+        _atomic_write_json(self.path, {"tournaments": self._entries})
+
+    def __contains__(self, tid):
+        return tid in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def tournaments(self):
+        """{id: display name} in creation order"""
+        return {tid: entry["name"] for tid, entry in self._entries.items()}
+
+    def name(self, tid):
+        return self._entries[tid]["name"]
+
+    def create(self, name, backend=None):
+        """Register a new, empty tournament with its own store file. Returns its id."""
+        name = name.strip()
+        if not name:
+            raise ValueError("Tournament name is required")
+        backend = backend or self.backend
+        with self._lock:
+            base = tid = slugify(name)
+            n = 2
+            while tid in self._entries:
+                tid = f"{base}-{n}"
+                n += 1
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, f"{tid}.{STORE_EXTENSIONS[backend]}")
+            self._entries[tid] = {"name": name, "path": path, "backend": backend,
+                                  "created": datetime.now().isoformat(timespec="seconds")}
+            self._write()
+        return tid
+
+    def adopt(self, tid, name, path, backend=None):
+        """List an existing store file (e.g. the single-tournament database) under a fixed id"""
+        with self._lock:
+            if tid not in self._entries:
+                self._entries[tid] = {"name": name, "path": path, "backend": backend or self.backend,
+                                      "created": datetime.now().isoformat(timespec="seconds")}
+                self._write()
+        return tid
+
+    def store(self, tid):
+        entry = self._entries[tid]
+        return get_store(entry["path"], backend=entry["backend"], journal=self.journal, compact_every=self.compact_every)
+
+    def open(self, tid):
+        """Loaded engine for one tournament, reading it from its store only on a cache miss"""
+        with self._lock:
+            engine = self._engines.get(tid)
+            if engine is not None:
+                self._engines.move_to_end(tid)
+                return engine
+            engine = TournamentEngine(store=self.store(tid), undo_limit=self.undo_limit)
+            engine.load()
+            self._engines[tid] = engine
+            while len(self._engines) > self.cache_size:
+                self._engines.popitem(last=False)
+            return engine
+
+    def evict(self, tid):
+        with self._lock:
+            self._engines.pop(tid, None)
+
+    def loaded(self):
+        """Ids currently held in memory, least recently used first"""
+        return list(self._engines)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path, root, backend="json", journal=True, compact_every=500, cache_size=DEFAULT_CACHE_SIZE,
+                 undo_limit=0):
+    """One registry per file per process, so every session shares the loaded tournaments"""
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = TournamentRegistry(path, root, backend=backend, journal=journal,
+                                                   compact_every=compact_every, cache_size=cache_size,
+                                                   undo_limit=undo_limit)
+        return _registries[path]
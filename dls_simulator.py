@@ -0,0 +1,303 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# --- 🎲 BATTLE ROYALE MONTE CARLO ---
+# Plays the rest of the Purge → Squeeze → Standoff → Grand Final protocol many times at once.
+# Team state is held as (simulations × teams) arrays; a round is a handful of array ops,
+# never a Python loop over simulations.
+
+DEFAULT_GOALS_PER_TEAM = 1.3
+PRIOR_MATCHES = 3          # shrink each team's attack/defence towards the average by this many matches
+MAX_CELLS_PER_CHUNK = 2_000_000   # simulations × teams held in memory per chunk
+# Measured single-core throughput, in simulated team-rounds (one team alive for one round of
+# one simulation) per second. The Poisson draws are most of it and are already one call per
+# round, so 100k runs of a 64-club bracket (~1,000 team-rounds each) take ~20 s per core.
+TEAM_ROUNDS_PER_SECOND = 5_000_000
+
+PHASE_FOR_COUNT = {4: "Phase 2: The Squeeze", 3: "Phase 3: The Standoff", 2: "Phase 4: The Grand Final"}
+
+# What the fixtures of a round are, from the phase they were drawn in (the engine draws the
+# next round with the phase of the round just decided, so 4 survivors of a Purge still play a
+# Purge round). A Standoff round before the first leg, or after the cut, has no fixtures.
+PLAY_FOR_PHASE = {"Phase 1: The Purge": "purge", "Phase 2: The Squeeze": "squeeze", "Phase 4: The Grand Final": "final"}
+
+
+def phase_for_count(remaining):
+    return PHASE_FOR_COUNT.get(remaining, "Phase 1: The Purge")
+
+
+def playing(battle_phase, sudden_death_round=0):
+    if battle_phase == "Phase 3: The Standoff":
+        return "legs" if sudden_death_round else None
+    return PLAY_FOR_PHASE.get(battle_phase, "purge")
+
+
+def remaining_schedule(remaining, battle_phase=None, sudden_death_round=0):
+    """(teams alive, fixtures played, cut) for each round still to come, in the order
+    handle_battle_royale_elimination runs them, starting with the round in progress.
+
+    Cuts: "purge" (bottom 2), "squeeze" (bottom 1), "standoff" (the loser of the legs just
+    played), "final" (the crown) or None. The Standoff takes three rounds: one with no cut,
+    then two of 2nd v 3rd legs re-seeded from the table, the second of which decides the tie.
+    The engine keeps replaying the final; here the first final match is the last round.
+    """
+    rounds = []
+    play = playing(battle_phase or phase_for_count(remaining), sudden_death_round)
+    while remaining >= 2:
+        if remaining >= 5:
+            cut, after = "purge", "purge"
+        elif remaining == 4:
+            cut, after = "squeeze", "squeeze"
+        elif remaining == 3:
+            cut = "standoff" if sudden_death_round >= 2 else None
+            after = None if cut else "legs"
+            sudden_death_round = 0 if cut else sudden_death_round + 1
+        else:
+            cut, after = ("final" if play == "final" else None), "final"
+        rounds.append((remaining, play, cut))
+        if cut == "final":
+            break
+        remaining -= {"purge": 2, "squeeze": 1, "standoff": 1}.get(cut, 0)
+        play = after
+    return rounds
+
+
+def estimated_seconds(n_teams, n_sims, workers=1):
+    """Rough wall time of simulate_survival_odds from the start of a round with `n_teams` alive"""
+    team_rounds = sum(m for m, _, _ in remaining_schedule(n_teams))
+    return n_sims * team_rounds / (TEAM_ROUNDS_PER_SECOND * max(1, workers))
+
+
+def fit_score_model(cumulative_stats, teams, fixtures, results):
+    """Poisson goal model: league scoring rate, home edge from recorded results, per-team attack/defence"""
+    played = [cumulative_stats.get(t, {}) for t in teams]
+    total_p = sum(s.get('P', 0) for s in played)
+    total_gf = sum(s.get('GF', 0) for s in played)
+    mu = total_gf / total_p if total_p else DEFAULT_GOALS_PER_TEAM
+    mu = max(mu, 0.1)
+
+    home_goals = away_goals = 0
+    for i, fix in enumerate(fixtures):
+        res = results.get(f"{fix[0]}v{fix[1]}_{i}")
+        if res:
+            home_goals += res[0]
+            away_goals += res[1]
+    home_edge = 1.0
+    if home_goals and away_goals:
+        home_edge = float(np.clip(np.sqrt(home_goals / away_goals), 0.8, 1.25))
+
+    p = np.array([s.get('P', 0) for s in played], dtype=float)
+    gf = np.array([s.get('GF', 0) for s in played], dtype=float)
+    ga = np.array([s.get('GA', 0) for s in played], dtype=float)
+    return {
+        'mu_home': mu * home_edge,
+        'mu_away': mu / home_edge,
+        'attack': (gf + PRIOR_MATCHES * mu) / ((p + PRIOR_MATCHES) * mu),
+        'defence': (ga + PRIOR_MATCHES * mu) / ((p + PRIOR_MATCHES) * mu),
+    }
+
+
+# Pts, GD and GF folded into one integer that sorts the same way as the (Pts, GD, GF) tuple,
+# so a match result is a single add per side. Valid while |GD| < 8192 and GF < 16384.
+PTS_UNIT = 1 << 28
+GD_UNIT = 1 << 14
+TIEBREAK_BITS = 13
+
+
+def _score(pts, gd, gf):
+    return pts * PTS_UNIT + gd * GD_UNIT + gf
+
+
+def _rank_keys(score, ids):
+    """One int64 per alive team that sorts like (Pts, GD, GF, earlier in active_teams)"""
+    n = score.shape[1]
+    return (np.take_along_axis(score, ids, axis=1) << TIEBREAK_BITS) + (n - 1 - ids)
+
+
+def _points(score):
+    # GD and GF together stay within half a PTS_UNIT either way, so rounding recovers Pts
+    return (score + PTS_UNIT // 2) // PTS_UNIT
+
+
+def _pair_rates(model):
+    """Poisson means for every (home, away) pairing: home goals in the first n*n slots, away goals after"""
+    attack, defence = model['attack'], model['defence']
+    return np.concatenate([(model['mu_home'] * attack[:, None] * defence[None, :]).ravel(),
+                           (model['mu_away'] * defence[:, None] * attack[None, :]).ravel()])
+
+
+def _play(rng, rates, home, away, score):
+    """Simulate matches given as (sims × k) home/away team indices and credit the table"""
+    n = score.shape[1]
+    pair = home * n + away
+    # Both sides of every match of the round in a single draw
+    hg, ag = rng.poisson(rates[np.stack((pair, pair + n * n))])
+    draw = hg == ag
+    h_val = _score(3 * (hg > ag) + draw, hg - ag, hg)
+    a_val = _score(3 * (ag > hg) + draw, ag - hg, ag)
+    # Unbuffered add on flat indices, so a team listed twice in a row is credited twice
+    base = np.arange(home.shape[0])[:, None] * n
+    flat = score.reshape(-1)
+    np.add.at(flat, (base + home).ravel(), h_val.ravel())
+    np.add.at(flat, (base + away).ravel(), a_val.ravel())
+    return hg, ag
+
+
+def _standoff_loser(rng, score, ids, keys, tie):
+    """Who handle_battle_royale_elimination knocks out when the deciding legs are in.
+
+    It reads the legs between the table's current 2nd and 3rd: if they are the pair that
+    was drawn, aggregate goals decide and a level tie goes to the shoot-out (every
+    sudden-death result carries penalties); if the table has reshuffled, it finds no
+    legs and 3rd goes out only when 2nd is ahead on points.
+    """
+    rows = np.arange(ids.shape[0])
+    placed = np.take_along_axis(ids, np.argsort(-keys, axis=1)[:, 1:3], axis=1)
+    second, third = placed[:, 0], placed[:, 1]
+    loser = np.where(_points(score[rows, second]) > _points(score[rows, third]), third, second)
+    if tie is not None:
+        sides, goals = tie
+        shootout = rng.random(len(rows)) < 0.5
+        first_out = (goals[0] < goals[1]) | ((goals[0] == goals[1]) & shootout)
+        drawn = (second == sides[:, 0]) & (third == sides[:, 1])
+        loser = np.where(drawn, np.where(first_out, sides[:, 0], sides[:, 1]), loser)
+    return loser
+
+
+def _simulate_chunk(args):
+    (n_sims, seed, model, init, pending, current_tie, schedule) = args
+    rng = np.random.default_rng(seed)
+    rates = _pair_rates(model)
+    n = len(init['pts'])
+    start = _score(np.asarray(init['pts'], dtype=np.int64), np.asarray(init['gd'], dtype=np.int64),
+                   np.asarray(init['gf'], dtype=np.int64))
+    score = np.tile(start, (n_sims, 1))
+    # Indices of the teams still alive in each simulation; every sim loses the same number per round
+    ids = np.tile(np.arange(n, dtype=np.int64), (n_sims, 1))
+    rows = np.arange(n_sims)[:, None]
+    eliminated = np.zeros((len(schedule), n), dtype=np.int64)
+    champion = np.zeros(n, dtype=np.int64)
+
+    for r, (m, play, cut) in enumerate(schedule):
+        tie = None
+        if r == 0:
+            # The round in progress: only its unplayed fixtures are left to simulate
+            if pending:
+                home = np.tile(np.array([h for h, _ in pending]), (n_sims, 1))
+                away = np.tile(np.array([a for _, a in pending]), (n_sims, 1))
+                hg, ag = _play(rng, rates, home, away, score)
+            if current_tie is not None:
+                goals = [np.full(n_sims, current_tie['goals'][0]), np.full(n_sims, current_tie['goals'][1])]
+                for j, (h, a) in enumerate(pending):
+                    first = h == current_tie['teams'][0]
+                    goals[0] += hg[:, j] if first else ag[:, j]
+                    goals[1] += ag[:, j] if first else hg[:, j]
+                tie = (np.tile(np.array(current_tie['teams']), (n_sims, 1)), goals)
+        elif play == "purge":
+            # Every team plays twice - a random cycle, same shape as the balanced generator
+            order = rng.permuted(ids, axis=1)
+            _play(rng, rates, order, np.roll(order, -1, axis=1), score)
+        elif play == "squeeze":
+            # Home & away round-robin
+            order = rng.permuted(ids, axis=1)
+            i, j = np.array([(i, j) for i in range(m) for j in range(m) if i != j]).T
+            _play(rng, rates, order[:, i], order[:, j], score)
+        elif play == "legs":
+            # Leader has the bye; 2nd hosts 3rd, then 3rd hosts 2nd
+            sides = np.take_along_axis(ids, np.argsort(-_rank_keys(score, ids), axis=1)[:, 1:3], axis=1)
+            hg, ag = _play(rng, rates, sides, sides[:, ::-1], score)
+            tie = (sides, [hg[:, 0] + ag[:, 1], ag[:, 0] + hg[:, 1]])
+        elif play == "final":
+            order = rng.permuted(ids, axis=1)
+            _play(rng, rates, order[:, :1], order[:, 1:], score)
+
+        if cut is None:
+            continue
+        keys = _rank_keys(score, ids)
+        if cut == "purge" or cut == "squeeze":
+            count = 2 if cut == "purge" else 1
+            out_pos = np.argpartition(keys, count - 1, axis=1)[:, :count]
+        elif cut == "standoff":
+            loser = _standoff_loser(rng, score, ids, keys, tie)
+            out_pos = np.argmax(ids == loser[:, None], axis=1)[:, None]
+        else:
+            # Grand Final: highest on the table after the last match takes the crown
+            out_pos = np.argmin(keys, axis=1)[:, None]
+            champion += np.bincount(ids[rows[:, 0], 1 - out_pos[:, 0]], minlength=n)
+
+        out = np.take_along_axis(ids, out_pos, axis=1)
+        eliminated[r] += np.bincount(out.ravel(), minlength=n)
+        keep = np.ones(ids.shape, dtype=bool)
+        keep[rows, out_pos] = False
+        ids = ids[keep].reshape(n_sims, -1)
+
+    if not schedule:
+        champion += n_sims * np.bincount(ids[0], minlength=n)
+    return eliminated, champion
+
+
+def simulate_survival_odds(cumulative_stats, active_teams, fixtures, results,
+                           n_sims=10000, workers=1, seed=None, battle_phase=None, sudden_death_round=0):
+    """Elimination-per-round and championship probabilities for every active team.
+
+    Starts from the round in progress: its unplayed `fixtures` are simulated, then
+    the rounds follow handle_battle_royale_elimination one for one (see
+    remaining_schedule), so row r of 'eliminated' is round_number + r. Rounds with
+    no cut have an all-zero row. `battle_phase` and `sudden_death_round` place the
+    round in progress; without them it is taken to be the phase for the team count.
+    `workers > 1` spreads chunks of simulations over a process pool.
+    """
+    teams = list(active_teams)
+    index = {t: i for i, t in enumerate(teams)}
+    schedule = remaining_schedule(len(teams), battle_phase, sudden_death_round)
+    model = fit_score_model(cumulative_stats, teams, fixtures, results)
+    init = {
+        'pts': [cumulative_stats.get(t, {}).get('Pts', 0) for t in teams],
+        'gd': [cumulative_stats.get(t, {}).get('GD', 0) for t in teams],
+        'gf': [cumulative_stats.get(t, {}).get('GF', 0) for t in teams],
+    }
+
+    pending = []
+    tie_goals = {}
+    for i, fix in enumerate(fixtures):
+        h, a = fix[0], fix[1]
+        if h not in index or a not in index:
+            continue
+        res = results.get(f"{h}v{a}_{i}")
+        if res:
+            tie_goals[h] = tie_goals.get(h, 0) + res[0]
+            tie_goals[a] = tie_goals.get(a, 0) + res[1]
+        else:
+            pending.append((index[h], index[a]))
+
+    # Standoff legs in progress: the first leg's home side was 2nd when they were drawn
+    current_tie = None
+    if schedule and schedule[0][1] == "legs" and fixtures and fixtures[0][0] in index and fixtures[0][1] in index:
+        first, second = fixtures[0][0], fixtures[0][1]
+        current_tie = {'teams': (index[first], index[second]),
+                       'goals': (tie_goals.get(first, 0), tie_goals.get(second, 0))}
+
+    chunk = max(1, MAX_CELLS_PER_CHUNK // max(1, len(teams)))
+    if workers > 1:
+        chunk = min(chunk, -(-n_sims // workers))
+    sizes = [chunk] * (n_sims // chunk) + ([n_sims % chunk] if n_sims % chunk else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(size, s, model, init, pending, current_tie, schedule) for size, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            outputs = list(pool.map(_simulate_chunk, jobs))
+    else:
+        outputs = [_simulate_chunk(job) for job in jobs]
+
+    eliminated = sum(o[0] for o in outputs)
+    champion = sum(o[1] for o in outputs)
+    return {
+        'teams': teams,
+        'rounds': [phase_for_count(m) for m, _, _ in schedule],
+        'eliminated': eliminated / n_sims,
+        'champion': champion / n_sims,
+        'n_sims': n_sims,
+    }
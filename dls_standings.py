@@ -0,0 +1,288 @@
+import copy
+import math
+import zlib
+from bisect import bisect_left, insort
+
+STAT_KEYS = ('P', 'W', 'D', 'L', 'GF', 'GA', 'GD', 'Pts')
+
+
+def empty_stats():
+    return {k: 0 for k in STAT_KEYS}
+
+
+def apply_match_to_stats(stats, home, away, home_goals, away_goals, sign=1):
+    """Add (or with sign=-1, remove) one match to a team-stats dict in place"""
+    for team in (home, away):
+        if team not in stats:
+            stats[team] = empty_stats()
+    h, a = stats[home], stats[away]
+
+    h['P'] += sign
+    a['P'] += sign
+    h['GF'] += sign * home_goals
+    h['GA'] += sign * away_goals
+    h['GD'] += sign * (home_goals - away_goals)
+    a['GF'] += sign * away_goals
+    a['GA'] += sign * home_goals
+    a['GD'] += sign * (away_goals - home_goals)
+
+    if home_goals > away_goals:
+        h['W'] += sign
+        h['Pts'] += sign * 3
+        a['L'] += sign
+    elif away_goals > home_goals:
+        a['W'] += sign
+        a['Pts'] += sign * 3
+        h['L'] += sign
+    else:
+        h['D'] += sign
+        h['Pts'] += sign
+        a['D'] += sign
+        a['Pts'] += sign
+
+
+# --- 📜 RESULT LEDGER ---
+# Every recorded result (across all rounds) is appended to a persisted log; cumulative_stats
+# is the running total of that log. Each team also carries a chained CRC of the events that
+# touched it, so a checkpoint plus the events after it is enough to verify the whole table.
+
+def result_event(seq, round_number, index, home, away, home_goals, away_goals):
+    return {'seq': seq, 'kind': 'result', 'round': round_number, 'index': index,
+            'home': home, 'away': away, 'hg': home_goals, 'ag': away_goals}
+
+
+def void_event(seq, round_number, index, home, away, home_goals, away_goals):
+    """Takes back a recorded result (a corrected score logs this, then the new result)"""
+    return dict(result_event(seq, round_number, index, home, away, home_goals, away_goals), kind='void')
+
+
+def opening_event(seq, team, stats):
+    """Carry-over balance for a team whose stats predate the log"""
+    return {'seq': seq, 'kind': 'opening', 'team': team, 'stats': {k: stats.get(k, 0) for k in STAT_KEYS}}
+
+
+def event_teams(event):
+    return (event['team'],) if event['kind'] == 'opening' else (event['home'], event['away'])
+
+
+def event_checksum(event, previous=0):
+    if event['kind'] == 'opening':
+        body = f"opening|{event['team']}|" + ",".join(str(event['stats'][k]) for k in STAT_KEYS)
+    else:
+        # seq is left out: merging concurrent saves renumbers events without changing what happened to a team
+        body = f"{event['round']}|{event['index']}|{event['home']}|{event['away']}|{event['hg']}|{event['ag']}"
+        if event['kind'] == 'void':
+            body = "void|" + body
+    return zlib.crc32(body.encode("utf-8"), previous)
+
+
+def apply_event(stats, checksums, event):
+    """Fold one log event into a stats dict and the per-team checksums, in place"""
+    if event['kind'] == 'opening':
+        row = stats.setdefault(event['team'], empty_stats())
+        for k in STAT_KEYS:
+            row[k] += event['stats'].get(k, 0)
+    else:
+        sign = -1 if event['kind'] == 'void' else 1
+        apply_match_to_stats(stats, event['home'], event['away'], event['hg'], event['ag'], sign)
+    for team in event_teams(event):
+        checksums[team] = event_checksum(event, checksums.get(team, 0))
+
+
+# --- 🤝 HEAD-TO-HEAD ---
+
+class HeadToHead:
+    """Pairwise results matrix: team → opponent → [points, goals for, goals against].
+
+    Built once from the result log, then kept in step match by match, so the
+    mini-league of a group of tied teams only walks the matches those teams
+    played (O(group × matches each)), never the whole results list.
+    """
+
+    def __init__(self, events=()):
+        self.pairs = {}
+        for event in events:
+            if event['kind'] != 'opening':
+                self.add(event['home'], event['away'], event['hg'], event['ag'],
+                         -1 if event['kind'] == 'void' else 1)
+
+    def _add(self, team, opponent, points, goals_for, goals_against):
+        row = self.pairs.setdefault(team, {}).setdefault(opponent, [0, 0, 0])
+        row[0] += points
+        row[1] += goals_for
+        row[2] += goals_against
+
+    def add(self, home, away, home_goals, away_goals, sign=1):
+        """Count one match (sign=-1 takes it back off)"""
+        home_pts, away_pts = (3, 0) if home_goals > away_goals else (0, 3) if away_goals > home_goals else (1, 1)
+        self._add(home, away, sign * home_pts, sign * home_goals, sign * away_goals)
+        self._add(away, home, sign * away_pts, sign * away_goals, sign * home_goals)
+
+    def copy(self):
+        other = HeadToHead()
+        other.pairs = {team: {opp: row[:] for opp, row in opponents.items()} for team, opponents in self.pairs.items()}
+        return other
+
+    def mini_league(self, group):
+        """{team: (points, goal difference, goals for)} counting only matches between teams of the group"""
+        members = set(group)
+        table = {}
+        for team in group:
+            opponents = self.pairs.get(team, {})
+            pts = gf = ga = 0
+            # Walk whichever is smaller: the team's opponents or the group
+            if len(opponents) <= len(members):
+                rows = [row for opp, row in opponents.items() if opp in members]
+            else:
+                rows = [opponents[opp] for opp in members if opp in opponents]
+            for row in rows:
+                pts += row[0]
+                gf += row[1]
+                ga += row[2]
+            table[team] = (pts, gf - ga, gf)
+        return table
+
+    def order(self, group):
+        """Tied teams best first on head-to-head points → GD → GF; teams still level keep their order"""
+        table = self.mini_league(group)
+        return sorted(group, key=lambda t: (-table[t][0], -table[t][1], -table[t][2]))
+
+
+class Standings:
+    """Table of the active teams kept permanently sorted by Pts → GD → GF → head-to-head.
+
+    Orders are held as a sorted list of keys searched with bisect, so rank
+    lookups are O(log n) and a recorded match only repositions the two teams
+    involved. Teams level on Pts, GD and GF are put in order by their
+    mini-league (see HeadToHead) only when a lookup lands in their group;
+    after that, ties keep the order teams were added in (same as a stable
+    sort over active_teams). `stats` is the live cumulative_stats dict,
+    shared by reference; `events` is the result log the pairwise matrix is
+    built from.
+    """
+
+    def __init__(self, stats, teams, events=()):
+        self.stats = stats
+        self.h2h = HeadToHead(events)
+        self._keys = []
+        self._key_of = {}
+        self._team_of = {}
+        self._next_seq = 0
+        for team in teams:
+            if team not in stats:
+                stats[team] = empty_stats()
+            self._key_of[team] = self._make_key(team)
+        self._keys = sorted(self._key_of.values())
+
+    def _make_key(self, team):
+        s = self.stats[team]
+        seq = self._next_seq
+        self._next_seq += 1
+        self._team_of[seq] = team
+        return (-s.get('Pts', 0), -s.get('GD', 0), -s.get('GF', 0), seq)
+
+    def _rekey(self, team):
+        """Move one team to its new position after its stats changed"""
+        old = self._key_of[team]
+        del self._keys[bisect_left(self._keys, old)]
+        s = self.stats[team]
+        new = (-s.get('Pts', 0), -s.get('GD', 0), -s.get('GF', 0), old[3])
+        self._key_of[team] = new
+        insort(self._keys, new)
+
+    def copy(self, stats):
+        """Independent copy over `stats`, an equal copy of this table's stats dict (cheaper than a rebuild)"""
+        other = copy.copy(self)
+        other.stats = stats
+        other.h2h = self.h2h.copy()
+        other._keys = self._keys[:]
+        other._key_of = dict(self._key_of)
+        other._team_of = dict(self._team_of)
+        return other
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, team):
+        return team in self._key_of
+
+    def add_team(self, team):
+        if team in self._key_of:
+            return
+        if team not in self.stats:
+            self.stats[team] = empty_stats()
+        key = self._make_key(team)
+        self._key_of[team] = key
+        insort(self._keys, key)
+
+    def remove_team(self, team):
+        key = self._key_of.pop(team, None)
+        if key is None:
+            return
+        del self._keys[bisect_left(self._keys, key)]
+        del self._team_of[key[3]]
+
+    def apply_result(self, home, away, home_goals, away_goals, sign=1):
+        """Record one match in cumulative_stats and the pairwise matrix, and reposition both teams"""
+        apply_match_to_stats(self.stats, home, away, home_goals, away_goals, sign)
+        self.h2h.add(home, away, home_goals, away_goals, sign)
+        for team in (home, away):
+            if team in self._key_of:
+                self._rekey(team)
+
+    def refresh_team(self, team):
+        """Re-sort one team whose stats dict was edited from outside"""
+        if team in self._key_of:
+            self._rekey(team)
+
+    def _tied(self, pos):
+        """[start, end) of the table positions level with `pos` on Pts, GD and GF"""
+        level = self._keys[pos][:3]
+        return bisect_left(self._keys, level), bisect_left(self._keys, level + (math.inf,))
+
+    def _teams_between(self, lo, hi):
+        """Teams at positions lo..hi-1, with head-to-head applied to every tied group the range touches"""
+        teams = []
+        pos = lo
+        while pos < hi:
+            start, end = self._tied(pos)
+            group = [self._team_of[k[3]] for k in self._keys[start:end]]
+            if len(group) > 1:
+                group = self.h2h.order(group)
+            teams.extend(group[pos - start:min(hi, end) - start])
+            pos = end
+        return teams
+
+    def rank(self, team):
+        """1-based table position"""
+        pos = bisect_left(self._keys, self._key_of[team])
+        start, end = self._tied(pos)
+        if end - start == 1:
+            return pos + 1
+        return start + self._teams_between(start, end).index(team) + 1
+
+    def team_at(self, rank):
+        return self._teams_between(rank - 1, rank)[0]
+
+    def top(self, n):
+        return self._teams_between(0, min(n, len(self._keys)))
+
+    def bottom(self, n):
+        """Last n teams in table order (the drop zone when eliminating n)"""
+        if n <= 0:
+            return []
+        return self._teams_between(max(0, len(self._keys) - n), len(self._keys))
+
+    def in_drop_zone(self, team, count):
+        return team in self._key_of and self.rank(team) > len(self._keys) - count
+
+    def row(self, team):
+        s = self.stats[team]
+        row = {'Team': team}
+        for k in STAT_KEYS:
+            row[k] = s.get(k, 0)
+        return row
+
+    def rows(self):
+        """Full table as a list of dicts, already in rank order"""
+        return [self.row(team) for team in self._teams_between(0, len(self._keys))]
@@ -0,0 +1,998 @@
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+# --- 💾 PERSISTED STATE ---
+# Every key that survives a restart, with the value a fresh tournament starts from.
+STATE_DEFAULTS = {
+    'teams': [], 'format': 'League', 'current_round': 'Group Stage',
+    'fixtures': [], 'results': {}, 'match_meta': {},
+    'started': False, 'groups': {}, 'champion': None, 'active_teams': [],
+    'team_badges': {}, 'news': [],
+    'legacy_stats': {}, 'team_history': {},
+    'eliminated_teams': [], 'round_number': 1, 'survival_history': [],
+    'battle_phase': 'Phase 1: The Purge',
+    'bye_team': None,
+    'cumulative_stats': {},
+    'cumulative_player_stats': {},
+    'player_aliases': {},
+    'sudden_death_round': 0,
+    'phase1_match_count': 2,
+    'rng_seed': None,
+    'result_log': [],
+    'team_checksums': {},
+    'stats_checkpoint': None,
+}
+
+PERSISTED_KEYS = list(STATE_DEFAULTS.keys())
+
+JOURNAL_SEQ_KEY = "_journal_seq"
+RETAINED_RECORDS = 100   # journal records kept after a compaction, so slightly stale writers can still merge
+
+
+class StorageError(Exception):
+    """Raised when the stored tournament exists but cannot be read back"""
+
+
+class StaleStateError(StorageError):
+    """Another writer changed the store since the version this save was based on.
+
+    `records` lists their journal records after that version (oldest first) for
+    the caller to merge, or is None when they can't be recovered - the store was
+    rewritten as a whole or reset in between.
+    """
+
+    def __init__(self, records):
+        super().__init__("The stored tournament changed since it was loaded")
+        self.records = records
+
+
+def default_state():
+    """Fresh copy of the persisted defaults (lists/dicts are never shared)"""
+    return json.loads(json.dumps(STATE_DEFAULTS))
+
+
+def normalize_state(data):
+    """Coerce a raw snapshot/backup dict into a complete, well-typed state dict"""
+    state = default_state()
+    for k in PERSISTED_KEYS:
+        if k in data:
+            state[k] = data[k]
+
+    state['fixtures'] = [tuple(f) for f in state['fixtures']] if isinstance(state['fixtures'], list) else []
+    if not isinstance(state['result_log'], list):
+        state['result_log'] = []
+    for k in ('results', 'match_meta', 'groups', 'cumulative_player_stats', 'player_aliases', 'team_checksums'):
+        if not isinstance(state[k], dict):
+            state[k] = {}
+    # Player ids are integers; JSON object keys (and the SQLite key column) bring them back as strings
+    state['cumulative_player_stats'] = {
+        int(k) if isinstance(k, str) and k.isdigit() else k: v for k, v in state['cumulative_player_stats'].items()
+    }
+    return state
+
+
+# --- ✍️ JOURNAL OPERATIONS ---
+# A journal record is a list of small operations addressed by a key path:
+#   ["set", ["results", "AvB_0"], [2, 1]]
+#   ["insert", ["news"], 0, "💀 PURGED: ..."]
+#   ["del", ["cumulative_stats", "Old FC"]]   (on a list: removes that index)
+
+def _resolve_parent(state, path):
+    target = state
+    for key in path[:-1]:
+        if isinstance(target, list):
+            key = int(key)
+        elif key not in target:
+            target[key] = {}
+        target = target[key]
+    return target
+
+
+def apply_ops(state, ops):
+    """Apply journal operations to a state dict in place"""
+    for op in ops:
+        kind, path = op[0], op[1]
+        if kind == "set":
+            parent = _resolve_parent(state, path)
+            parent[path[-1]] = op[2]
+        elif kind == "insert":
+            parent = _resolve_parent(state, path)
+            parent.setdefault(path[-1], []).insert(op[2], op[3])
+        elif kind == "del":
+            parent = _resolve_parent(state, path)
+            if isinstance(parent, dict):
+                parent.pop(path[-1], None)
+            elif isinstance(parent, list):
+                del parent[int(path[-1])]
+        else:
+            raise StorageError(f"Unknown journal operation: {kind}")
+
+
+def fork_state(state, ops):
+    """apply_ops() onto a copy of `state` that shares every container the ops don't reach.
+
+    `state` is left as it was. Only the containers on an op's path are copied
+    (shallowly) and the values written are deep copies, so the result shares
+    nothing with wherever the ops' values came from.
+    """
+    forked = dict(state)
+    owned = {id(forked)}
+
+    def own(parent, key):
+        child = parent[key]
+        if id(child) not in owned:
+            child = parent[key] = copy.copy(child)
+            owned.add(id(child))
+        return child
+
+    for op in ops:
+        kind, path = op[0], op[1]
+        parent = forked
+        for key in path[:-1]:
+            parent = own(parent, int(key) if isinstance(parent, list) else key)
+        key = int(path[-1]) if isinstance(parent, list) else path[-1]
+        if kind == "set":
+            parent[key] = copy.deepcopy(op[2])
+            owned.add(id(parent[key]))
+        elif kind == "insert":
+            if key not in parent:
+                parent[key] = []
+            own(parent, key).insert(op[2], copy.deepcopy(op[3]))
+        elif kind == "del":
+            if isinstance(parent, dict):
+                parent.pop(key, None)
+            elif isinstance(parent, list):
+                del parent[key]
+    return forked
+
+
+def read_path(state, path):
+    """Current value at a key path (used to turn dirty paths into 'set' ops)"""
+    target = state
+    for key in path:
+        target = target[int(key)] if isinstance(target, list) else target[key]
+    return target
+
+
+# --- ↩️ UNDO HISTORY ---
+
+class UndoHistory:
+    """Inverse journal records of the last `limit` saves, for undo and round rollback.
+
+    `shadow` is a private copy of the committed state, moved forward by each save's
+    ops (values copied) so it never shares anything with the live state. The value a
+    save overwrote is read from it just before, which makes both recording a save
+    and undoing it O(size of the change); unchanged data is never copied again.
+    """
+
+    def __init__(self, state, limit):
+        self.shadow = copy.deepcopy(state)
+        self.records = deque(maxlen=limit)
+
+    def __len__(self):
+        return len(self.records)
+
+    def advance(self, ops, label=None, **info):
+        """Apply one save's ops to the shadow; with a label, remember how to reverse them"""
+        inverse = []
+        for op in ops:
+            kind, path = op[0], list(op[1])
+            if label is not None:
+                if kind == "insert":
+                    inverse.append(["del", path + [op[2]]])
+                else:
+                    try:
+                        inverse.append(["set", path, read_path(self.shadow, path)])
+                    except (KeyError, IndexError, TypeError):
+                        inverse.append(["del", path])
+            apply_ops(self.shadow, [copy.deepcopy(op)])
+        if label is not None and inverse:
+            inverse.reverse()
+            self.records.append(dict(info, label=label, ops=inverse,
+                                     time=datetime.now().isoformat(timespec="seconds")))
+
+    def advance_to(self, state, label=None, **info):
+        """advance() for a save that rewrote everything: diff the top-level keys"""
+        ops = [["set", [k], state[k]] for k in PERSISTED_KEYS if self.shadow.get(k) != state[k]]
+        self.advance(ops, label, **info)
+
+    def clear(self):
+        self.records.clear()
+
+
+def _atomic_write_json(path, data):
+    """Write JSON next to the target and rename over it, so readers never see a half-written file.
+    Returns the number of bytes written."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive advisory lock on `path`, shared by every process using the store"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class JsonStore:
+    """JSON snapshot plus an append-only journal of small mutations.
+
+    `save()` rewrites the snapshot (a compaction); `append()` writes one line
+    per mutation and only compacts every `compact_every` records.
+
+    The journal sequence number is the store's version. Every read and write
+    happens under a lock file, and writes that pass `base` (the version the
+    caller last saw) fail with StaleStateError instead of overwriting changes
+    made by another process in the meantime.
+    """
+    backend = "json"
+
+    def __init__(self, path, journal=True, compact_every=500):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.lock_path = f"{path}.lock"
+        self.journal = journal
+        self.compact_every = compact_every
+        self._seq = 0               # newest version on disk, as far as this process has seen
+        self._snapshot_seq = 0
+        self._snapshot_stamp = None
+        self._offset = 0            # journal bytes already accounted for in _seq
+        self._records_since_compact = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, _file_lock(self.lock_path):
+            yield
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.journal_path)
+
+    def load(self):
+        """Snapshot + journal replay. Returns None when nothing is stored yet."""
+        return self.load_versioned()[0]
+
+    def load_versioned(self):
+        """(state or None, version) read under the store lock"""
+        with self._locked():
+            self._seq = self._snapshot_seq = self._offset = self._records_since_compact = 0
+            self._snapshot_stamp = None
+            if not self.exists():
+                return None, 0
+
+            state = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r") as f:
+                        state = json.load(f)
+                except (OSError, ValueError) as e:
+                    raise StorageError(f"Could not read {self.path}: {e}") from e
+                if not isinstance(state, dict):
+                    raise StorageError(f"{self.path} does not contain a tournament")
+
+            snapshot_seq = state.pop(JOURNAL_SEQ_KEY, 0)
+            self._seq = self._snapshot_seq = snapshot_seq
+            self._snapshot_stamp = _file_stamp(self.path)
+
+            if os.path.exists(self.journal_path):
+                good_bytes = 0
+                torn = False
+                with open(self.journal_path, "rb") as f:
+                    for line in f:
+                        try:
+                            if not line.endswith(b"\n"):
+                                raise ValueError("unterminated record")
+                            record = json.loads(line)
+                        except ValueError:
+                            # Torn final line from a crash mid-append: everything before it is intact
+                            torn = True
+                            break
+                        good_bytes += len(line)
+                        if record.get("seq", 0) <= snapshot_seq:
+                            continue
+                        apply_ops(state, record.get("ops") or [])
+                        self._seq = record["seq"]
+                        self._records_since_compact += 1
+                if torn:
+                    # Drop the partial record so later appends don't get glued onto it
+                    with open(self.journal_path, "r+b") as f:
+                        f.truncate(good_bytes)
+                self._offset = good_bytes
+
+            return state, self._seq
+
+    def _refresh(self):
+        """Catch _seq up with writes made by other processes (cheap when there were none)"""
+        stamp = _file_stamp(self.path)
+        if stamp != self._snapshot_stamp:
+            # Someone compacted, rewrote or reset the store: re-read the version and rescan the journal
+            self._snapshot_stamp = stamp
+            self._snapshot_seq = 0
+            if stamp is not None:
+                try:
+                    with open(self.path, "r") as f:
+                        self._snapshot_seq = json.load(f).get(JOURNAL_SEQ_KEY, 0)
+                except (OSError, ValueError) as e:
+                    raise StorageError(f"Could not read {self.path}: {e}") from e
+            self._seq = self._snapshot_seq
+            self._offset = 0
+
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if size < self._offset:
+            self._seq, self._offset = self._snapshot_seq, 0
+        if size > self._offset:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._offset += len(line)
+                    self._seq = max(self._seq, json.loads(line).get("seq", 0))
+
+    def _journal_records(self):
+        records = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    records.append(json.loads(line))
+        return records
+
+    def _records_since(self, base):
+        """Journal records newer than `base`, or None if some of them are gone"""
+        if base > self._seq:
+            return None
+        records = [r for r in self._journal_records() if r.get("seq", 0) > base]
+        if any(r.get("ops") is None for r in records):
+            return None     # a whole-store rewrite
+        if base < self._snapshot_seq and (not records or records[0]["seq"] != base + 1):
+            return None     # compacted past `base`
+        return records
+
+    def changes_since(self, base):
+        """(current version, records after `base` - None if they can't be recovered)"""
+        with self._locked():
+            self._refresh()
+            if self._seq == base:
+                return base, []
+            return self._seq, self._records_since(base)
+
+    def _check_base(self, base):
+        self._refresh()
+        if base is not None and base != self._seq:
+            raise StaleStateError(self._records_since(base))
+
+    def save(self, state, base=None, replace=True):
+        """Full snapshot write; truncates the journal afterwards. Returns the new version.
+
+        replace=False marks the write as a plain compaction of already-journaled
+        changes, which other writers can still merge across.
+        """
+        with self._locked():
+            self._check_base(base)
+            self._seq += 1
+            self._compact(state, marker={"seq": self._seq, "ops": None if replace else []})
+            return self._seq
+
+    def _compact(self, state, marker=None):
+        tail = self._journal_records()[-RETAINED_RECORDS:]
+        if marker is not None:
+            tail.append(marker)
+        data = dict(state)
+        data[JOURNAL_SEQ_KEY] = self._seq
+        self.bytes_written += _atomic_write_json(self.path, data)
+        # The snapshot now carries _journal_seq, so the records kept (or a crash before this rewrite) are skipped on load
+        with open(self.journal_path, "w") as f:
+            f.writelines(json.dumps(r) + "\n" for r in tail)
+        self._snapshot_seq = self._seq
+        self._snapshot_stamp = _file_stamp(self.path)
+        self._offset = os.path.getsize(self.journal_path)
+        self.bytes_written += self._offset
+        self._records_since_compact = 0
+
+    def append(self, ops, state, base=None):
+        """Append one journal record; `state` is only read if a compaction is due. Returns the new version."""
+        with self._locked():
+            self._check_base(base)
+            if not ops:
+                return self._seq
+            self._seq += 1
+            if not self.journal:
+                self._compact(state, marker={"seq": self._seq, "ops": ops})
+                return self._seq
+            record = {"seq": self._seq, "ts": datetime.now().isoformat(timespec="seconds"), "ops": ops}
+            line = (json.dumps(record) + "\n").encode("utf-8")
+            with open(self.journal_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._offset += len(line)
+            self.bytes_written += len(line)
+            self._records_since_compact += 1
+            if self._records_since_compact >= self.compact_every:
+                self._compact(state)
+            return self._seq
+
+    def quarantine(self):
+        """Move an unreadable snapshot aside so the next save can't overwrite it"""
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        moved = []
+        for p in (self.path, self.journal_path):
+            if os.path.exists(p):
+                target = f"{p}.corrupt-{stamp}"
+                os.replace(p, target)
+                moved.append(target)
+        return moved
+
+    def reset(self):
+        with self._locked():
+            for p in (self.path, self.journal_path):
+                if os.path.exists(p):
+                    os.remove(p)
+            self._seq = self._snapshot_seq = self._offset = 0
+            self._snapshot_stamp = None
+            self._records_since_compact = 0
+
+
+# --- 🗄️ SQLITE BACKEND ---
+# Dict-shaped state keys that get one row per entry, so one result is one upsert.
+# key -> (table, primary key column, value columns, value -> row, row -> value)
+def _result_to_row(res):
+    res = list(res) + [None, None]
+    return res[0], res[1], res[2], res[3]
+
+def _row_to_result(row):
+    return [row[0], row[1]] if row[2] is None else [row[0], row[1], row[2], row[3]]
+
+_META_FIELDS = ('h_s', 'a_s', 'h_a', 'a_a', 'h_r', 'a_r')
+_TEAM_FIELDS = ('P', 'W', 'D', 'L', 'GF', 'GA', 'GD', 'Pts')
+_PLAYER_FIELDS = ('Name', 'Team', 'G', 'A', 'R')
+
+ROW_TABLES = {
+    'results': ('results', 'match_id', ('home_goals', 'away_goals', 'home_pens', 'away_pens'),
+                _result_to_row, _row_to_result),
+    'match_meta': ('match_meta', 'match_id', _META_FIELDS,
+                   lambda m: tuple(m.get(k, '') for k in _META_FIELDS),
+                   lambda row: dict(zip(_META_FIELDS, row))),
+    'cumulative_stats': ('cumulative_stats', 'team', ('p', 'w', 'd', 'l', 'gf', 'ga', 'gd', 'pts'),
+                         lambda s: tuple(s.get(k, 0) for k in _TEAM_FIELDS),
+                         lambda row: dict(zip(_TEAM_FIELDS, row))),
+    'cumulative_player_stats': ('cumulative_player_stats', 'player_id', ('name', 'team', 'g', 'a', 'r'),
+                                lambda s: tuple(s.get(k, 0 if k in ('G', 'A', 'R') else '') for k in _PLAYER_FIELDS),
+                                lambda row: dict(zip(_PLAYER_FIELDS, row))),
+    'team_badges': ('team_badges', 'team', ('badge',), lambda b: (b,), lambda row: row[0]),
+    'team_checksums': ('team_checksums', 'team', ('checksum',), lambda c: (c,), lambda row: row[0]),
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS teams (position INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_teams_name ON teams (name);
+CREATE TABLE IF NOT EXISTS team_badges (team TEXT PRIMARY KEY, badge TEXT);
+CREATE TABLE IF NOT EXISTS fixtures (idx INTEGER PRIMARY KEY, home TEXT NOT NULL, away TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_fixtures_home ON fixtures (home);
+CREATE INDEX IF NOT EXISTS idx_fixtures_away ON fixtures (away);
+CREATE TABLE IF NOT EXISTS results (
+    match_id TEXT PRIMARY KEY, home_goals INTEGER NOT NULL, away_goals INTEGER NOT NULL,
+    home_pens INTEGER, away_pens INTEGER
+);
+CREATE TABLE IF NOT EXISTS match_meta (
+    match_id TEXT PRIMARY KEY, h_s TEXT, a_s TEXT, h_a TEXT, a_a TEXT, h_r TEXT, a_r TEXT
+);
+CREATE TABLE IF NOT EXISTS cumulative_stats (
+    team TEXT PRIMARY KEY, p INTEGER, w INTEGER, d INTEGER, l INTEGER,
+    gf INTEGER, ga INTEGER, gd INTEGER, pts INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_standings ON cumulative_stats (pts DESC, gd DESC, gf DESC);
+CREATE TABLE IF NOT EXISTS cumulative_player_stats (
+    player_id TEXT PRIMARY KEY, name TEXT, team TEXT, g INTEGER, a INTEGER, r INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_players_team ON cumulative_player_stats (team);
+CREATE INDEX IF NOT EXISTS idx_players_g ON cumulative_player_stats (g DESC);
+CREATE INDEX IF NOT EXISTS idx_players_a ON cumulative_player_stats (a DESC);
+CREATE INDEX IF NOT EXISTS idx_players_r ON cumulative_player_stats (r DESC);
+CREATE TABLE IF NOT EXISTS news (seq INTEGER PRIMARY KEY AUTOINCREMENT, message TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS result_log (seq INTEGER PRIMARY KEY, event TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS team_checksums (team TEXT PRIMARY KEY, checksum INTEGER);
+CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY, ops TEXT);
+"""
+
+# Everything without a dedicated table lives in `meta` as one JSON value per key
+# (result_log and team_checksums did too, before they got tables - see SqliteStore._upgrade)
+_MOVED_FROM_META = ('result_log', 'team_checksums')
+_PLAYER_STAT_COLUMNS = {'G': 'g', 'A': 'a', 'R': 'r'}
+
+
+class SqliteStore:
+    """Indexed SQLite storage with the same load/save/append interface as JsonStore.
+
+    Each write also adds a row to `changes` (the journal ops, NULL for a full
+    rewrite); its newest seq is the store's version, checked inside the write
+    transaction when a `base` is passed.
+    """
+    backend = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self.bytes_written = 0      # estimated: the database size for a rewrite, the values and change record for an append
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready or not os.path.exists(self.path):
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SQLITE_SCHEMA)
+            self._upgrade(conn)
+            self._schema_ready = True
+        return conn
+
+    def _upgrade(self, conn):
+        """Move keys that used to be whole JSON values in `meta` into their own tables"""
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for key in _MOVED_FROM_META:
+                row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self._write_key(conn, key, json.loads(row[0]))
+                    conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        return self.load_versioned()[0]
+
+    def load_versioned(self):
+        if not self.exists():
+            return None, 0
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        # One read transaction, so the version matches the rows read
+                        conn.execute("BEGIN")
+                        return self._read_all(conn), self._version(conn)
+                finally:
+                    conn.close()
+        except sqlite3.DatabaseError as e:
+            raise StorageError(f"Could not read {self.path}: {e}") from e
+
+    def _version(self, conn):
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def _records_since(self, conn, base, head):
+        rows = conn.execute("SELECT seq, ops FROM changes WHERE seq > ? ORDER BY seq", (base,)).fetchall()
+        if base < head and rows and rows[0][0] == base + 1 and all(r[1] is not None for r in rows):
+            return [{"seq": r[0], "ops": json.loads(r[1])} for r in rows]
+        return None
+
+    def _begin_write(self, conn, base):
+        """Take the write lock; StaleStateError if someone else wrote after `base`"""
+        conn.execute("BEGIN IMMEDIATE")
+        head = self._version(conn)
+        if base is not None and base != head:
+            raise StaleStateError(self._records_since(conn, base, head))
+        return head
+
+    def changes_since(self, base):
+        """(current version, records after `base` - None if they can't be recovered)"""
+        if not self.exists():
+            return 0, [] if base == 0 else None
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("BEGIN")
+                    head = self._version(conn)
+                    return head, [] if head == base else self._records_since(conn, base, head)
+            finally:
+                conn.close()
+
+    def _log_change(self, conn, head, ops):
+        record = None if ops is None else json.dumps(ops)
+        conn.execute("INSERT INTO changes (seq, ops) VALUES (?, ?)", (head + 1, record))
+        self.bytes_written += len(record or "")
+        conn.execute("DELETE FROM changes WHERE seq <= ?", (head + 1 - RETAINED_RECORDS,))
+        return head + 1
+
+    def _read_all(self, conn):
+        state = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+        for key in ('teams', 'fixtures', 'news', 'result_log') + tuple(ROW_TABLES):
+            state[key] = self._read_key(conn, key)
+        return state
+
+    def _read_key(self, conn, key):
+        if key == 'teams':
+            return [r[0] for r in conn.execute("SELECT name FROM teams ORDER BY position")]
+        if key == 'fixtures':
+            return [(r[0], r[1]) for r in conn.execute("SELECT home, away FROM fixtures ORDER BY idx")]
+        if key == 'news':
+            return [r[0] for r in conn.execute("SELECT message FROM news ORDER BY seq DESC")]
+        if key == 'result_log':
+            return [json.loads(r[0]) for r in conn.execute("SELECT event FROM result_log ORDER BY seq")]
+        if key in ROW_TABLES:
+            table, pk, cols, _, from_row = ROW_TABLES[key]
+            rows = conn.execute(f"SELECT {pk}, {', '.join(cols)} FROM {table}")
+            return {r[0]: from_row(r[1:]) for r in rows}
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else json.loads(json.dumps(STATE_DEFAULTS.get(key)))
+
+    def _write_key(self, conn, key, value):
+        if key == 'teams':
+            conn.execute("DELETE FROM teams")
+            conn.executemany("INSERT INTO teams (position, name) VALUES (?, ?)", list(enumerate(value)))
+        elif key == 'fixtures':
+            conn.execute("DELETE FROM fixtures")
+            conn.executemany("INSERT INTO fixtures (idx, home, away) VALUES (?, ?, ?)",
+                             [(i, f[0], f[1]) for i, f in enumerate(value)])
+        elif key == 'news':
+            conn.execute("DELETE FROM news")
+            conn.executemany("INSERT INTO news (message) VALUES (?)", [(m,) for m in reversed(value)])
+        elif key == 'result_log':
+            conn.execute("DELETE FROM result_log")
+            for event in value:
+                self._append_event(conn, event)
+        elif key in ROW_TABLES:
+            table = ROW_TABLES[key][0]
+            conn.execute(f"DELETE FROM {table}")
+            for sub, item in value.items():
+                self._upsert_row(conn, key, sub, item)
+        else:
+            encoded = json.dumps(value)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, encoded))
+            self.bytes_written += len(encoded)
+
+    def _append_event(self, conn, event):
+        encoded = json.dumps(event)
+        conn.execute("INSERT INTO result_log (seq, event) VALUES (?, ?)", (event['seq'], encoded))
+        self.bytes_written += len(encoded)
+
+    def _log_tail(self, conn):
+        """(number of events, newest seq) of the stored result log"""
+        return conn.execute("SELECT COUNT(*), MAX(seq) FROM result_log").fetchone()
+
+    def _upsert_row(self, conn, key, sub, item):
+        table, pk, cols, to_row, _ = ROW_TABLES[key]
+        placeholders = ", ".join("?" * (len(cols) + 1))
+        conn.execute(f"INSERT OR REPLACE INTO {table} ({pk}, {', '.join(cols)}) VALUES ({placeholders})",
+                     (sub,) + tuple(to_row(item)))
+
+    def _apply_op(self, conn, op):
+        kind, path = op[0], op[1]
+        key = path[0]
+        if kind == "set" and len(path) == 1:
+            self._write_key(conn, key, op[2])
+        elif kind == "set" and len(path) == 2 and key in ROW_TABLES:
+            self._upsert_row(conn, key, path[1], op[2])
+        elif kind == "del" and len(path) == 2 and key in ROW_TABLES:
+            table, pk = ROW_TABLES[key][0], ROW_TABLES[key][1]
+            conn.execute(f"DELETE FROM {table} WHERE {pk} = ?", (path[1],))
+        elif kind == "insert" and path == ["news"] and op[2] == 0:
+            conn.execute("INSERT INTO news (message) VALUES (?)", (op[3],))
+        elif kind == "insert" and path == ["result_log"] and self._appends(conn, op[2], op[3]):
+            self._append_event(conn, op[3])
+        elif kind == "del" and len(path) == 2 and key == "result_log" and self._is_newest(conn, path[1]):
+            conn.execute("DELETE FROM result_log WHERE seq = (SELECT MAX(seq) FROM result_log)")
+        else:
+            # Anything finer-grained on a meta value: read-modify-write just that key
+            scratch = {key: self._read_key(conn, key)}
+            apply_ops(scratch, [op])
+            self._write_key(conn, key, scratch[key])
+
+    def _appends(self, conn, index, event):
+        """Whether inserting `event` at `index` is a plain append (the only insert the engine makes)"""
+        count, newest = self._log_tail(conn)
+        return int(index) == count and (newest is None or event.get('seq', newest) > newest)
+
+    def _is_newest(self, conn, index):
+        count, _ = self._log_tail(conn)
+        return int(index) == count - 1
+
+    def save(self, state, base=None, replace=True):
+        """Rewrite every table in one transaction. Returns the new version."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    head = self._begin_write(conn, base)
+                    conn.execute("DELETE FROM meta")
+                    written = self.bytes_written
+                    for key in PERSISTED_KEYS:
+                        self._write_key(conn, key, state.get(key, STATE_DEFAULTS[key]))
+                    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+                    self.bytes_written = written + pages * conn.execute("PRAGMA page_size").fetchone()[0]
+                    return self._log_change(conn, head, None if replace else [])
+            finally:
+                conn.close()
+
+    def append(self, ops, state, base=None):
+        """Apply journal-style operations as row-level writes in a single transaction. Returns the new version."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    head = self._begin_write(conn, base)
+                    if not ops:
+                        return head
+                    for op in ops:
+                        self._apply_op(conn, op)
+                    return self._log_change(conn, head, ops)
+            finally:
+                conn.close()
+
+    def query_standings(self, teams=None):
+        """Standings rows sorted by Pts, GD, GF straight off the idx_standings index"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT team, p, w, d, l, gf, ga, gd, pts FROM cumulative_stats "
+                    "ORDER BY pts DESC, gd DESC, gf DESC").fetchall()
+            finally:
+                conn.close()
+        wanted = set(teams) if teams is not None else None
+        return [dict(zip(('Team',) + _TEAM_FIELDS, r)) for r in rows if wanted is None or r[0] in wanted]
+
+    def query_top_players(self, stat='G', limit=10):
+        """Top players for G/A/R using the per-stat index"""
+        col = _PLAYER_STAT_COLUMNS[stat]
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    f"SELECT name, team, g, a, r FROM cumulative_player_stats ORDER BY {col} DESC LIMIT ?",
+                    (limit,)).fetchall()
+            finally:
+                conn.close()
+        return [dict(zip(_PLAYER_FIELDS, r)) for r in rows]
+
+    def quarantine(self):
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        moved = []
+        for p in (self.path, f"{self.path}-wal", f"{self.path}-shm"):
+            if os.path.exists(p):
+                target = f"{p}.corrupt-{stamp}"
+                os.replace(p, target)
+                moved.append(target)
+        return moved
+
+    def reset(self):
+        with self._lock:
+            for p in (self.path, f"{self.path}-wal", f"{self.path}-shm"):
+                if os.path.exists(p):
+                    os.remove(p)
+            self._schema_ready = False
+
+
+# --- 📦 BACKUPS ---
+# A backup is gzip-compressed JSON lines: a header naming the format and schema version,
+# one [key, value] line per persisted key, and a trailer with the SHA-256 of every line
+# before it. Writing streams one key at a time; reading checks the schema first and the
+# checksum last, and hands back nothing unless the whole file was intact.
+
+BACKUP_FORMAT = "dls-ultra-backup"
+BACKUP_SCHEMA = 1
+BACKUP_SPOOL_BYTES = 8 * 1024 * 1024  # backups larger than this spill from memory to a temp file
+BACKUP_COMPRESSION = 6                # gzip level: nearly level 9's size at a fraction of the time
+GZIP_MAGIC = b"\x1f\x8b"
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+# Top-level type of every persisted key, checked before a backup replaces anything
+STATE_TYPES = {
+    'teams': list, 'format': str, 'current_round': str, 'fixtures': list, 'results': dict, 'match_meta': dict,
+    'started': bool, 'groups': dict, 'active_teams': list, 'team_badges': dict, 'news': list,
+    'legacy_stats': dict, 'team_history': dict, 'eliminated_teams': list, 'round_number': int,
+    'survival_history': list, 'battle_phase': str, 'cumulative_stats': dict, 'cumulative_player_stats': dict,
+    'player_aliases': dict, 'sudden_death_round': int, 'phase1_match_count': int, 'result_log': list,
+    'team_checksums': dict,
+}
+
+
+class BackupError(StorageError):
+    """A backup file is damaged, from a newer schema, or doesn't describe a tournament"""
+
+
+def write_backup(state, fileobj):
+    """Stream a state dict into `fileobj` as a compressed, checksummed backup"""
+    digest = hashlib.sha256()
+    keys = [k for k in PERSISTED_KEYS if k in state]
+    with gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=BACKUP_COMPRESSION, mtime=0) as gz:
+        def line(value):
+            data = _encoder.encode(value).encode("utf-8") + b"\n"
+            digest.update(data)
+            gz.write(data)
+
+        line({"format": BACKUP_FORMAT, "schema": BACKUP_SCHEMA,
+              "created": datetime.now().isoformat(timespec="seconds"), "keys": len(keys)})
+        for k in keys:
+            line([k, state[k]])
+        gz.write(_encoder.encode({"sha256": digest.hexdigest()}).encode("utf-8") + b"\n")
+    return fileobj
+
+
+def backup_file(state):
+    """Backup of a state dict as a rewound file object (memory, or disk once it is large)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=BACKUP_SPOOL_BYTES)
+    write_backup(state, spool)
+    spool.seek(0)
+    return spool
+
+
+def read_backup(fileobj):
+    """State dict from a backup file; BackupError unless it is complete and intact.
+
+    Plain JSON backups from before the compressed format are still accepted (they
+    carry no checksum, so only the state validation applies to them).
+    """
+    head = fileobj.read(2)
+    fileobj.seek(0)
+    if head != GZIP_MAGIC:
+        try:
+            data = json.load(fileobj)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise BackupError(f"Not a backup file: {e}") from e
+        if not isinstance(data, dict):
+            raise BackupError("Not a backup file: expected a JSON object")
+        return data
+
+    digest = hashlib.sha256()
+    state, header, trailer = {}, None, None
+    try:
+        with gzip.GzipFile(fileobj=fileobj, mode="rb") as gz:
+            for raw in gz:
+                if trailer is not None:
+                    raise BackupError("Unexpected data after the checksum")
+                record = json.loads(raw)
+                if header is None:
+                    header = record
+                    if not isinstance(header, dict) or header.get("format") != BACKUP_FORMAT:
+                        raise BackupError("Not a DLS Ultra backup")
+                    schema = header.get("schema")
+                    if not isinstance(schema, int) or schema > BACKUP_SCHEMA:
+                        raise BackupError(f"Backup schema {schema} is newer than this version "
+                                          f"supports ({BACKUP_SCHEMA})")
+                elif isinstance(record, dict):
+                    trailer = record
+                    continue
+                elif isinstance(record, list) and len(record) == 2 and isinstance(record[0], str):
+                    if record[0] in PERSISTED_KEYS:  # keys this version doesn't know are skipped
+                        state[record[0]] = record[1]
+                else:
+                    raise BackupError("Malformed backup line")
+                digest.update(raw)
+    except (OSError, EOFError, ValueError, UnicodeDecodeError, zlib.error) as e:
+        raise BackupError(f"Backup is damaged: {e}") from e
+
+    if header is None:
+        raise BackupError("Backup is empty")
+    if trailer is None:
+        raise BackupError("Backup is truncated (no checksum)")
+    if trailer.get("sha256") != digest.hexdigest():
+        raise BackupError("Backup checksum does not match its contents")
+    return state
+
+
+def validate_state(data):
+    """Problems that make a state dict unsafe to load, as readable messages (empty if fine)"""
+    problems = [f"'{k}' should be a {t.__name__}, not {type(data[k]).__name__}"
+                for k, t in STATE_TYPES.items()
+                if k in data and not (isinstance(data[k], t) and not (t is int and isinstance(data[k], bool)))]
+    if problems:
+        return problems
+    if not all(isinstance(t, str) for t in data.get('teams', [])):
+        problems.append("'teams' should only hold club names")
+    if not all(isinstance(f, (list, tuple)) and len(f) >= 2 for f in data.get('fixtures', [])):
+        problems.append("every fixture should be a (home, away) pair")
+    if not all(isinstance(r, list) and len(r) in (2, 4) and all(isinstance(g, int) for g in r)
+               for r in data.get('results', {}).values()):
+        problems.append("every result should be [home goals, away goals] plus optional penalties")
+    if not all(isinstance(s, dict) for s in data.get('cumulative_stats', {}).values()):
+        problems.append("'cumulative_stats' should map clubs to stat rows")
+    if not all(isinstance(p, dict) for p in data.get('cumulative_player_stats', {}).values()):
+        problems.append("'cumulative_player_stats' should map players to stat rows")
+    if not all(isinstance(e, dict) and isinstance(e.get('seq'), int) for e in data.get('result_log', [])):
+        problems.append("'result_log' events need a sequence number")
+    return problems
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, backend="json", journal=True, compact_every=500):
+    """One store per file per process, so every session shares the journal sequence"""
+    with _stores_lock:
+        if path not in _stores:
+            if backend == "sqlite":
+                _stores[path] = SqliteStore(path)
+            elif backend == "json":
+                _stores[path] = JsonStore(path, journal=journal, compact_every=compact_every)
+            else:
+                raise ValueError(f"Unknown storage backend: {backend}")
+        return _stores[path]
+
+
+def migrate_json_to_sqlite(json_path, sqlite_path):
+    """One-shot copy of a dls_ultra_db.json (plus its journal) or a backup (.json.gz or legacy .json) into SQLite"""
+    data = None
+    if os.path.exists(json_path):
+        with open(json_path, "rb") as f:
+            if f.read(2) == GZIP_MAGIC:
+                f.seek(0)
+                data = read_backup(f)
+    if data is None:
+        data = JsonStore(json_path).load()
+    if data is None:
+        raise StorageError(f"{json_path} not found")
+    state = normalize_state(data)
+    SqliteStore(sqlite_path).save(state)
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DLS Ultra storage tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="Copy a JSON database or backup into a SQLite database")
+    mig.add_argument("source", help="dls_ultra_db.json or a backup (.json.gz / .json)")
+    mig.add_argument("target", help="SQLite file to create/overwrite")
+    bak = sub.add_parser("backup", help="Write a compressed, checksummed backup of a database")
+    bak.add_argument("source", help="database file")
+    bak.add_argument("target", help="backup file to write (.json.gz)")
+    bak.add_argument("--backend", default="json", choices=["json", "sqlite"])
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        state = get_store(args.source, backend=args.backend).load()
+        if state is None:
+            parser.error(f"{args.source} holds no tournament")
+        with open(args.target, "wb") as f:
+            write_backup(normalize_state(state), f)
+        print(f"Backed up {len(state.get('teams', []))} teams and {len(state.get('results', {}))} results to {args.target}")
+    elif args.command == "migrate":
+        migrated = migrate_json_to_sqlite(args.source, args.target)
+        print(f"Migrated {len(migrated['teams'])} teams, {len(migrated['fixtures'])} fixtures, "
+              f"{len(migrated['results'])} results and {len(migrated['cumulative_player_stats'])} players "
+              f"to {args.target}")
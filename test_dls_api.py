@@ -0,0 +1,48 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dls_api import ApiError, TournamentApi, make_server
+from dls_registry import TournamentRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = TournamentRegistry(str(tmp_path / "tournaments.json"), str(tmp_path / "tournaments"))
+    tid = registry.create("Cup")
+    engine = registry.open(tid)
+    for name in ("Lions", "Eagles", "Wolves", "Sharks"):
+        engine.register_team(name)
+    engine.start_season("Classic Knockout", seed=1)
+    return registry
+
+
+@pytest.mark.parametrize("path", ["/api/nope", "/api/nope/", "/api/nope/standings"])
+def test_unknown_tournament_is_404(registry, path):
+    with pytest.raises(ApiError) as e:
+        TournamentApi(registry).get(path)
+    assert e.value.status == 404
+
+
+@pytest.mark.parametrize("path", ["/api/cup", "/api/cup/"])
+def test_summary(registry, path):
+    status, body, etag = TournamentApi(registry).get(path)
+    assert status == 200
+    assert json.loads(body)["name"] == "Cup"
+    assert TournamentApi(registry).get(path, if_none_match=etag)[0] == 304
+
+
+def test_http_unknown_tournament_is_404(registry):
+    server = make_server(registry, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/api/nope", timeout=5)
+        assert e.value.code == 404
+        assert "nope" in json.loads(e.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
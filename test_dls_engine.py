@@ -0,0 +1,59 @@
+import pytest
+
+from dls_engine import ConflictError, TournamentEngine
+from dls_storage import JsonStore, SqliteStore
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store_factory(request, tmp_path):
+    path = str(tmp_path / f"db.{request.param}")
+    return (lambda: JsonStore(path)) if request.param == "json" else (lambda: SqliteStore(path))
+
+
+def test_unrecorded_save_is_not_merged_across(store_factory):
+    a = TournamentEngine(store=store_factory())
+    for name in ("Lions", "Eagles", "Wolves", "Sharks"):
+        a.register_team(name)
+    a.save(full=True)
+    b = TournamentEngine(store=store_factory())
+    b.load()
+
+    # A changes state without mark_dirty() and saves; B then saves a recorded change on the old version
+    a.state.legacy_stats = {"Lions": {"titles": 1}}
+    a.save()
+    b.post_news("B was here")
+    with pytest.raises(ConflictError):
+        b.save()
+    assert b.state.legacy_stats == {"Lions": {"titles": 1}}
+
+
+def play(engine, start, count, seed):
+    for i in range(start, start + count):
+        s1, s2 = (i * seed) % 4, (i + seed) % 3
+        engine.record_result(i, s1, s2, meta={'h_s': f"Scorer {i % 5}", 'a_s': "Keeper" if s2 else ""})
+
+
+def test_snapshot_follows_saves_without_sharing_state(store_factory):
+    engine = TournamentEngine(store=store_factory(), undo_limit=5)
+    for i in range(12):
+        engine.register_team(f"Club {i:02d}")
+    engine.start_season("Survival Mode (Battle Royale)", seed=1)
+    play(engine, 0, 4, 3)
+    first = engine.snapshot()
+    first.get_cumulative_standings()
+    frozen = first.state.to_dict()
+    before = (repr(frozen), first.get_standings().rows(), first.player_table().total('G'))
+
+    play(engine, 4, len(engine.state.fixtures) - 4, 5)
+    engine.handle_battle_royale_elimination()
+    engine.undo()
+    play(engine, 0, 3, 7)
+    second = engine.snapshot()
+
+    assert second.state.to_dict() == engine.state.to_dict()
+    assert second.get_cumulative_standings() == engine.get_cumulative_standings()
+    assert second.leaderboard('G', 20).equals(engine.leaderboard('G', 20))
+    # The earlier snapshot, and the structures handed to it, never moved
+    assert (repr(first.state.to_dict()), first.get_standings().rows(), first.player_table().total('G')) == before
+    engine.post_news("Live only")
+    assert "Live only" not in second.state.news and second.get_standings() is not engine.get_standings()
@@ -0,0 +1,40 @@
+from collections import Counter
+
+import pytest
+
+from dls_fixtures import draw_phase_fixtures, generate_balanced_fixtures_fixed, tournament_rng
+
+
+def teams(n):
+    return [f"Club {i:02d}" for i in range(n)]
+
+
+@pytest.mark.parametrize("n", range(2, 61))
+def test_every_team_plays_exactly_k(n):
+    clubs = teams(n)
+    for k in range(1, 2 * n + 3):
+        fixtures = generate_balanced_fixtures_fixed(clubs, k)
+        played = Counter(team for fixture in fixtures for team in fixture)
+        assert all(home != away for home, away in fixtures), (n, k)
+        if n % 2 == 1 and k % 2 == 1:
+            # Single bye: the last team plays one match fewer
+            assert {t: played[t] for t in clubs[:-1]} == dict.fromkeys(clubs[:-1], k), (n, k)
+            assert played[clubs[-1]] == k - 1, (n, k)
+        else:
+            assert {t: played[t] for t in clubs} == dict.fromkeys(clubs, k), (n, k)
+
+
+@pytest.mark.parametrize("n", range(2, 61))
+def test_no_repeated_pairing_within_one_round_robin(n):
+    clubs = teams(n)
+    for k in range(1, n):
+        pairs = Counter(frozenset(fixture) for fixture in generate_balanced_fixtures_fixed(clubs, k))
+        assert max(pairs.values()) == 1, (n, k)
+
+
+@pytest.mark.parametrize("phase", ["Phase 1: The Purge", "Phase 2: The Squeeze"])
+def test_draw_is_deterministic_for_a_seed(phase):
+    clubs = teams(4 if "Squeeze" in phase else 23)
+    first = draw_phase_fixtures(clubs, phase, tournament_rng(1234, 1))
+    assert first == draw_phase_fixtures(list(reversed(clubs)), phase, tournament_rng(1234, 1))
+    assert generate_balanced_fixtures_fixed(clubs, 3) == generate_balanced_fixtures_fixed(clubs, 3)
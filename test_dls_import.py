@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from dls_engine import TournamentEngine
+from dls_import import import_records, iter_records
+
+
+@pytest.fixture
+def engine():
+    engine = TournamentEngine()
+    for name in ("Lions", "Eagles", "Wolves", "Sharks"):
+        engine.register_team(name)
+    engine.start_season("Home & Away League", seed=1)
+    return engine
+
+
+def csv_records(text):
+    return iter_records(io.StringIO(text), "csv")
+
+
+@pytest.mark.parametrize("goals", ["²", "١", "-1", "1.5", "99"])
+def test_bad_goal_cell_skips_only_that_row(engine, goals):
+    rows = ("home,away,home_goals,away_goals\n"
+            "Lions,Eagles,2,1\n"
+            f"Wolves,Sharks,{goals},0\n"
+            "Eagles,Lions,0,0\n")
+    report = import_records(engine, csv_records(rows), "results", chunk_size=2, save=False)
+    assert (report.read, report.imported) == (3, 2)
+    assert len(report.errors) == 1 and report.errors[0].startswith("Row 3:")
+    assert engine.state.cumulative_stats["Lions"]["GF"] == 2
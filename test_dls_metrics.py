@@ -0,0 +1,24 @@
+import time
+
+from dls_metrics import Metrics
+
+
+def test_rate_window_stays_bounded_without_scrapes(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    counter = Metrics(enabled=True).counter("dls_test_total", "test", window=60)
+    for _ in range(10_000):
+        counter.inc()
+        clock[0] += 1
+    assert len(counter._recent) <= 61
+    assert counter.recent() == 60
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    counter = metrics.counter("dls_test_total", "test", window=60)
+    histogram = metrics.histogram("dls_test_seconds", "test")
+    counter.inc()
+    histogram.observe(0.01)
+    assert "dls_test_total 0" in metrics.render()
+    assert "dls_test_seconds_count 0" in metrics.render()
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from dls_engine import TournamentEngine
+from dls_simulator import playing, remaining_schedule, simulate_survival_odds
+
+SURVIVAL = "Survival Mode (Battle Royale)"
+
+
+def play_round(engine, rnd):
+    for i in range(len(engine.state.fixtures)):
+        s1, s2 = rnd.randint(0, 3), rnd.randint(0, 3)
+        engine.record_result(i, s1, s2, *((rnd.randint(0, 5), rnd.randint(0, 5)) if engine.needs_penalties(s1, s2) else ()))
+
+
+@pytest.mark.parametrize("n", [5, 6, 9, 12])
+def test_schedule_follows_the_engine_round_for_round(n):
+    engine = TournamentEngine()
+    for i in range(n):
+        engine.register_team(f"Club {i:02d}")
+    engine.start_season(SURVIVAL, seed=n)
+    rnd = random.Random(n)
+    schedule = remaining_schedule(n, engine.state.battle_phase, engine.state.sudden_death_round)
+    for alive, play, cut in schedule:
+        s = engine.state
+        assert (len(s.active_teams), playing(s.battle_phase, s.sudden_death_round)) == (alive, play)
+        play_round(engine, rnd)
+        out = engine.handle_battle_royale_elimination()
+        assert len(out) == {"purge": 2, "squeeze": 1, "standoff": 1}.get(cut, 0)
+
+
+def test_odds_from_the_deciding_legs():
+    engine = TournamentEngine()
+    for i in range(3):
+        engine.register_team(f"Club {i}")
+    engine.start_season(SURVIVAL, seed=1)
+    rnd = random.Random(1)
+    while engine.state.sudden_death_round < 2:
+        play_round(engine, rnd)
+        engine.handle_battle_royale_elimination()
+    s = engine.state
+    odds = simulate_survival_odds(s.cumulative_stats, s.active_teams, s.fixtures, s.results, n_sims=2000, seed=1,
+                                  battle_phase=s.battle_phase, sudden_death_round=s.sudden_death_round)
+    assert odds['rounds'][0] == "Phase 3: The Standoff"
+    # These legs decide the tie: exactly one club goes out, then the empty round, then the final
+    assert odds['eliminated'].sum(axis=1) == pytest.approx([1, 0, 1])
+    assert odds['champion'].sum() == pytest.approx(1)